@@ -0,0 +1,85 @@
+"""
+Benchmarks the encoding of a full page of glucose levels (limit=1000).
+
+Compares the response model path FastAPI takes for `Sequence[GlucoseLevelResponse]`
+(validation of every ORM object with `from_attributes`, then the standard library
+JSON encoder) with `encode_levels_json` on the rows the endpoint selects, and checks
+that both produce the same bytes, for full records and for a sparse fieldset.
+
+Example usage:
+    python -m benchmarks.levels_serialization
+"""
+
+import timeit
+from datetime import datetime, timedelta
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy.engine import result_tuple
+
+from src.db.models import UserGlucoseData
+from src.domain.export import encode_levels_json
+from src.webapp.schema import GlucoseLevelFieldsResponse, GlucoseLevelResponse
+
+PAGE_SIZE = 1000
+REPEAT = 50
+
+FIELDS = list(GlucoseLevelResponse.model_fields)
+SPARSE_FIELDS = ["device_timestamp", "glucose_value_history"]
+
+
+def build_page() -> tuple[list[UserGlucoseData], list]:
+    start = datetime(2024, 1, 1)
+    levels = [
+        UserGlucoseData(
+            id=index + 1,
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            device="FreeStyle LibreLink",
+            serial_number="ABCDEF-12345",
+            device_timestamp=start + timedelta(minutes=15 * index),
+            record_type=index % 2,
+            glucose_value_history=70 + index % 120 if index % 2 == 0 else None,
+            glucose_scan=float(80 + index % 90) if index % 2 else None,
+            carbs_grams=12.5 if index % 50 == 0 else None,
+            notes="Frühstück" if index % 100 == 0 else None,
+        )
+        for index in range(PAGE_SIZE)
+    ]
+    make_row = result_tuple(FIELDS)
+    rows = [make_row([getattr(level, name) for name in FIELDS]) for level in levels]
+    return levels, rows
+
+
+def main() -> None:
+    levels, rows = build_page()
+    adapter = TypeAdapter(list[GlucoseLevelResponse])
+
+    def response_model() -> bytes:
+        models = adapter.validate_python(levels, from_attributes=True)
+        return bytes(JSONResponse(adapter.dump_python(models, mode="json")).body)
+
+    def direct() -> bytes:
+        return encode_levels_json(rows, FIELDS)
+
+    assert response_model() == direct(), "Encodings differ"
+
+    # The sparse fields are in model order, so the bytes match as well
+    sparse_adapter = TypeAdapter(list[GlucoseLevelFieldsResponse])
+    sparse_models = sparse_adapter.validate_python(
+        [{field: getattr(level, field) for field in SPARSE_FIELDS} for level in levels]
+    )
+    sparse_content = JSONResponse(
+        sparse_adapter.dump_python(sparse_models, mode="json", exclude_unset=True)
+    )
+    sparse_direct = encode_levels_json(rows, SPARSE_FIELDS)
+    assert bytes(sparse_content.body) == sparse_direct, "Sparse encodings differ"
+
+    results = {}
+    for name, encode in [("response model", response_model), ("direct", direct)]:
+        results[name] = min(timeit.repeat(encode, number=1, repeat=REPEAT))
+        print(f"{name:>15}: {results[name] * 1000:7.2f} ms per page")
+    print(f"{'speedup':>15}: {results['response model'] / results['direct']:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Shows which partitions of `user_glucose_data` the repository's range reads touch.
+
+Runs `EXPLAIN` on the queries the API sends for a user's newest readings and prints
+the partitions MySQL reads for each, with the median time of the query. Range reads
+should only list the partitions of the months they cover, while the unbounded
+history page, shown for comparison, lists every partition.
+
+Needs the database settings in the environment and the partitioning migration
+applied, e.g.:
+    python -m benchmarks.partition_pruning --user-id aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa
+"""
+
+import asyncio
+import statistics
+import time
+from datetime import timedelta
+
+import click
+from sqlalchemy import Select, func, select
+from sqlalchemy.dialects import mysql
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from src.db.models import UserGlucoseData
+from src.db.repository import (
+    GLUCOSE_VALUE,
+    DatabaseRepository,
+    bucket_start,
+    device_timestamp_range,
+)
+from src.webapp.settings import get_settings
+
+REPEAT = 20
+
+
+def page(user_id: str, **kwargs) -> Select:
+    return DatabaseRepository._user_glucose_data_query(
+        select(UserGlucoseData),
+        user_id,
+        start=kwargs.get("start"),
+        end=kwargs.get("end"),
+        sort=kwargs.get("sort", "desc"),
+        limit=kwargs.get("limit", 1000),
+        offset=0,
+        after=kwargs.get("after"),
+    )
+
+
+def hourly_aggregates(user_id: str, start, end) -> Select:
+    bucket = bucket_start(UserGlucoseData.device_timestamp, 60)
+    return (
+        select(bucket, func.count(GLUCOSE_VALUE), func.avg(GLUCOSE_VALUE))
+        .where(
+            UserGlucoseData.user_id == user_id,
+            GLUCOSE_VALUE.is_not(None),
+            *device_timestamp_range(start, end),
+        )
+        .group_by(bucket)
+    )
+
+
+async def measure(connection: AsyncConnection, name: str, query: Select) -> None:
+    sql = str(
+        query.compile(dialect=mysql.dialect(), compile_kwargs={"literal_binds": True})
+    )
+    plan = (await connection.exec_driver_sql(f"EXPLAIN {sql}")).mappings().first()
+    partitions = (plan["partitions"] if plan else None) or ""
+
+    timings = []
+    for _ in range(REPEAT):
+        started = time.perf_counter()
+        await connection.exec_driver_sql(sql)
+        timings.append(time.perf_counter() - started)
+
+    print(f"{name}")
+    print(f"    partitions ({len(partitions.split(','))}): {partitions}")
+    print(f"    median: {statistics.median(timings) * 1000:.2f} ms")
+
+
+async def run(user_id: str) -> None:
+    engine = create_async_engine(get_settings().ASYNC_DATABASE_URI)
+    try:
+        async with engine.connect() as connection:
+            newest = (
+                await connection.execute(
+                    select(func.max(UserGlucoseData.device_timestamp)).where(
+                        UserGlucoseData.user_id == user_id
+                    )
+                )
+            ).scalar()
+            if newest is None:
+                raise click.ClickException(f"No readings for user {user_id}")
+
+            week = newest - timedelta(days=7)
+            month = newest - timedelta(days=30)
+            quarter = newest - timedelta(days=90)
+            queries = [
+                ("Last 7 days", page(user_id, start=week, end=newest)),
+                ("Last 30 days", page(user_id, start=month, end=newest)),
+                ("Next page (cursor)", page(user_id, after=(week, 0))),
+                (
+                    "Hourly aggregates, 90 days",
+                    hourly_aggregates(user_id, quarter, newest),
+                ),
+                ("Whole history (no range, for comparison)", page(user_id)),
+            ]
+            for name, query in queries:
+                await measure(connection, name, query)
+    finally:
+        await engine.dispose()
+
+
+@click.command()
+@click.option("--user-id", required=True, help="User whose readings are queried.")
+def main(user_id: str) -> None:
+    asyncio.run(run(user_id))
+
+
+if __name__ == "__main__":
+    main()
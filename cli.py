@@ -1,12 +1,22 @@
+import asyncio
+from datetime import datetime
+
 import click
 import uvicorn
 
+from src.db.main import DatabaseManager
+from src.db.partitions import add_months, month_start
+from src.db.repository import DatabaseRepository
+from src.webapp.settings import get_settings
+
+APP = "src.webapp.main:app"
+
 
 def run_service():
     """
-    Launches the FastAPI webapp using Uvicorn.
+    Launches the FastAPI webapp using Uvicorn, reloading it on code changes.
     """
-    uvicorn.run("src.webapp.main:app", host="0.0.0.0", port=8000, reload=True)
+    uvicorn.run(APP, host="0.0.0.0", port=8000, reload=True)
 
 
 @click.group()
@@ -15,14 +25,164 @@ def cli():
 
 
 @cli.command()
-def run_webapp():
+@click.option(
+    "--prod",
+    is_flag=True,
+    help="Serve with Gunicorn and Uvicorn workers (uvloop, httptools), no reload.",
+)
+@click.option("--host", default="0.0.0.0", show_default=True, help="With --prod.")
+@click.option("--port", default=8000, show_default=True, help="With --prod.")
+@click.option(
+    "--workers",
+    type=click.IntRange(min=1),
+    default=None,
+    help=(
+        "Worker processes with --prod. [default: number of CPUs divided by the"
+        " processes each worker uses, itself plus CSV_PARSER_WORKERS]"
+    ),
+)
+@click.option(
+    "--keep-alive",
+    default=5,
+    show_default=True,
+    help="Seconds an idle keep-alive connection is kept open, with --prod.",
+)
+@click.option(
+    "--backlog",
+    default=2048,
+    show_default=True,
+    help="Maximum number of pending connections, with --prod.",
+)
+@click.option(
+    "--graceful-timeout",
+    default=30,
+    show_default=True,
+    help="Seconds workers get to drain open requests on shutdown, with --prod.",
+)
+@click.option(
+    "--preload",
+    is_flag=True,
+    help="Import the app once before forking the workers, with --prod.",
+)
+def run_webapp(
+    prod: bool,
+    host: str,
+    port: int,
+    workers: int | None,
+    keep_alive: int,
+    backlog: int,
+    graceful_timeout: int,
+    preload: bool,
+):
     """
     Runs the web application via Uvicorn.
 
+    Without --prod, a single process serves the app and reloads it on code changes.
+    With --prod, Gunicorn runs the workers and reports the startup time and memory
+    of the master and of every worker. Several workers need background ingestion
+    jobs to be disabled, as their state is kept in the memory of one worker.
+
     Example usage:
         python cli.py run-webapp
+        python cli.py run-webapp --prod --workers 1
+        INGEST_BACKGROUND_JOBS_ENABLED=false \\
+            python cli.py run-webapp --prod --workers 4 --preload
+    """
+    if not prod:
+        run_service()
+        return
+
+    # Gunicorn only runs on Unix
+    from src.webapp.server import default_worker_count, run_production_server
+
+    settings = get_settings()
+    workers = workers or default_worker_count(settings.CSV_PARSER_WORKERS)
+    if workers > 1 and settings.INGEST_BACKGROUND_JOBS_ENABLED:
+        raise click.UsageError(
+            "Background ingestion jobs are kept in the memory of one worker, so "
+            "job status requests would fail on the others. Run a single worker "
+            "(--workers 1) or set INGEST_BACKGROUND_JOBS_ENABLED=false."
+        )
+
+    run_production_server(
+        APP,
+        host=host,
+        port=port,
+        workers=workers,
+        keep_alive=keep_alive,
+        backlog=backlog,
+        graceful_timeout=graceful_timeout,
+        preload=preload,
+    )
+
+
+async def rebuild_rollups(user_id: str | None) -> None:
+    """
+    Rebuilds the glucose rollup tables from the raw readings.
+    """
+    DatabaseManager(get_settings().ASYNC_DATABASE_URI)
+    try:
+        async for session in DatabaseManager.get_session():
+            await DatabaseRepository(session).rebuild_glucose_rollups(user_id=user_id)
+    finally:
+        await DatabaseManager.dispose_engine()
+
+
+@cli.command("rebuild-rollups")
+@click.option("--user-id", default=None, help="Only rebuild the rollups of this user.")
+def rebuild_rollups_command(user_id: str | None):
+    """
+    Rebuilds the hourly and daily glucose rollups from the stored readings.
+
+    Example usage:
+        python cli.py rebuild-rollups
+        python cli.py rebuild-rollups --user-id aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa
+    """
+    asyncio.run(rebuild_rollups(user_id))
+    click.echo("Rollups rebuilt")
+
+
+async def create_partitions(months_ahead: int) -> list[str]:
+    """
+    Creates the monthly partitions of the glucose readings up to `months_ahead`
+    months after the current one.
+    """
+    DatabaseManager(get_settings().ASYNC_DATABASE_URI)
+    try:
+        async for session in DatabaseManager.get_session():
+            return await DatabaseRepository(session).create_glucose_data_partitions(
+                until=add_months(month_start(datetime.now()), months_ahead)
+            )
+        return []
+    finally:
+        await DatabaseManager.dispose_engine()
+
+
+@cli.command("create-partitions")
+@click.option(
+    "--months-ahead",
+    type=click.IntRange(min=0),
+    default=3,
+    show_default=True,
+    help="Months after the current one to create partitions for.",
+)
+def create_partitions_command(months_ahead: int):
+    """
+    Creates future monthly partitions of the glucose readings ahead of time, while
+    the catch-all partition they are split off is empty. Run it e.g. monthly.
+
+    Example usage:
+        python cli.py create-partitions
+        python cli.py create-partitions --months-ahead 6
     """
-    run_service()
+    try:
+        created = asyncio.run(create_partitions(months_ahead))
+    except ValueError as e:
+        raise click.ClickException(str(e))
+    if created:
+        click.echo(f"Created partitions {', '.join(created)}")
+    else:
+        click.echo("All partitions exist")
 
 
 if __name__ == "__main__":
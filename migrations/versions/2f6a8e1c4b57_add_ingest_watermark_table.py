@@ -0,0 +1,43 @@
+"""add ingest_watermark table
+
+Revision ID: 2f6a8e1c4b57
+Revises: 7c3f0d2b9a41
+Create Date: 2025-06-16 08:42:05.118902
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "2f6a8e1c4b57"
+down_revision: Union[str, None] = "7c3f0d2b9a41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ingest_watermark",
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("serial_number", sa.String(length=100), nullable=False),
+        sa.Column("max_device_timestamp", sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint("user_id", "serial_number"),
+    )
+    # Backfill from the readings that are already stored
+    op.execute(
+        """
+        INSERT INTO ingest_watermark (user_id, serial_number, max_device_timestamp)
+        SELECT user_id, serial_number, MAX(device_timestamp)
+        FROM user_glucose_data
+        GROUP BY user_id, serial_number
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("ingest_watermark")
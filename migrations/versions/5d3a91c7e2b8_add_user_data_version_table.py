@@ -0,0 +1,48 @@
+"""add user_data_version table
+
+Revision ID: 5d3a91c7e2b8
+Revises: 9b4e27d1f0c3
+Create Date: 2025-06-30 10:14:48.551273
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "5d3a91c7e2b8"
+down_revision: Union[str, None] = "9b4e27d1f0c3"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "user_data_version",
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("user_id"),
+    )
+    # Every user with stored readings starts at version 1
+    op.execute(
+        """
+        INSERT INTO user_data_version (user_id, version, updated_at)
+        SELECT user_id, 1, NOW()
+        FROM user_glucose_data
+        GROUP BY user_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("user_data_version")
@@ -0,0 +1,71 @@
+"""add natural key on user_glucose_data and csv_upload table
+
+Revision ID: 7c3f0d2b9a41
+Revises: e1928941ddfa
+Create Date: 2025-06-09 10:21:48.730114
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "7c3f0d2b9a41"
+down_revision: Union[str, None] = "e1928941ddfa"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Keep the oldest copy of every reading that was uploaded more than once
+    op.execute(
+        """
+        DELETE duplicate FROM user_glucose_data AS duplicate
+        JOIN user_glucose_data AS original
+          ON original.user_id = duplicate.user_id
+         AND original.serial_number = duplicate.serial_number
+         AND original.device_timestamp = duplicate.device_timestamp
+         AND original.record_type = duplicate.record_type
+         AND original.id < duplicate.id
+        """
+    )
+    op.create_index(
+        "uq_user_glucose_data_natural_key",
+        "user_glucose_data",
+        ["user_id", "serial_number", "device_timestamp", "record_type"],
+        unique=True,
+    )
+
+    op.create_table(
+        "csv_upload",
+        sa.Column("id", sa.BIGINT(), nullable=False),
+        sa.Column("user_id", sa.String(length=36), nullable=False),
+        sa.Column("content_hash", sa.String(length=64), nullable=False),
+        sa.Column("row_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(),
+            server_default=sa.text("now()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "uq_csv_upload_user_id_content_hash",
+        "csv_upload",
+        ["user_id", "content_hash"],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("uq_csv_upload_user_id_content_hash", table_name="csv_upload")
+    op.drop_table("csv_upload")
+    op.drop_index(
+        "uq_user_glucose_data_natural_key",
+        table_name="user_glucose_data",
+    )
@@ -0,0 +1,88 @@
+"""add hourly and daily glucose rollup tables
+
+Revision ID: 9b4e27d1f0c3
+Revises: 2f6a8e1c4b57
+Create Date: 2025-06-23 15:37:12.904611
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "9b4e27d1f0c3"
+down_revision: Union[str, None] = "2f6a8e1c4b57"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Rollup tables and their bucket width in minutes
+ROLLUP_TABLES = {"glucose_rollup_hourly": 60, "glucose_rollup_daily": 1440}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    for table_name in ROLLUP_TABLES:
+        op.create_table(
+            table_name,
+            sa.Column("user_id", sa.String(length=36), nullable=False),
+            sa.Column("bucket_start", sa.DateTime(), nullable=False),
+            sa.Column("reading_count", sa.Integer(), nullable=False),
+            sa.Column("value_sum", sa.Double(), nullable=False),
+            sa.Column("value_sum_squares", sa.Double(), nullable=False),
+            sa.Column("value_min", sa.Float(), nullable=False),
+            sa.Column("value_max", sa.Float(), nullable=False),
+            sa.Column("below_range_count", sa.Integer(), nullable=False),
+            sa.Column("in_range_count", sa.Integer(), nullable=False),
+            sa.Column("above_range_count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("user_id", "bucket_start"),
+        )
+    # Backfill from the readings that are already stored, with the buckets aligned
+    # to 2000-01-03 and the target range of 70-180 mg/dL like the repository
+    for table_name, bucket_minutes in ROLLUP_TABLES.items():
+        op.execute(
+            f"""
+            INSERT INTO {table_name} (
+                user_id, bucket_start, reading_count, value_sum, value_sum_squares,
+                value_min, value_max, below_range_count, in_range_count,
+                above_range_count
+            )
+            SELECT
+                user_id,
+                bucket_start,
+                COUNT(glucose_value),
+                SUM(glucose_value),
+                SUM(glucose_value * glucose_value),
+                MIN(glucose_value),
+                MAX(glucose_value),
+                SUM(CASE WHEN glucose_value < 70 THEN 1 ELSE 0 END),
+                SUM(CASE WHEN glucose_value BETWEEN 70 AND 180 THEN 1 ELSE 0 END),
+                SUM(CASE WHEN glucose_value > 180 THEN 1 ELSE 0 END)
+            FROM (
+                SELECT
+                    user_id,
+                    TIMESTAMPADD(
+                        MINUTE,
+                        FLOOR(
+                            TIMESTAMPDIFF(
+                                MINUTE,
+                                CAST('2000-01-03 00:00:00' AS DATETIME),
+                                device_timestamp
+                            ) / {bucket_minutes}
+                        ) * {bucket_minutes},
+                        CAST('2000-01-03 00:00:00' AS DATETIME)
+                    ) AS bucket_start,
+                    COALESCE(glucose_value_history, glucose_scan) AS glucose_value
+                FROM user_glucose_data
+            ) AS readings
+            WHERE glucose_value IS NOT NULL
+            GROUP BY user_id, bucket_start
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table_name in ROLLUP_TABLES:
+        op.drop_table(table_name)
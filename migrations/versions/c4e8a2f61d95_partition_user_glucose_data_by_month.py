@@ -0,0 +1,72 @@
+"""partition user_glucose_data by month
+
+Revision ID: c4e8a2f61d95
+Revises: 5d3a91c7e2b8
+Create Date: 2025-07-07 09:21:35.118204
+
+"""
+
+from datetime import datetime
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import context, op
+
+from src.db.partitions import (
+    add_months,
+    month_partitions,
+    month_start,
+    partition_definitions,
+)
+
+# revision identifiers, used by Alembic.
+revision: str = "c4e8a2f61d95"
+down_revision: Union[str, None] = "5d3a91c7e2b8"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Months after the current one that get a partition right away
+MONTHS_AHEAD = 3
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Optional subpartitioning by user: alembic -x user_subpartitions=8 upgrade head
+    user_subpartitions = int(
+        context.get_x_argument(as_dictionary=True).get("user_subpartitions", 0)
+    )
+
+    # Every unique key has to contain the partitioning columns
+    primary_key = "id, device_timestamp"
+    if user_subpartitions:
+        primary_key += ", user_id"
+    op.execute(
+        "ALTER TABLE user_glucose_data "
+        f"DROP PRIMARY KEY, ADD PRIMARY KEY ({primary_key})"
+    )
+
+    current_month = month_start(datetime.now())
+    oldest = (
+        op.get_bind()
+        .execute(sa.text("SELECT MIN(device_timestamp) FROM user_glucose_data"))
+        .scalar()
+    )
+    partitions = month_partitions(
+        oldest or current_month, add_months(current_month, MONTHS_AHEAD)
+    )
+    subpartitioning = (
+        f" SUBPARTITION BY KEY (user_id) SUBPARTITIONS {user_subpartitions}"
+        if user_subpartitions
+        else ""
+    )
+    op.execute(
+        "ALTER TABLE user_glucose_data "
+        f"PARTITION BY RANGE COLUMNS (device_timestamp){subpartitioning} "
+        f"({partition_definitions(partitions)})"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("ALTER TABLE user_glucose_data REMOVE PARTITIONING")
+    op.execute("ALTER TABLE user_glucose_data DROP PRIMARY KEY, ADD PRIMARY KEY (id)")
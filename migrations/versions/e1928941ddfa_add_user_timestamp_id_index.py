@@ -0,0 +1,35 @@
+"""add user_id, device_timestamp, id index
+
+Revision ID: e1928941ddfa
+Revises: 513ade8ac045
+Create Date: 2025-06-02 09:14:27.512033
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "e1928941ddfa"
+down_revision: Union[str, None] = "513ade8ac045"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        "ix_user_glucose_data_user_id_device_timestamp_id",
+        "user_glucose_data",
+        ["user_id", "device_timestamp", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(
+        "ix_user_glucose_data_user_id_device_timestamp_id",
+        table_name="user_glucose_data",
+    )
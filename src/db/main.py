@@ -1,61 +1,293 @@
 import logging
-from typing import AsyncIterator, Optional
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass, replace
+from itertools import count
+from typing import AsyncIterator, Optional, Sequence
 
+from prometheus_client import Histogram
+from sqlalchemy import Connection, event, exc
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry
 from sqlalchemy.sql import text
 
 _logger = logging.getLogger(__name__)
 
+QUERY_DURATION = Histogram(
+    "glucose_db_query_duration_seconds",
+    "Duration of database statements, from sending them to the end of execution",
+    ["statement"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+
+# Statement types recorded separately, all others are recorded as "OTHER"
+STATEMENT_TYPES = {"SELECT", "INSERT", "UPDATE", "DELETE"}
+
+_QUERY_STARTED = "query_started"
+
+
+@dataclass
+class PoolWaitStats:
+    """
+    Time spent acquiring connections from the pool, since the engine was created.
+    """
+
+    acquisitions: int = 0
+    timeouts: int = 0
+    wait_seconds_total: float = 0.0
+    wait_seconds_max: float = 0.0
+
+
+@dataclass
+class PoolStatus:
+    """
+    Snapshot of the connection pool of the engine.
+    """
+
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    wait: PoolWaitStats
+
+
+class TimedAsyncQueuePool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long checkouts wait for a connection, including
+    the time to open a new one.
+    """
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.wait_stats = PoolWaitStats()
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.wait_stats.timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - started
+            self.wait_stats.acquisitions += 1
+            self.wait_stats.wait_seconds_total += waited
+            self.wait_stats.wait_seconds_max = max(
+                self.wait_stats.wait_seconds_max, waited
+            )
+
+
+def statement_type(statement: str) -> str:
+    """
+    Returns the type of an SQL statement, e.g. `SELECT`, for the metric labels.
+    """
+    keyword = statement.lstrip()[:6].upper()
+    return keyword if keyword in STATEMENT_TYPES else "OTHER"
+
+
+def _before_cursor_execute(conn: Connection, *args) -> None:
+    conn.info[_QUERY_STARTED] = time.perf_counter()
+
+
+def _after_cursor_execute(conn: Connection, cursor, statement: str, *args) -> None:
+    started = conn.info.pop(_QUERY_STARTED, None)
+    if started is not None:
+        QUERY_DURATION.labels(statement_type(statement)).observe(
+            time.perf_counter() - started
+        )
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """
+    Records the duration of every statement run on an engine in `QUERY_DURATION`.
+    """
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
 
 class DatabaseManager:
     """
     Manages the configuration and sessions setup for the database.
+
+    The engines and their session factories are created once per process, by the
+    first instantiation, and shared by all requests. Writes go to the primary
+    engine; reads can be spread over read replicas, see `get_read_session`.
     """
 
-    _instance = None
+    _instance: Optional["DatabaseManager"] = None
     _async_engine: Optional[AsyncEngine] = None
+    _session_factory: Optional[async_sessionmaker[AsyncSession]] = None
+    _read_engines: list[AsyncEngine] = []
+    _read_session_factories: list[async_sessionmaker[AsyncSession]] = []
+    _next_replica = count()
 
-    def __new__(cls, database_uri: str):
-        if not hasattr(cls, "instance"):
-            cls.instance = super(DatabaseManager, cls).__new__(cls)
-            cls._async_engine = create_async_engine(url=database_uri, echo=False)
-        return cls.instance
+    def __new__(
+        cls,
+        database_uri: str,
+        pool_size: int = 10,
+        max_overflow: int = 20,
+        pool_timeout: float = 30.0,
+        pool_recycle: int = 1800,
+        pool_pre_ping: bool = True,
+        read_replica_uris: Sequence[str] = (),
+    ):
+        """
+        Args:
+            database_uri (str): Async SQLAlchemy database URI.
+            pool_size (int): Number of connections kept open in the pool.
+            max_overflow (int): Number of connections opened beyond `pool_size`
+                under load, and closed when returned.
+            pool_timeout (float): Seconds to wait for a connection before failing.
+            pool_recycle (int): Age in seconds after which a connection is replaced,
+                before the server or a proxy drops it.
+            pool_pre_ping (bool): Whether to test connections on checkout.
+            read_replica_uris (Sequence[str]): Async URIs of read replicas of the
+                database, each with its own pool of the same size (optional).
+        """
+        if cls._instance is None:
+            cls._instance = super(DatabaseManager, cls).__new__(cls)
+            engines = [
+                create_async_engine(
+                    url=uri,
+                    echo=False,
+                    poolclass=TimedAsyncQueuePool,
+                    pool_size=pool_size,
+                    max_overflow=max_overflow,
+                    pool_timeout=pool_timeout,
+                    pool_recycle=pool_recycle,
+                    pool_pre_ping=pool_pre_ping,
+                )
+                for uri in [database_uri, *read_replica_uris]
+            ]
+            for engine in engines:
+                instrument_engine(engine)
+            cls._async_engine, *cls._read_engines = engines
+            cls._session_factory = async_sessionmaker(
+                bind=cls._async_engine, expire_on_commit=False
+            )
+            cls._read_session_factories = [
+                async_sessionmaker(bind=engine, expire_on_commit=False)
+                for engine in cls._read_engines
+            ]
+        return cls._instance
 
     @staticmethod
     async def get_session() -> AsyncIterator[AsyncSession]:
         """
-        Initializes an asynchronous database session using SQLAlchemy's
-        async engine and sessionmaker. It yields an `AsyncSession` instance, which can
-        be used to interact with the database. The session is automatically closed
-        after usage.
+        Yields an `AsyncSession` from the shared session factory, which can be used
+        to interact with the database. The session is automatically closed after
+        usage.
 
         Returns:
             AsyncSession: database session.
         """
-        Session = async_sessionmaker(
-            bind=DatabaseManager._async_engine, expire_on_commit=False
-        )
+        if DatabaseManager._session_factory is None:
+            raise RuntimeError("DatabaseManager has not been initialized")
+
+        async with DatabaseManager._session_factory() as session:
+            yield session
+
+    @staticmethod
+    async def get_read_session() -> AsyncIterator[AsyncSession]:
+        """
+        Yields an `AsyncSession` for queries that only read, from the read replicas
+        in turn. A replica that cannot be connected to is skipped, and the primary
+        is used if none can, or if there are no replicas.
+
+        Replicas may lag behind the primary, so data written in a request is not
+        necessarily visible to reads in the same or the next request.
+
+        Returns:
+            AsyncSession: database session.
+        """
+        factories = DatabaseManager._read_session_factories
+        first = next(DatabaseManager._next_replica)
+        for offset in range(len(factories)):
+            session = factories[(first + offset) % len(factories)]()
+            try:
+                # Connect eagerly, to fall back before the session is handed out
+                await session.connection()
+            except (exc.SQLAlchemyError, OSError) as e:
+                await session.close()
+                _logger.warning(f"Read replica unavailable, trying the next: {e}")
+                continue
+
+            async with session:
+                yield session
+            return
 
-        async with Session() as session:
+        async for session in DatabaseManager.get_session():
             yield session
 
+    @classmethod
+    async def warm_up(cls, connections: int) -> None:
+        """
+        Opens connections up front, so the first requests do not pay for the
+        connection handshakes. The connections are returned to the pool.
+
+        Args:
+            connections (int): Number of connections to open, at most the pool size.
+        """
+        if cls._async_engine is None:
+            return
+
+        for engine in [cls._async_engine, *cls._read_engines]:
+            async with AsyncExitStack() as stack:
+                # Held together, otherwise the pool would hand out one connection
+                for _ in range(connections):
+                    connection = await stack.enter_async_context(engine.connect())
+                    await connection.execute(text("SELECT 1"))
+        _logger.info(
+            f"Warmed up {connections} connections per database engine "
+            f"({1 + len(cls._read_engines)} engines)."
+        )
+
+    @classmethod
+    def get_pool_status(cls) -> PoolStatus | None:
+        """
+        Returns the state of the connection pool of the primary engine, or None if
+        there is no engine.
+        """
+        if cls._async_engine is None:
+            return None
+
+        pool = cls._async_engine.pool
+        if not isinstance(pool, TimedAsyncQueuePool):
+            return None
+        return PoolStatus(
+            size=pool.size(),
+            max_overflow=pool._max_overflow,
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            # Negative while the pool has not opened `size` connections yet
+            overflow=max(pool.overflow(), 0),
+            wait=replace(pool.wait_stats),
+        )
+
     @classmethod
     async def dispose_engine(cls) -> None:
         """
-        Disposes the current async engine.
+        Disposes the current async engines.
 
         This method is used to safely close and release resources associated
-        with the current async engine.
+        with the current async engines. The next instantiation creates a new one.
         """
         if cls._async_engine is not None:
             _logger.info("Disposing of the current async engine.")
             await cls._async_engine.dispose()
+        for engine in cls._read_engines:
+            await engine.dispose()
         cls._async_engine = None
+        cls._session_factory = None
+        cls._read_engines = []
+        cls._read_session_factories = []
+        cls._instance = None
 
 
 async def check_db_connection(session: AsyncSession) -> bool:
@@ -1,6 +1,16 @@
 from datetime import datetime
 
-from sqlalchemy import BIGINT, Float, Integer, String, Text
+from sqlalchemy import (
+    BIGINT,
+    DateTime,
+    Double,
+    Float,
+    Index,
+    Integer,
+    String,
+    Text,
+    func,
+)
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
 
@@ -14,13 +24,34 @@ class UserGlucoseData(Base):
     """
 
     __tablename__ = "user_glucose_data"
+    __table_args__ = (
+        # Serves the per-user range scans and the keyset pagination seek.
+        Index(
+            "ix_user_glucose_data_user_id_device_timestamp_id",
+            "user_id",
+            "device_timestamp",
+            "id",
+        ),
+        # Natural key of a reading, so re-uploaded history is upserted, not duplicated.
+        Index(
+            "uq_user_glucose_data_natural_key",
+            "user_id",
+            "serial_number",
+            "device_timestamp",
+            "record_type",
+            unique=True,
+        ),
+    )
 
-    id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    # The table is partitioned by month of `device_timestamp` (see
+    # `src.db.partitions`), and MySQL requires the partitioning columns in every
+    # unique key. `id` alone is still unique, as it is auto-incremented.
+    id: Mapped[int] = mapped_column(BIGINT, primary_key=True, autoincrement=True)
     user_id: Mapped[str] = mapped_column(String(36), nullable=False)
 
     device: Mapped[str] = mapped_column(String(100))
     serial_number: Mapped[str] = mapped_column(String(100))
-    device_timestamp: Mapped[datetime] = mapped_column()
+    device_timestamp: Mapped[datetime] = mapped_column(primary_key=True)
     record_type: Mapped[int] = mapped_column(Integer)
 
     glucose_value_history: Mapped[int] = mapped_column(Integer, nullable=True)
@@ -44,27 +75,130 @@ class UserGlucoseData(Base):
     correction_insulin: Mapped[float] = mapped_column(Float, nullable=True)
     insulin_change_by_user: Mapped[float] = mapped_column(Float, nullable=True)
 
+    # Columns that identify a reading, see `uq_user_glucose_data_natural_key`
+    NATURAL_KEY = ("user_id", "serial_number", "device_timestamp", "record_type")
+
     @staticmethod
     def convert_item_to_db_model(item, user_id: str):
-        return UserGlucoseData(
-            user_id=user_id,
-            device=item.Gerät,
-            serial_number=item.Seriennummer,
-            device_timestamp=item.Gerätezeitstempel,
-            record_type=item.Aufzeichnungstyp,
-            glucose_value_history=item.Glukosewert_Verlauf_mg_dL,
-            glucose_scan=item.Glukose_Scan_mg_dL,
-            non_numeric_fast_insulin=item.Nicht_numerisches_schnellwirkendes_Insulin,
-            fast_insulin_units=item.Schnellwirkendes_Insulin_Einheiten,
-            non_numeric_food=item.Nicht_numerische_Nahrungsdaten,
-            carbs_grams=item.Kohlenhydrate_Gramm,
-            carbs_portions=item.Kohlenhydrate_Portionen,
-            non_numeric_long_insulin=item.Nicht_numerisches_Depotinsulin,
-            long_insulin_units=item.Depotinsulin_Einheiten,
-            notes=item.Notizen,
-            glucose_teststrip=item.Glukose_Teststreifen_mg_dL,
-            ketone=item.Keton_mmol_L,
-            meal_insulin=item.Mahlzeiteninsulin_Einheiten,
-            correction_insulin=item.Korrekturinsulin_Einheiten,
-            insulin_change_by_user=item.Insulin_Änderung_durch_Anwender_Einheiten,
-        )
+        return UserGlucoseData(**UserGlucoseData.convert_item_to_row(item, user_id))
+
+    @staticmethod
+    def convert_item_to_row(item, user_id: str) -> dict:
+        """
+        Maps a parsed CSV record to a plain column/value dict, suitable for bulk
+        Core inserts without building ORM instances.
+        """
+        return {
+            "user_id": user_id,
+            "device": item.Gerät,
+            "serial_number": item.Seriennummer,
+            "device_timestamp": item.Gerätezeitstempel,
+            "record_type": item.Aufzeichnungstyp,
+            "glucose_value_history": item.Glukosewert_Verlauf_mg_dL,
+            "glucose_scan": item.Glukose_Scan_mg_dL,
+            "non_numeric_fast_insulin": item.Nicht_numerisches_schnellwirkendes_Insulin,
+            "fast_insulin_units": item.Schnellwirkendes_Insulin_Einheiten,
+            "non_numeric_food": item.Nicht_numerische_Nahrungsdaten,
+            "carbs_grams": item.Kohlenhydrate_Gramm,
+            "carbs_portions": item.Kohlenhydrate_Portionen,
+            "non_numeric_long_insulin": item.Nicht_numerisches_Depotinsulin,
+            "long_insulin_units": item.Depotinsulin_Einheiten,
+            "notes": item.Notizen,
+            "glucose_teststrip": item.Glukose_Teststreifen_mg_dL,
+            "ketone": item.Keton_mmol_L,
+            "meal_insulin": item.Mahlzeiteninsulin_Einheiten,
+            "correction_insulin": item.Korrekturinsulin_Einheiten,
+            "insulin_change_by_user": item.Insulin_Änderung_durch_Anwender_Einheiten,
+        }
+
+
+class CsvUpload(Base):
+    """
+    ORM model of an ingested CSV file, identified by the SHA-256 of its content.
+    """
+
+    __tablename__ = "csv_upload"
+    __table_args__ = (
+        Index(
+            "uq_csv_upload_user_id_content_hash", "user_id", "content_hash", unique=True
+        ),
+    )
+
+    id: Mapped[int] = mapped_column(BIGINT, primary_key=True)
+    user_id: Mapped[str] = mapped_column(String(36), nullable=False)
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    row_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now()
+    )
+
+
+class IngestWatermark(Base):
+    """
+    ORM model of the newest ingested reading per user and device serial number.
+    """
+
+    __tablename__ = "ingest_watermark"
+
+    user_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    serial_number: Mapped[str] = mapped_column(String(100), primary_key=True)
+    max_device_timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False)
+
+
+class UserDataVersion(Base):
+    """
+    ORM model of the version of a user's glucose data, raised by every ingestion.
+    """
+
+    __tablename__ = "user_data_version"
+
+    user_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    version: Mapped[int] = mapped_column(Integer, nullable=False)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime, nullable=False, server_default=func.now()
+    )
+
+
+class GlucoseRollupMixin:
+    """
+    Columns of a pre-aggregated rollup of a user's glucose readings per bucket.
+
+    The value of a reading is its history value, or else its scan value. Sums let
+    means and standard deviations be derived for any multiple of the bucket, and
+    the range counters count readings below, inside and above the target range.
+    """
+
+    BUCKET_MINUTES: int
+
+    user_id: Mapped[str] = mapped_column(String(36), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime, primary_key=True)
+
+    reading_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    value_sum: Mapped[float] = mapped_column(Double, nullable=False)
+    value_sum_squares: Mapped[float] = mapped_column(Double, nullable=False)
+    value_min: Mapped[float] = mapped_column(Float, nullable=False)
+    value_max: Mapped[float] = mapped_column(Float, nullable=False)
+
+    below_range_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    in_range_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    above_range_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class GlucoseRollupHourly(GlucoseRollupMixin, Base):
+    """
+    ORM model of the hourly glucose rollup.
+    """
+
+    __tablename__ = "glucose_rollup_hourly"
+
+    BUCKET_MINUTES = 60
+
+
+class GlucoseRollupDaily(GlucoseRollupMixin, Base):
+    """
+    ORM model of the daily glucose rollup.
+    """
+
+    __tablename__ = "glucose_rollup_daily"
+
+    BUCKET_MINUTES = 24 * 60
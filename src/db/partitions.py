@@ -0,0 +1,94 @@
+"""
+Monthly range partitions of `user_glucose_data`.
+
+The table is partitioned by `RANGE COLUMNS(device_timestamp)` with one partition per
+calendar month, named `pYYYYMM`, and a catch-all partition `p_future` for readings
+past the newest month, so inserts never fail for lack of a partition. The first
+partition also holds all older readings. Optionally every partition is
+subpartitioned by `KEY(user_id)`.
+
+MySQL only reads the partitions a query can match when the query bounds
+`device_timestamp` with plain comparisons, see `device_timestamp_range` in the
+repository. New months are split off the catch-all partition ahead of time, while it
+is still empty, with `reorganize_future_partition_sql`.
+"""
+
+from datetime import datetime
+
+PARTITIONED_TABLE = "user_glucose_data"
+FUTURE_PARTITION = "p_future"
+
+
+def month_start(value: datetime) -> datetime:
+    """
+    Returns midnight of the first day of the month `value` falls in.
+    """
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    """
+    Returns the start of the month `months` after the month starting at `month`.
+    """
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    """
+    Returns the name of the partition of a month, e.g. `p202401`.
+    """
+    return f"p{month:%Y%m}"
+
+
+def parse_partition_name(name: str) -> datetime | None:
+    """
+    Returns the start of the month of a partition, or None for other partitions.
+    """
+    try:
+        return datetime.strptime(name, "p%Y%m")
+    except ValueError:
+        return None
+
+
+def month_partitions(first: datetime, last: datetime) -> list[tuple[str, datetime]]:
+    """
+    Lists the monthly partitions from the month of `first` to the month of `last`.
+
+    Returns:
+        list[tuple[str, datetime]]: Name and exclusive upper bound of every
+        partition, oldest first.
+    """
+    partitions = []
+    month = month_start(first)
+    while month <= last:
+        upper = add_months(month, 1)
+        partitions.append((partition_name(month), upper))
+        month = upper
+    return partitions
+
+
+def partition_definitions(partitions: list[tuple[str, datetime]]) -> str:
+    """
+    Builds the partition definitions of monthly partitions followed by the
+    catch-all partition.
+    """
+    definitions = [
+        f"PARTITION {name} VALUES LESS THAN ('{upper:%Y-%m-%d %H:%M:%S}')"
+        for name, upper in partitions
+    ]
+    definitions.append(f"PARTITION {FUTURE_PARTITION} VALUES LESS THAN (MAXVALUE)")
+    return ", ".join(definitions)
+
+
+def reorganize_future_partition_sql(partitions: list[tuple[str, datetime]]) -> str:
+    """
+    Builds the statement that splits monthly partitions off the catch-all partition.
+
+    Rows already in the catch-all partition are moved, so this is cheap while it is
+    empty, i.e. when partitions are created before their month starts.
+    """
+    return (
+        f"ALTER TABLE {PARTITIONED_TABLE} REORGANIZE PARTITION {FUTURE_PARTITION} "
+        f"INTO ({partition_definitions(partitions)})"
+    )
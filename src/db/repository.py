@@ -1,10 +1,135 @@
-from datetime import datetime
-from typing import Sequence
+from contextlib import AsyncExitStack, asynccontextmanager
+from copy import copy
+from datetime import datetime, timedelta
+from itertools import batched
+from typing import AsyncIterable, AsyncIterator, Callable, Sequence
 
-from sqlalchemy import asc, desc, select
+from sqlalchemy import (
+    ColumnElement,
+    DateTime,
+    Row,
+    Select,
+    and_,
+    asc,
+    case,
+    cast,
+    delete,
+    desc,
+    func,
+    literal_column,
+    or_,
+    select,
+    text,
+    tuple_,
+)
+from sqlalchemy.dialects.mysql import insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute, aliased
 
-from src.db.models import UserGlucoseData
+from src.db.models import (
+    CsvUpload,
+    GlucoseRollupDaily,
+    GlucoseRollupHourly,
+    IngestWatermark,
+    UserDataVersion,
+    UserGlucoseData,
+)
+from src.db.partitions import (
+    PARTITIONED_TABLE,
+    add_months,
+    month_partitions,
+    parse_partition_name,
+    reorganize_future_partition_sql,
+)
+from src.domain.aggregation import (
+    BUCKET_ORIGIN,
+    TARGET_RANGE_HIGH,
+    TARGET_RANGE_LOW,
+    floor_to_bucket,
+)
+
+# Columns refreshed when an upserted reading already exists
+UPSERT_COLUMNS = [
+    column.name
+    for column in UserGlucoseData.__table__.columns
+    if not column.primary_key and column.name not in UserGlucoseData.NATURAL_KEY
+]
+
+
+# Columns of an exported glucose record, in export order
+EXPORT_COLUMNS = list(UserGlucoseData.__table__.columns)
+
+
+# The glucose reading of a row: the sensor history value, or else the manual scan
+GLUCOSE_VALUE = func.coalesce(
+    UserGlucoseData.glucose_value_history, UserGlucoseData.glucose_scan
+)
+
+
+def device_timestamp_range(
+    start: datetime | None, end: datetime | None, end_exclusive: bool = False
+) -> list[ColumnElement[bool]]:
+    """
+    Builds the comparisons that bound `device_timestamp` to a range.
+
+    Every query on a range of readings filters with these plain comparisons, which
+    MySQL also uses to prune the monthly partitions of `user_glucose_data`.
+
+    Args:
+        start (datetime | None): Inclusive start (optional).
+        end (datetime | None): End (optional), inclusive unless `end_exclusive`.
+        end_exclusive (bool): Whether `end` itself is excluded.
+    """
+    predicates = []
+    if start:
+        predicates.append(UserGlucoseData.device_timestamp >= start)
+    if end:
+        predicates.append(
+            UserGlucoseData.device_timestamp < end
+            if end_exclusive
+            else UserGlucoseData.device_timestamp <= end
+        )
+    return predicates
+
+
+def bucket_start(
+    column: InstrumentedAttribute[datetime], bucket_minutes: int
+) -> ColumnElement[datetime]:
+    """
+    Builds the SQL expression of the start of the bucket a timestamp falls in,
+    aligned to `BUCKET_ORIGIN` like `aggregate_buckets`.
+    """
+    minute: ColumnElement[str] = literal_column("MINUTE")
+    origin = cast(BUCKET_ORIGIN, DateTime)
+    offset = func.timestampdiff(minute, origin, column)
+    return func.timestampadd(
+        minute,
+        func.floor(offset / bucket_minutes) * bucket_minutes,
+        origin,
+        type_=DateTime,
+    )
+
+
+# Rollup tables keyed by their bucket width in minutes
+ROLLUP_MODELS: dict[int, type[GlucoseRollupHourly] | type[GlucoseRollupDaily]] = {
+    GlucoseRollupHourly.BUCKET_MINUTES: GlucoseRollupHourly,
+    GlucoseRollupDaily.BUCKET_MINUTES: GlucoseRollupDaily,
+}
+
+
+def track_ingested_ranges(
+    ranges: dict[str, tuple[datetime, datetime]], rows: list[dict]
+) -> None:
+    """
+    Widens the per-user (oldest, newest) device timestamps with a batch of rows.
+    """
+    for row in rows:
+        user_id, timestamp = row["user_id"], row["device_timestamp"]
+        if user_id in ranges:
+            oldest, newest = ranges[user_id]
+            ranges[user_id] = (min(oldest, timestamp), max(newest, timestamp))
+        else:
+            ranges[user_id] = (timestamp, timestamp)
 
 
 class DatabaseRepository:
@@ -12,34 +137,484 @@ class DatabaseRepository:
     A class for handling db operations.
     """
 
-    def __init__(self, session: AsyncSession) -> None:
+    def __init__(
+        self,
+        session: AsyncSession,
+        insert_chunk_size: int = 1000,
+        upsert: bool = True,
+        read_session: AsyncSession | None = None,
+        lookup_chunk_size: int = 1000,
+        read_session_factory: Callable[[], AsyncIterator[AsyncSession]] | None = None,
+    ) -> None:
         """
         Initializes the `DatabaseRepository` with an asynchronous session.
 
         Args:
             session (AsyncSession): database session.
+            insert_chunk_size (int): Number of rows per multi-row INSERT statement.
+            upsert (bool): Write rows with `INSERT ... ON DUPLICATE KEY UPDATE`, so a
+                reading that already exists (same natural key) is updated instead of
+                failing the insert.
+            read_session (AsyncSession | None): Session for the query methods, e.g.
+                on a read replica (optional). Reads that ingestion depends on always
+                use `session`.
+            lookup_chunk_size (int): Number of IDs per `WHERE id IN (...)` query
+                when records are looked up by ID.
+            read_session_factory (Callable | None): Async generator function
+                yielding the session for the query methods, e.g.
+                `DatabaseManager.get_read_session` (optional). The session is only
+                opened by the first query, so requests that only write never check
+                out a replica connection, and is closed by `close`.
         """
         self.session = session
+        self.read_session = read_session
+        self.read_session_factory = read_session_factory
+        self.insert_chunk_size = insert_chunk_size
+        self.upsert = upsert
+        self.lookup_chunk_size = lookup_chunk_size
+        self._read_session_stack = AsyncExitStack()
+
+    async def get_read_session(self) -> AsyncSession:
+        """
+        Returns the session for the query methods, opening it on first use.
+
+        Returns:
+            AsyncSession: `read_session`, a session of `read_session_factory`, or
+            else `session`.
+        """
+        if self.read_session is None:
+            if self.read_session_factory is None:
+                return self.session
+            self.read_session = await self._read_session_stack.enter_async_context(
+                asynccontextmanager(self.read_session_factory)()
+            )
+        return self.read_session
+
+    async def close(self) -> None:
+        """
+        Closes the session opened by `read_session_factory`, if any.
+        """
+        await self._read_session_stack.aclose()
+
+    def with_primary_reads(self) -> "DatabaseRepository":
+        """
+        Returns a copy of the repository whose query methods read from the primary,
+        e.g. right after an ingestion that read replicas may not have caught up with.
+        """
+        repository = copy(self)
+        repository.read_session = self.session
+        # The session opened by this repository is still closed by its `close`
+        repository._read_session_stack = AsyncExitStack()
+        return repository
 
     async def save_glucose_records_to_database(
         self,
         records: list,
         user_id: str,
-    ) -> None:
+    ) -> int:
         """
         Saves a list of parsed glucose records to the database for a specific user.
 
+        Records are written with multi-row Core INSERT statements of
+        `insert_chunk_size` rows each, all inside a single transaction that also
+        refreshes the rollups of the touched time range.
+
         Args:
             records (list): A list of parsed glucose data records.
             user_id (str): The ID of the user associated with the records.
 
         Returns:
-            None
+            int: The number of inserted rows, not counting rows that updated a
+            stored reading.
+        """
+        rows = [
+            UserGlucoseData.convert_item_to_row(record, user_id) for record in records
+        ]
+        ingested_ranges: dict[str, tuple[datetime, datetime]] = {}
+        track_ingested_ranges(ingested_ranges, rows)
+        try:
+            rows_inserted = await self.insert_glucose_rows(rows)
+            await self.refresh_glucose_rollups(ingested_ranges)
+            await self.bump_user_data_versions(list(ingested_ranges))
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return rows_inserted
+
+    async def save_glucose_row_batches_to_database(
+        self,
+        batches: AsyncIterable[list[dict]],
+        on_batch_saved: Callable[[int], None] | None = None,
+        upload: CsvUpload | None = None,
+    ) -> int:
+        """
+        Saves a stream of glucose row batches in a single transaction.
+
+        Each batch is inserted as soon as it arrives, and the whole stream is
+        committed once it is exhausted, together with the refreshed rollups of the
+        touched time range and the bumped data versions of the users. If the stream
+        raises, nothing is persisted.
+
+        Args:
+            batches (AsyncIterable[list[dict]]): Batches of rows keyed by
+                `UserGlucoseData` column names.
+            on_batch_saved (Callable[[int], None] | None): Called with the number of
+                inserted rows of each batch once it has been sent to the database
+                (optional).
+            upload (CsvUpload | None): The uploaded file the rows come from. It is
+                recorded with its row count in the same transaction (optional).
+
+        Returns:
+            int: The number of inserted rows, not counting rows that updated a
+            stored reading.
+        """
+        rows_inserted = 0
+        rows_written = 0
+        ingested_ranges: dict[str, tuple[datetime, datetime]] = {}
+        try:
+            async for rows in batches:
+                batch_inserted = await self.insert_glucose_rows(rows)
+                track_ingested_ranges(ingested_ranges, rows)
+                rows_inserted += batch_inserted
+                rows_written += len(rows)
+                if on_batch_saved:
+                    on_batch_saved(batch_inserted)
+            await self.refresh_glucose_rollups(ingested_ranges)
+            await self.bump_user_data_versions(list(ingested_ranges))
+            if upload is not None:
+                upload.row_count = rows_written
+                self.session.add(upload)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+        return rows_inserted
+
+    async def insert_glucose_rows(self, rows: list[dict]) -> int:
+        """
+        Inserts column/value dicts in chunks without committing the transaction.
+
+        In upsert mode, rows whose natural key already exists overwrite the stored
+        values instead of raising an integrity error. They are not counted as
+        inserted.
+
+        Args:
+            rows (list[dict]): Rows keyed by `UserGlucoseData` column names.
+
+        Returns:
+            int: The number of inserted rows.
+        """
+        rows_inserted = 0
+        for chunk in batched(rows, self.insert_chunk_size):
+            statement = insert(UserGlucoseData).values(list(chunk))
+            if self.upsert:
+                rows_inserted += await self._count_new_readings(chunk)
+                statement = statement.on_duplicate_key_update(
+                    {column: statement.inserted[column] for column in UPSERT_COLUMNS}
+                )
+            else:
+                rows_inserted += len(chunk)
+            await self.session.execute(statement)
+        return rows_inserted
+
+    async def _count_new_readings(self, rows: Sequence[dict]) -> int:
+        # The upsert's rowcount cannot tell an insert from an unchanged row, as the
+        # MySQL dialects connect with CLIENT_FOUND_ROWS and both count 1. Instead,
+        # the natural keys not stored yet are counted before the upsert.
+        keys = {
+            tuple(row[column] for column in UserGlucoseData.NATURAL_KEY) for row in rows
+        }
+        timestamps = [row["device_timestamp"] for row in rows]
+        query = (
+            select(func.count())
+            .select_from(UserGlucoseData)
+            .where(
+                tuple_(
+                    *[
+                        getattr(UserGlucoseData, column)
+                        for column in UserGlucoseData.NATURAL_KEY
+                    ]
+                ).in_(keys),
+                *device_timestamp_range(min(timestamps), max(timestamps)),
+            )
+        )
+        result = await self.session.execute(query)
+        return len(keys) - result.scalar_one()
+
+    async def csv_upload_exists(self, user_id: str, content_hash: str) -> bool:
+        """
+        Checks whether a file with the same content was already ingested for a user.
+
+        Args:
+            user_id (str): The ID of the user.
+            content_hash (str): SHA-256 hex digest of the file content.
+
+        Returns:
+            bool: True if the file was ingested before.
+        """
+        query = select(CsvUpload.id).where(
+            CsvUpload.user_id == user_id, CsvUpload.content_hash == content_hash
+        )
+        result = await self.session.execute(query)
+        return result.first() is not None
+
+    async def refresh_glucose_rollups(
+        self, ingested_ranges: dict[str, tuple[datetime, datetime]]
+    ) -> None:
+        """
+        Recomputes the hourly and daily rollups over the buckets touched by an
+        ingestion, without committing the transaction.
+
+        Readings may be upserted, so the touched buckets are rebuilt from the raw
+        readings instead of being incremented.
+
+        Args:
+            ingested_ranges (dict[str, tuple[datetime, datetime]]): Oldest and newest
+                ingested device timestamp keyed by user ID.
+        """
+        for user_id, (oldest, newest) in ingested_ranges.items():
+            for bucket_minutes in ROLLUP_MODELS:
+                bucket = timedelta(minutes=bucket_minutes)
+                await self._rebuild_rollup(
+                    bucket_minutes,
+                    user_id=user_id,
+                    start=floor_to_bucket(oldest, bucket_minutes),
+                    end=floor_to_bucket(newest + bucket, bucket_minutes),
+                )
+
+    async def rebuild_glucose_rollups(self, user_id: str | None = None) -> None:
+        """
+        Rebuilds the hourly and daily rollups from scratch and commits.
+
+        Args:
+            user_id (str | None): Only rebuild the rollups of this user (optional).
+        """
+        try:
+            for bucket_minutes in ROLLUP_MODELS:
+                await self._rebuild_rollup(bucket_minutes, user_id=user_id)
+            await self.session.commit()
+        except Exception:
+            await self.session.rollback()
+            raise
+
+    async def _rebuild_rollup(
+        self,
+        bucket_minutes: int,
+        user_id: str | None = None,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> None:
+        rollup = ROLLUP_MODELS[bucket_minutes]
+
+        stale = delete(rollup)
+        readings = select(
+            UserGlucoseData.user_id,
+            bucket_start(UserGlucoseData.device_timestamp, bucket_minutes),
+            func.count(GLUCOSE_VALUE),
+            func.sum(GLUCOSE_VALUE),
+            func.sum(GLUCOSE_VALUE * GLUCOSE_VALUE),
+            func.min(GLUCOSE_VALUE),
+            func.max(GLUCOSE_VALUE),
+            func.sum(case((GLUCOSE_VALUE < TARGET_RANGE_LOW, 1), else_=0)),
+            func.sum(
+                case(
+                    (GLUCOSE_VALUE.between(TARGET_RANGE_LOW, TARGET_RANGE_HIGH), 1),
+                    else_=0,
+                )
+            ),
+            func.sum(case((GLUCOSE_VALUE > TARGET_RANGE_HIGH, 1), else_=0)),
+        ).where(GLUCOSE_VALUE.is_not(None))
+
+        if user_id is not None:
+            stale = stale.where(rollup.user_id == user_id)
+            readings = readings.where(UserGlucoseData.user_id == user_id)
+        if start is not None:
+            stale = stale.where(rollup.bucket_start >= start)
+        if end is not None:
+            stale = stale.where(rollup.bucket_start < end)
+        readings = readings.where(
+            *device_timestamp_range(start, end, end_exclusive=True)
+        )
+
+        readings = readings.group_by(
+            UserGlucoseData.user_id,
+            bucket_start(UserGlucoseData.device_timestamp, bucket_minutes),
+        )
+
+        await self.session.execute(stale)
+        await self.session.execute(
+            insert(rollup).from_select(
+                [
+                    "user_id",
+                    "bucket_start",
+                    "reading_count",
+                    "value_sum",
+                    "value_sum_squares",
+                    "value_min",
+                    "value_max",
+                    "below_range_count",
+                    "in_range_count",
+                    "above_range_count",
+                ],
+                readings,
+            )
+        )
+
+    async def get_glucose_data_partitions(self) -> list[str]:
+        """
+        Retrieves the names of the range partitions of `user_glucose_data`.
+
+        Returns:
+            list[str]: Partition names in range order, empty if the table is not
+            partitioned.
+        """
+        query = text(
+            "SELECT PARTITION_NAME FROM INFORMATION_SCHEMA.PARTITIONS "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :table "
+            "AND PARTITION_NAME IS NOT NULL "
+            "GROUP BY PARTITION_NAME, PARTITION_ORDINAL_POSITION "
+            "ORDER BY PARTITION_ORDINAL_POSITION"
+        )
+        result = await self.session.execute(query, {"table": PARTITIONED_TABLE})
+        return list(result.scalars().all())
+
+    async def create_glucose_data_partitions(self, until: datetime) -> list[str]:
+        """
+        Creates the monthly partitions of `user_glucose_data` missing up to the
+        month of `until`, by splitting them off the catch-all partition.
+
+        Args:
+            until (datetime): Any time in the last month to create a partition for.
+
+        Returns:
+            list[str]: Names of the created partitions, empty if they all exist.
+
+        Raises:
+            ValueError: If the table is not partitioned by month.
+        """
+        months = [
+            month
+            for month in map(
+                parse_partition_name, await self.get_glucose_data_partitions()
+            )
+            if month is not None
+        ]
+        if not months:
+            raise ValueError(f"{PARTITIONED_TABLE} is not partitioned by month")
+
+        partitions = month_partitions(add_months(max(months), 1), until)
+        if partitions:
+            await self.session.execute(
+                text(reorganize_future_partition_sql(partitions))
+            )
+        return [name for name, _ in partitions]
+
+    async def get_ingest_watermarks(self, user_id: str) -> dict[str, datetime]:
+        """
+        Retrieves the newest ingested device timestamp per serial number of a user.
+
+        Args:
+            user_id (str): The ID of the user.
+
+        Returns:
+            dict[str, datetime]: Watermarks keyed by serial number.
+        """
+        query = select(
+            IngestWatermark.serial_number, IngestWatermark.max_device_timestamp
+        ).where(IngestWatermark.user_id == user_id)
+        result = await self.session.execute(query)
+        return {serial_number: timestamp for serial_number, timestamp in result.all()}
+
+    async def update_ingest_watermarks(
+        self, user_id: str, watermarks: dict[str, datetime]
+    ) -> None:
+        """
+        Raises the watermarks of a user without committing the transaction.
+
+        Stored watermarks never move backwards, so ingesting older data keeps them.
+
+        Args:
+            user_id (str): The ID of the user.
+            watermarks (dict[str, datetime]): Newest ingested device timestamp keyed
+                by serial number.
+        """
+        if not watermarks:
+            return
+
+        statement = insert(IngestWatermark).values(
+            [
+                {
+                    "user_id": user_id,
+                    "serial_number": serial_number,
+                    "max_device_timestamp": timestamp,
+                }
+                for serial_number, timestamp in watermarks.items()
+            ]
+        )
+        statement = statement.on_duplicate_key_update(
+            max_device_timestamp=func.greatest(
+                IngestWatermark.max_device_timestamp,
+                statement.inserted.max_device_timestamp,
+            )
+        )
+        await self.session.execute(statement)
+
+    async def bump_user_data_versions(self, user_ids: list[str]) -> None:
+        """
+        Increments the data version of users without committing the transaction.
+
+        Args:
+            user_ids (list[str]): The IDs of the users whose readings changed.
+        """
+        if not user_ids:
+            return
+
+        statement = insert(UserDataVersion).values(
+            [{"user_id": user_id, "version": 1} for user_id in user_ids]
+        )
+        statement = statement.on_duplicate_key_update(
+            version=UserDataVersion.version + 1, updated_at=func.now()
+        )
+        await self.session.execute(statement)
+
+    async def get_user_data_version(self, user_id: str) -> UserDataVersion | None:
+        """
+        Retrieves the data version of a user.
+
+        Args:
+            user_id (str): The ID of the user.
+
+        Returns:
+            UserDataVersion | None: The version, or None if nothing was ingested for
+            the user yet.
+        """
+        query = select(UserDataVersion).where(UserDataVersion.user_id == user_id)
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
+        return result.scalar_one_or_none()
+
+    async def get_user_data_version_by_level_id(
+        self, id: int
+    ) -> UserDataVersion | None:
+        """
+        Retrieves the data version of the user a glucose record belongs to, without
+        loading the record itself.
+
+        Args:
+            id (int): The ID of the glucose record.
+
+        Returns:
+            UserDataVersion | None: The version, or None if the record doesn't exist.
         """
-        for record in records:
-            db_record = UserGlucoseData.convert_item_to_db_model(record, user_id)
-            self.session.add(db_record)
-        await self.session.commit()
+        query = (
+            select(UserDataVersion)
+            .join(UserGlucoseData, UserGlucoseData.user_id == UserDataVersion.user_id)
+            .where(UserGlucoseData.id == id)
+        )
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
+        return result.scalar_one_or_none()
 
     async def get_user_glucose_data_from_database(
         self,
@@ -49,10 +624,15 @@ class DatabaseRepository:
         sort: str = "desc",
         limit: int = 100,
         offset: int = 0,
+        after: tuple[datetime, int] | None = None,
     ) -> Sequence[UserGlucoseData]:
         """
         Retrieves glucose records for a specific user from the database.
 
+        Records are ordered by (device_timestamp, id) so that pages are stable. When
+        `after` is given, the query seeks past that position on the
+        (user_id, device_timestamp, id) index instead of scanning skipped rows.
+
         Args:
             user_id (str): The ID of the user.
             start (datetime | None): Start timestamp for filtering (optional).
@@ -60,31 +640,417 @@ class DatabaseRepository:
             sort (str): Sort order based on device timestamp ("asc" or "desc").
             limit (int): Maximum number of records to retrieve.
             offset (int): Number of records to skip (for pagination).
+            after (tuple[datetime, int] | None): Device timestamp and ID of the last
+                record of the previous page (keyset pagination, optional).
 
         Returns:
             Sequence[UserGlucoseData]: A list of matching glucose records.
         """
-        # Base query
-        query = select(UserGlucoseData).where(UserGlucoseData.user_id == user_id)
+        query = self._user_glucose_data_query(
+            select(UserGlucoseData), user_id, start, end, sort, limit, offset, after
+        )
 
-        # Filtering
-        if start:
-            query = query.where(UserGlucoseData.device_timestamp >= start)
-        if end:
-            query = query.where(UserGlucoseData.device_timestamp <= end)
+        # Execute query and get results
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
+        levels = result.scalars().all()
+
+        return levels
+
+    async def get_users_glucose_data_from_database(
+        self,
+        user_ids: list[str],
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+        limit: int = 100,
+    ) -> Sequence[UserGlucoseData]:
+        """
+        Retrieves the first `limit` glucose records of each of several users with
+        one query.
+
+        The records of every user are numbered with `ROW_NUMBER() OVER (PARTITION
+        BY user_id ...)` in the same (device_timestamp, id) order as
+        `get_user_glucose_data_from_database`, and only the first `limit` of every
+        user are returned.
+
+        Args:
+            user_ids (list[str]): The IDs of the users.
+            start (datetime | None): Start timestamp for filtering (optional).
+            end (datetime | None): End timestamp for filtering (optional).
+            sort (str): Sort order based on device timestamp ("asc" or "desc").
+            limit (int): Maximum number of records per user.
+
+        Returns:
+            Sequence[UserGlucoseData]: The records, grouped by user and in the
+            requested order within each user.
+        """
+        order = desc if sort == "desc" else asc
+        row_number = (
+            func.row_number()
+            .over(
+                partition_by=UserGlucoseData.user_id,
+                order_by=(
+                    order(UserGlucoseData.device_timestamp),
+                    order(UserGlucoseData.id),
+                ),
+            )
+            .label("row_number")
+        )
+        ranked = (
+            select(UserGlucoseData, row_number)
+            .where(
+                UserGlucoseData.user_id.in_(user_ids),
+                *device_timestamp_range(start, end),
+            )
+            .subquery()
+        )
+        ranked_data = aliased(UserGlucoseData, ranked)
+        query = (
+            select(ranked_data)
+            .where(ranked.c.row_number <= limit)
+            .order_by(ranked.c.user_id, ranked.c.row_number)
+        )
+
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
+        return result.scalars().all()
+
+    async def get_user_glucose_columns_from_database(
+        self,
+        user_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+        limit: int = 100,
+        offset: int = 0,
+        after: tuple[datetime, int] | None = None,
+    ) -> Sequence[Row[tuple[int, datetime, float | None]]]:
+        """
+        Retrieves the same page of records as `get_user_glucose_data_from_database`,
+        but only the ID, device timestamp and glucose value of each record.
+
+        Returns:
+            Sequence[Row]: (id, device_timestamp, value) tuples; the value is the
+            history value, or else the scan value, or None.
+        """
+        query = self._user_glucose_data_query(
+            select(UserGlucoseData.id, UserGlucoseData.device_timestamp, GLUCOSE_VALUE),
+            user_id,
+            start,
+            end,
+            sort,
+            limit,
+            offset,
+            after,
+        )
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
+        return result.all()
+
+    async def get_user_glucose_rows_from_database(
+        self,
+        columns: list[str],
+        user_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+        limit: int = 100,
+        offset: int = 0,
+        after: tuple[datetime, int] | None = None,
+    ) -> Sequence[Row]:
+        """
+        Retrieves the same page of records as `get_user_glucose_data_from_database`,
+        but only selects the given columns and returns plain rows instead of ORM
+        objects.
+
+        Args:
+            columns (list[str]): Names of the `UserGlucoseData` columns to select.
+                `id` and `device_timestamp` are always selected, as the pagination
+                cursor is built from them.
+
+        Returns:
+            Sequence[Row]: The rows, with the columns as attributes.
+        """
+        table = UserGlucoseData.__table__
+        names = dict.fromkeys(["id", "device_timestamp", *columns])
+        query = self._user_glucose_data_query(
+            select(*[table.c[name] for name in names]),
+            user_id,
+            start,
+            end,
+            sort,
+            limit,
+            offset,
+            after,
+        )
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
+        return result.all()
+
+    async def get_user_glucose_value_rows_from_database(
+        self,
+        columns: list[str],
+        user_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> Sequence[Row]:
+        """
+        Retrieves all records of a user in a range that have a glucose value, oldest
+        first, with only the given columns, e.g. to downsample them for a chart.
+
+        Args:
+            columns (list[str]): Names of the `UserGlucoseData` columns to select.
+                `id` and `device_timestamp` are always selected.
+
+        Returns:
+            Sequence[Row]: The rows, with the columns as attributes and the history
+            value, or else the scan value, as `value`.
+        """
+        table = UserGlucoseData.__table__
+        names = dict.fromkeys(["id", "device_timestamp", *columns])
+        query = (
+            select(*[table.c[name] for name in names], GLUCOSE_VALUE.label("value"))
+            .where(
+                UserGlucoseData.user_id == user_id,
+                GLUCOSE_VALUE.is_not(None),
+                *device_timestamp_range(start, end),
+            )
+            .order_by(UserGlucoseData.device_timestamp, UserGlucoseData.id)
+        )
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
+        return result.all()
+
+    @staticmethod
+    def _user_glucose_data_query(
+        query: Select,
+        user_id: str,
+        start: datetime | None,
+        end: datetime | None,
+        sort: str,
+        limit: int,
+        offset: int,
+        after: tuple[datetime, int] | None,
+    ) -> Select:
+        query = query.where(
+            UserGlucoseData.user_id == user_id, *device_timestamp_range(start, end)
+        )
+
+        # Keyset pagination: continue right after the previous page. The seek is
+        # also bounded by the timestamp alone, which partition pruning can use.
+        if after:
+            after_timestamp, after_id = after
+            if sort == "desc":
+                query = query.where(
+                    UserGlucoseData.device_timestamp <= after_timestamp,
+                    or_(
+                        UserGlucoseData.device_timestamp < after_timestamp,
+                        and_(
+                            UserGlucoseData.device_timestamp == after_timestamp,
+                            UserGlucoseData.id < after_id,
+                        ),
+                    ),
+                )
+            else:
+                query = query.where(
+                    UserGlucoseData.device_timestamp >= after_timestamp,
+                    or_(
+                        UserGlucoseData.device_timestamp > after_timestamp,
+                        and_(
+                            UserGlucoseData.device_timestamp == after_timestamp,
+                            UserGlucoseData.id > after_id,
+                        ),
+                    ),
+                )
 
         # Apply sorting
         order = desc if sort == "desc" else asc
-        query = query.order_by(order(UserGlucoseData.device_timestamp))
+        query = query.order_by(
+            order(UserGlucoseData.device_timestamp), order(UserGlucoseData.id)
+        )
 
         # Pagination
         query = query.offset(offset).limit(limit)
 
-        # Execute query and get results
-        result = await self.session.execute(query)
-        levels = result.scalars().all()
+        return query
 
-        return levels
+    async def stream_user_glucose_rows(
+        self,
+        user_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        batch_size: int = 5000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Streams a user's glucose records as plain column tuples, oldest first.
+
+        The query runs on a server-side cursor and rows are fetched `batch_size` at
+        a time, so memory use does not grow with the size of the history. No ORM
+        objects are built.
+
+        Args:
+            user_id (str): The ID of the user.
+            start (datetime | None): Start timestamp for filtering (optional).
+            end (datetime | None): End timestamp for filtering (optional).
+            batch_size (int): Number of rows fetched from the cursor at a time.
+
+        Yields:
+            Sequence[Row]: Batches of rows with the columns of `EXPORT_COLUMNS`.
+        """
+        query = (
+            select(*EXPORT_COLUMNS)
+            .where(
+                UserGlucoseData.user_id == user_id, *device_timestamp_range(start, end)
+            )
+            .order_by(UserGlucoseData.device_timestamp, UserGlucoseData.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+        read_session = await self.get_read_session()
+        result = await read_session.stream(query)
+        async for rows in result.partitions():
+            yield rows
+
+    async def get_glucose_aggregates_from_database(
+        self,
+        user_id: str,
+        bucket_minutes: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[dict]:
+        """
+        Aggregates a user's glucose readings per time bucket with GROUP BY.
+
+        Args:
+            user_id (str): The ID of the user.
+            bucket_minutes (int): Width of a bucket in minutes.
+            start (datetime | None): Start timestamp for filtering (optional).
+            end (datetime | None): End timestamp for filtering (optional).
+
+        Returns:
+            list[dict]: Per non-empty bucket in ascending order, its `start` and the
+            `count`, `mean`, `min` and `max` of the readings.
+        """
+        bucket = bucket_start(UserGlucoseData.device_timestamp, bucket_minutes).label(
+            "start"
+        )
+        query = (
+            select(
+                bucket,
+                func.count(GLUCOSE_VALUE).label("reading_count"),
+                func.avg(GLUCOSE_VALUE).label("mean"),
+                func.min(GLUCOSE_VALUE).label("min"),
+                func.max(GLUCOSE_VALUE).label("max"),
+            )
+            .where(
+                UserGlucoseData.user_id == user_id,
+                GLUCOSE_VALUE.is_not(None),
+                *device_timestamp_range(start, end),
+            )
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
+        return [
+            {
+                "start": row.start,
+                "count": row.reading_count,
+                "mean": float(row.mean),
+                "min": float(row.min),
+                "max": float(row.max),
+            }
+            for row in result
+        ]
+
+    async def get_glucose_aggregates_from_rollup(
+        self,
+        rollup_minutes: int,
+        user_id: str,
+        bucket_minutes: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[dict]:
+        """
+        Aggregates a user's glucose readings per time bucket from a rollup table.
+
+        Args:
+            rollup_minutes (int): Bucket width of the rollup table to read.
+            user_id (str): The ID of the user.
+            bucket_minutes (int): Width of a bucket in minutes, a multiple of
+                `rollup_minutes`.
+            start (datetime | None): Inclusive start, on a rollup boundary (optional).
+            end (datetime | None): Exclusive end, on a rollup boundary (optional).
+
+        Returns:
+            list[dict]: Per non-empty bucket in ascending order, its `start` and the
+            `count`, `mean`, `min` and `max` of the readings.
+        """
+        rollup = ROLLUP_MODELS[rollup_minutes]
+        bucket = bucket_start(rollup.bucket_start, bucket_minutes).label("start")
+        query = (
+            select(
+                bucket,
+                func.sum(rollup.reading_count).label("reading_count"),
+                func.sum(rollup.value_sum).label("value_sum"),
+                func.min(rollup.value_min).label("min"),
+                func.max(rollup.value_max).label("max"),
+            )
+            .where(rollup.user_id == user_id)
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        if start:
+            query = query.where(rollup.bucket_start >= start)
+        if end:
+            query = query.where(rollup.bucket_start < end)
+
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
+        return [
+            {
+                "start": row.start,
+                "count": int(row.reading_count),
+                "mean": float(row.value_sum) / int(row.reading_count),
+                "min": float(row.min),
+                "max": float(row.max),
+            }
+            for row in result
+        ]
+
+    async def get_glucose_values_from_database(
+        self,
+        user_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sensor_only: bool = False,
+    ) -> Sequence[tuple[datetime, float]]:
+        """
+        Retrieves only the timestamp and glucose value of a user's readings.
+
+        Args:
+            user_id (str): The ID of the user.
+            start (datetime | None): Start timestamp for filtering (optional).
+            end (datetime | None): End timestamp for filtering (optional).
+            sensor_only (bool): Only use the periodic history values of the sensor
+                and ignore scans.
+
+        Returns:
+            Sequence[tuple[datetime, float]]: (device_timestamp, value) of every
+            reading that has a glucose value.
+        """
+        value = UserGlucoseData.glucose_value_history if sensor_only else GLUCOSE_VALUE
+        query = select(UserGlucoseData.device_timestamp, value).where(
+            UserGlucoseData.user_id == user_id,
+            value.is_not(None),
+            *device_timestamp_range(start, end),
+        )
+
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
+        return [(timestamp, value) for timestamp, value in result.all()]
 
     async def get_glucose_level_by_id_from_database(
         self, id: int
@@ -99,7 +1065,30 @@ class DatabaseRepository:
             UserGlucoseData | None: The matching glucose record if found, otherwise None.
         """
         query = select(UserGlucoseData).where(UserGlucoseData.id == id)
-        result = await self.session.execute(query)
+        read_session = await self.get_read_session()
+        result = await read_session.execute(query)
         glucose_level = result.scalars().first()
 
         return glucose_level
+
+    async def get_glucose_levels_by_ids_from_database(
+        self, ids: list[int]
+    ) -> list[UserGlucoseData]:
+        """
+        Retrieves glucose records by their IDs with one `WHERE id IN (...)` query per
+        `lookup_chunk_size` IDs.
+
+        Args:
+            ids (list[int]): The IDs of the glucose records.
+
+        Returns:
+            list[UserGlucoseData]: The records that exist, in no particular order.
+        """
+        glucose_levels: list[UserGlucoseData] = []
+        for chunk in batched(ids, self.lookup_chunk_size):
+            query = select(UserGlucoseData).where(UserGlucoseData.id.in_(chunk))
+            read_session = await self.get_read_session()
+            result = await read_session.execute(query)
+            glucose_levels.extend(result.scalars().all())
+
+        return glucose_levels
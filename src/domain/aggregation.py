@@ -0,0 +1,180 @@
+"""
+Time-bucketed statistics over glucose readings.
+
+Buckets are aligned to `BUCKET_ORIGIN`, a Monday at midnight, so daily buckets start
+at midnight and weekly buckets on Mondays. The database computes the same buckets
+with `TIMESTAMPDIFF`/`TIMESTAMPADD` for the metrics it can aggregate itself, and
+`aggregate_buckets` computes every metric, including percentiles, with NumPy.
+"""
+
+from datetime import datetime, timedelta
+
+import numpy as np
+
+BUCKET_ORIGIN = datetime(2000, 1, 3)
+
+# Bucket width in minutes, keyed by the `bucket` query parameter
+BUCKET_MINUTES = {
+    "15m": 15,
+    "1h": 60,
+    "1d": 24 * 60,
+    "1w": 7 * 24 * 60,
+}
+
+# Metrics MySQL can aggregate with GROUP BY
+SQL_METRICS = {"count", "mean", "min", "max"}
+
+# Bucket widths of the rollup tables, coarsest first
+ROLLUP_BUCKET_MINUTES = (24 * 60, 60)
+
+# Target glucose range in mg/dL (inclusive) for the time-in-range counters
+TARGET_RANGE_LOW = 70
+TARGET_RANGE_HIGH = 180
+
+# Percentile metrics and the percentile they stand for
+PERCENTILES = {
+    "p5": 5,
+    "p25": 25,
+    "p50": 50,
+    "p75": 75,
+    "p95": 95,
+}
+
+
+def floor_to_bucket(value: datetime, bucket_minutes: int) -> datetime:
+    """
+    Returns the start of the bucket `value` falls in.
+    """
+    origin = BUCKET_ORIGIN.replace(tzinfo=value.tzinfo)
+    bucket = timedelta(minutes=bucket_minutes)
+    return origin + (value - origin) // bucket * bucket
+
+
+def select_rollup(
+    bucket_minutes: int, start: datetime | None, end: datetime | None
+) -> tuple[int, datetime | None, datetime | None] | None:
+    """
+    Picks the coarsest rollup that answers an aggregation exactly.
+
+    A rollup qualifies when the requested bucket is a multiple of its bucket and
+    the range covers whole rollup buckets: `start` on a rollup boundary, and `end`
+    (inclusive, minute precision) on the last minute before one.
+
+    Args:
+        bucket_minutes (int): Requested bucket width in minutes.
+        start (datetime | None): Inclusive start of the range (optional).
+        end (datetime | None): Inclusive end of the range (optional).
+
+    Returns:
+        tuple | None: The rollup bucket width with the inclusive start and exclusive
+        end of the range, or None if only the raw readings answer the query.
+    """
+    end_exclusive = None
+    if end is not None:
+        end_exclusive = end.replace(second=0, microsecond=0) + timedelta(minutes=1)
+
+    for rollup_minutes in ROLLUP_BUCKET_MINUTES:
+        if bucket_minutes % rollup_minutes:
+            continue
+        if start is not None and not _on_boundary(start, rollup_minutes):
+            continue
+        if end_exclusive is not None and not _on_boundary(
+            end_exclusive, rollup_minutes
+        ):
+            continue
+        return rollup_minutes, start, end_exclusive
+    return None
+
+
+def _on_boundary(value: datetime, bucket_minutes: int) -> bool:
+    return floor_to_bucket(value, bucket_minutes) == value
+
+
+def grouped_statistics(
+    group_ids: np.ndarray, values: np.ndarray, metrics: list[str]
+) -> tuple[np.ndarray, dict[str, np.ndarray]]:
+    """
+    Computes statistics of values per group, without a Python loop over groups.
+
+    Values are sorted once by (group, value); counts, sums, minima and maxima are
+    then taken per group with `np.unique`/`np.add.reduceat`, and percentiles are
+    interpolated linearly between the sorted values of each group, as
+    `np.percentile` does.
+
+    Args:
+        group_ids (np.ndarray): Integer group of every value.
+        values (np.ndarray): Values as float64, same length as `group_ids`.
+        metrics (list[str]): Metric names, see `SQL_METRICS` and `PERCENTILES`.
+
+    Returns:
+        tuple[np.ndarray, dict[str, np.ndarray]]: The sorted unique group IDs, and
+        one array per metric aligned with them.
+    """
+    order = np.lexsort((values, group_ids))
+    group_ids = group_ids[order]
+    values = values[order]
+
+    unique_ids, first, counts = np.unique(
+        group_ids, return_index=True, return_counts=True
+    )
+    last = first + counts - 1
+
+    columns: dict[str, np.ndarray] = {}
+    for metric in metrics:
+        if metric == "count":
+            columns[metric] = counts
+        elif metric == "mean":
+            columns[metric] = np.add.reduceat(values, first) / counts
+        elif metric == "min":
+            columns[metric] = values[first]
+        elif metric == "max":
+            columns[metric] = values[last]
+        else:
+            position = (counts - 1) * PERCENTILES[metric] / 100
+            lower = np.floor(position).astype(np.int64)
+            upper = np.minimum(lower + 1, counts - 1)
+            fraction = position - lower
+            low_values = values[first + lower]
+            columns[metric] = (
+                low_values + (values[first + upper] - low_values) * fraction
+            )
+    return unique_ids, columns
+
+
+def aggregate_buckets(
+    timestamps: np.ndarray,
+    values: np.ndarray,
+    bucket_minutes: int,
+    metrics: list[str],
+) -> list[dict]:
+    """
+    Computes per-bucket statistics of readings with `grouped_statistics`.
+
+    Args:
+        timestamps (np.ndarray): Reading timestamps as datetime64[m].
+        values (np.ndarray): Glucose values as float64.
+        bucket_minutes (int): Width of a bucket in minutes.
+        metrics (list[str]): Metric names, see `SQL_METRICS` and `PERCENTILES`.
+
+    Returns:
+        list[dict]: One dict per non-empty bucket in ascending order, with the bucket
+        `start` and a value for every requested metric.
+    """
+    if len(values) == 0:
+        return []
+
+    offsets = (timestamps - np.datetime64(BUCKET_ORIGIN, "m")).astype(np.int64)
+    bucket_ids, columns = grouped_statistics(
+        np.floor_divide(offsets, bucket_minutes), values, metrics
+    )
+
+    starts = np.datetime64(BUCKET_ORIGIN, "m") + (bucket_ids * bucket_minutes).astype(
+        "timedelta64[m]"
+    )
+    rows: list[dict] = [
+        {"start": start} for start in starts.astype("datetime64[us]").tolist()
+    ]
+    for metric, column in columns.items():
+        for row, value in zip(rows, column.tolist()):
+            row[metric] = value
+    return rows
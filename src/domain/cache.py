@@ -0,0 +1,421 @@
+"""
+In-process read-through cache for glucose level queries.
+
+Entries are keyed on the normalized query parameters. Every ingestion for a user
+bumps the user's generation counter and drops the user's entries, and a result whose
+read overlapped the end of an ingestion is not cached, so a page is never served
+once newer data for its user has been stored. Read replicas may lag behind an
+ingestion, so the user's queries read from the primary for `replica_lag_seconds`
+after it, which has to exceed the replication lag, instead of caching a page from a
+replica that has not caught up yet.
+
+The cache lives in process memory, so with several API workers each worker only
+sees its own ingestions. Entries therefore also record the persisted
+`UserDataVersion` they were read at, which the ETags of the responses are derived
+from, and an entry is only served for the version the request found in the
+database. An ingestion on another worker thus never lets a response carry the new
+ETag with an older cached body.
+"""
+
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime
+from functools import partial
+from typing import (
+    Any,
+    AsyncIterable,
+    Awaitable,
+    Callable,
+    Hashable,
+    Iterator,
+    Sequence,
+)
+
+from sqlalchemy import Row
+
+from src.db.models import UserDataVersion, UserGlucoseData
+from src.domain.ingest import IngestStats
+from src.domain.pagination import decode_cursor
+from src.domain.service import GlucoseDataService
+
+
+@dataclass
+class CacheEntry:
+    user_id: str
+    value: Any
+    row_count: int
+    expires_at: float
+    data_version: Hashable = None
+
+
+@dataclass
+class CacheStats:
+    """
+    Counters of a `QueryCache`.
+    """
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    invalidations: int = 0
+    entries: int = 0
+    rows: int = 0
+
+
+class QueryCache:
+    """
+    LRU cache of query results, bounded by the number of cached rows.
+    """
+
+    def __init__(
+        self,
+        max_rows: int = 100_000,
+        ttl_seconds: float = 30.0,
+        replica_lag_seconds: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Args:
+            max_rows (int): Maximum number of rows held by all entries together.
+                The least recently used entries are evicted beyond it.
+            ttl_seconds (float): Time after which an entry is no longer served.
+            replica_lag_seconds (float): Time after an invalidation during which
+                read replicas may not have caught up with the ingestion yet.
+            clock (Callable[[], float]): Monotonic time source in seconds.
+        """
+        self.max_rows = max_rows
+        self.ttl_seconds = ttl_seconds
+        self.replica_lag_seconds = replica_lag_seconds
+        self.clock = clock
+        self.stats = CacheStats()
+        self._entries: OrderedDict[Hashable, CacheEntry] = OrderedDict()
+        self._user_keys: dict[str, set[Hashable]] = {}
+        self._generations: dict[str, int] = {}
+        self._invalidated_at: dict[str, float] = {}
+        self._last_invalidated_at: float | None = None
+        # Incremented on every invalidation, whichever user it is for
+        self.epoch = 0
+
+    def generation(self, user_id: str) -> int:
+        """
+        Returns the current generation of a user's data.
+        """
+        return self._generations.get(user_id, 0)
+
+    def recently_invalidated(self, user_id: str | None = None) -> bool:
+        """
+        Returns whether the user's data, or any user's if `user_id` is None, was
+        invalidated less than `replica_lag_seconds` ago.
+        """
+        invalidated_at = (
+            self._last_invalidated_at
+            if user_id is None
+            else self._invalidated_at.get(user_id)
+        )
+        if invalidated_at is None:
+            return False
+        return self.clock() - invalidated_at < self.replica_lag_seconds
+
+    def get(self, key: Hashable, data_version: Hashable = None) -> Any | None:
+        """
+        Returns the cached value for `key`, or None on a miss.
+
+        If `data_version` is given, an entry read at another data version is a miss.
+        """
+        entry = self._entries.get(key)
+        if entry is not None:
+            expired = entry.expires_at <= self.clock()
+            outdated = data_version is not None and entry.data_version != data_version
+            if expired or outdated:
+                self._remove(key)
+                entry = None
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.stats.hits += 1
+        return entry.value
+
+    def put(
+        self,
+        key: Hashable,
+        user_id: str,
+        generation: int,
+        value: Any,
+        row_count: int,
+        data_version: Hashable = None,
+    ) -> None:
+        """
+        Caches a value read while the user's data was at `generation`.
+
+        Values read before an ingestion finished are not cached, and neither are
+        values larger than the whole cache.
+
+        Args:
+            key (Hashable): Normalized query parameters.
+            user_id (str): The user the value belongs to.
+            generation (int): `generation(user_id)` from before the value was read.
+            value (Any): The query result.
+            row_count (int): Number of rows in the value, counted against `max_rows`.
+            data_version (Hashable): Persisted data version of the user the value
+                was read at, see `data_version_key` (optional).
+        """
+        if generation != self.generation(user_id) or row_count > self.max_rows:
+            return
+        if key in self._entries:
+            self._remove(key)
+
+        self._entries[key] = CacheEntry(
+            user_id=user_id,
+            value=value,
+            row_count=row_count,
+            expires_at=self.clock() + self.ttl_seconds,
+            data_version=data_version,
+        )
+        self._user_keys.setdefault(user_id, set()).add(key)
+        self.stats.entries += 1
+        self.stats.rows += row_count
+
+        while self.stats.rows > self.max_rows:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.stats.evictions += 1
+
+    def invalidate_user(self, user_id: str) -> None:
+        """
+        Bumps the user's generation and drops the user's cached entries.
+        """
+        self._generations[user_id] = self.generation(user_id) + 1
+        self._invalidated_at[user_id] = self._last_invalidated_at = self.clock()
+        self.epoch += 1
+        for key in self._user_keys.pop(user_id, set()):
+            self._remove(key)
+        self.stats.invalidations += 1
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        keys = self._user_keys.get(entry.user_id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._user_keys[entry.user_id]
+        self.stats.entries -= 1
+        self.stats.rows -= entry.row_count
+
+
+def data_version_key(version: UserDataVersion | None) -> Hashable:
+    """
+    Returns the fields of a data version that its ETag is built from.
+    """
+    if version is None:
+        return None
+    return (version.version, version.updated_at)
+
+
+class CachingGlucoseDataService(GlucoseDataService):
+    """
+    `GlucoseDataService` that serves level queries from a `QueryCache`.
+
+    Cached records are detached ORM objects or rows shared between requests and
+    must be treated as read-only. The data versions looked up through the service
+    are remembered, so a request validates its cached entries against the version
+    its ETag was built from.
+    """
+
+    def __init__(self, *args, query_cache: QueryCache, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.query_cache = query_cache
+        self._user_data_versions: dict[str, Hashable] = {}
+        self._level_data_versions: dict[int, Hashable] = {}
+
+    async def get_user_data_version(self, user_id: str) -> UserDataVersion | None:
+        with self._primary_reads(self.query_cache.recently_invalidated(user_id)):
+            version = await super().get_user_data_version(user_id)
+        self._user_data_versions[user_id] = data_version_key(version)
+        return version
+
+    async def get_glucose_level_data_version(self, id: int) -> UserDataVersion | None:
+        with self._primary_reads(self.query_cache.recently_invalidated()):
+            version = await super().get_glucose_level_data_version(id)
+        self._level_data_versions[id] = data_version_key(version)
+        return version
+
+    async def store_glucose_row_batches(
+        self,
+        batches: AsyncIterable[list[dict]],
+        user_id: str,
+        stats: IngestStats | None = None,
+        content_hash: str | None = None,
+    ) -> IngestStats:
+        try:
+            return await super().store_glucose_row_batches(
+                batches, user_id, stats, content_hash
+            )
+        finally:
+            # Also after a failure, as some batches may have been flushed
+            self.query_cache.invalidate_user(user_id)
+
+    async def get_user_glucose_data(
+        self,
+        user_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+        limit: int = 100,
+        offset: int = 0,
+        cursor: str | None = None,
+    ) -> Sequence[UserGlucoseData]:
+        after = decode_cursor(cursor) if cursor else None
+        return await self._read_through(
+            ("levels", user_id, start, end, sort, limit, offset, after),
+            user_id,
+            partial(
+                super().get_user_glucose_data,
+                user_id=user_id,
+                start=start,
+                end=end,
+                sort=sort,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+            ),
+        )
+
+    async def get_user_glucose_rows(
+        self,
+        fields: list[str],
+        user_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+        limit: int = 100,
+        offset: int = 0,
+        cursor: str | None = None,
+    ) -> Sequence[Row]:
+        after = decode_cursor(cursor) if cursor else None
+        return await self._read_through(
+            ("rows", tuple(fields), user_id, start, end, sort, limit, offset, after),
+            user_id,
+            partial(
+                super().get_user_glucose_rows,
+                fields=fields,
+                user_id=user_id,
+                start=start,
+                end=end,
+                sort=sort,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+            ),
+        )
+
+    async def get_downsampled_glucose_rows(
+        self,
+        fields: list[str],
+        user_id: str,
+        max_points: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+    ) -> Sequence[Row]:
+        return await self._read_through(
+            ("downsampled", tuple(fields), user_id, max_points, start, end, sort),
+            user_id,
+            partial(
+                super().get_downsampled_glucose_rows,
+                fields=fields,
+                user_id=user_id,
+                max_points=max_points,
+                start=start,
+                end=end,
+                sort=sort,
+            ),
+        )
+
+    async def _read_through(
+        self, key: Hashable, user_id: str, query: Callable[[], Awaitable[Sequence]]
+    ) -> Sequence:
+        if user_id not in self._user_data_versions:
+            await self.get_user_data_version(user_id)
+        data_version = self._user_data_versions[user_id]
+        cached = self.query_cache.get(key, data_version)
+        if cached is not None:
+            return cached
+
+        generation = self.query_cache.generation(user_id)
+        with self._primary_reads(self.query_cache.recently_invalidated(user_id)):
+            result = await query()
+        self.query_cache.put(
+            key, user_id, generation, result, max(len(result), 1), data_version
+        )
+        return result
+
+    @contextmanager
+    def _primary_reads(self, enabled: bool) -> Iterator[None]:
+        # Reads from the primary while replicas may lag behind a recent ingestion
+        if not enabled:
+            yield
+            return
+        repository = self.database_repository
+        self.database_repository = repository.with_primary_reads()
+        try:
+            yield
+        finally:
+            self.database_repository = repository
+
+    async def get_glucose_level_by_id(self, id: int) -> UserGlucoseData | None:
+        key = ("level", id)
+        # Only checked if the route looked the version up for its ETag
+        data_version = self._level_data_versions.get(id)
+        cached = self.query_cache.get(key, data_version)
+        if cached is not None:
+            return cached
+
+        # The owner is only known after the read, so any ingestion finishing during
+        # the read keeps the record out of the cache
+        epoch = self.query_cache.epoch
+        with self._primary_reads(self.query_cache.recently_invalidated()):
+            glucose_level = await super().get_glucose_level_by_id(id)
+        if glucose_level is not None and self.query_cache.epoch == epoch:
+            self.query_cache.put(
+                key,
+                glucose_level.user_id,
+                self.query_cache.generation(glucose_level.user_id),
+                glucose_level,
+                1,
+                data_version,
+            )
+        return glucose_level
+
+    async def get_glucose_levels_by_ids(
+        self, ids: list[int]
+    ) -> tuple[list[UserGlucoseData], list[int]]:
+        # Cached records are shared with `get_glucose_level_by_id`
+        unique_ids = list(dict.fromkeys(ids))
+        cached = {}
+        for id in unique_ids:
+            glucose_level = self.query_cache.get(("level", id))
+            if glucose_level is not None:
+                cached[id] = glucose_level
+
+        epoch = self.query_cache.epoch
+        with self._primary_reads(self.query_cache.recently_invalidated()):
+            glucose_levels, missing_ids = await super().get_glucose_levels_by_ids(
+                [id for id in unique_ids if id not in cached]
+            )
+        if self.query_cache.epoch == epoch:
+            for glucose_level in glucose_levels:
+                self.query_cache.put(
+                    ("level", glucose_level.id),
+                    glucose_level.user_id,
+                    self.query_cache.generation(glucose_level.user_id),
+                    glucose_level,
+                    1,
+                )
+
+        cached.update((level.id, level) for level in glucose_levels)
+        return [cached[id] for id in unique_ids if id in cached], missing_ids
@@ -0,0 +1,315 @@
+"""
+Columnar decoding of LibreLink CSV rows.
+
+Instead of building one `GlucoseRecordCSV` per row, a whole batch is turned into
+typed NumPy column arrays and the timestamp and integer conversions run as array
+operations. The decoder only accepts input it can convert exactly like the pydantic
+model does; for anything else it returns None and callers fall back to the pydantic
+reference path, which also produces the per-row error message.
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+
+import numpy as np
+
+from src.domain.records import GlucoseRecordCSV
+
+# CSV keys the columnar decoder converts. Any other key that maps to a model field
+# is left to the pydantic path.
+DEVICE = "Gerät"
+SERIAL_NUMBER = "Seriennummer"
+DEVICE_TIMESTAMP = "Gerätezeitstempel"
+RECORD_TYPE = "Aufzeichnungstyp"
+GLUCOSE_VALUE_HISTORY = "Glukosewert-Verlauf mg/dL"
+NOTES = "Notizen"
+
+SUPPORTED_KEYS = {
+    DEVICE,
+    SERIAL_NUMBER,
+    DEVICE_TIMESTAMP,
+    RECORD_TYPE,
+    GLUCOSE_VALUE_HISTORY,
+    NOTES,
+}
+
+# Keys that pydantic would bind to a field of `GlucoseRecordCSV`
+MODEL_KEYS = {
+    field.alias or name for name, field in GlucoseRecordCSV.model_fields.items()
+}
+
+# Layout of "%d-%m-%Y %H:%M" once zero padded, e.g. "18-02-2021 10:57"
+TIMESTAMP_WIDTH = 16
+TIMESTAMP_SEPARATORS = {2: "-", 5: "-", 10: " ", 13: ":"}
+TIMESTAMP_DIGITS = [0, 1, 3, 4, 6, 7, 8, 9, 11, 12, 14, 15]
+
+# Longest digit string that always fits into an int64
+MAX_INT_DIGITS = 18
+
+
+@dataclass
+class GlucoseColumns:
+    """
+    A batch of decoded CSV rows stored column by column.
+    """
+
+    device: list[str]
+    serial_number: list[str]
+    device_timestamp: np.ndarray  # datetime64[m]
+    record_type: np.ndarray  # int64
+    glucose_value_history: np.ndarray  # int64, only valid where the mask is False
+    glucose_value_history_missing: np.ndarray  # bool
+    notes: list[str | None]
+
+    def __len__(self) -> int:
+        return len(self.device)
+
+    def to_rows(self, user_id: str) -> list[dict]:
+        """
+        Converts the columns into `UserGlucoseData` column/value dicts, matching
+        `UserGlucoseData.convert_item_to_row` for the equivalent pydantic records.
+        """
+        timestamps: list[datetime] = self.device_timestamp.astype(
+            "datetime64[us]"
+        ).tolist()
+        record_types = self.record_type.tolist()
+        glucose_values = [
+            None if missing else value
+            for value, missing in zip(
+                self.glucose_value_history.tolist(),
+                self.glucose_value_history_missing.tolist(),
+            )
+        ]
+
+        return [
+            {
+                "user_id": user_id,
+                "device": device,
+                "serial_number": serial_number,
+                "device_timestamp": timestamp,
+                "record_type": record_type,
+                "glucose_value_history": glucose_value,
+                "glucose_scan": None,
+                "non_numeric_fast_insulin": None,
+                "fast_insulin_units": None,
+                "non_numeric_food": None,
+                "carbs_grams": None,
+                "carbs_portions": None,
+                "non_numeric_long_insulin": None,
+                "long_insulin_units": None,
+                "notes": notes,
+                "glucose_teststrip": None,
+                "ketone": None,
+                "meal_insulin": None,
+                "correction_insulin": None,
+                "insulin_change_by_user": None,
+            }
+            for device, serial_number, timestamp, record_type, glucose_value, notes in zip(
+                self.device,
+                self.serial_number,
+                timestamps,
+                record_types,
+                glucose_values,
+                self.notes,
+            )
+        ]
+
+
+def _code_points(values: list[str]) -> np.ndarray:
+    """
+    Returns a (rows, width) matrix of the Unicode code points of `values`, padded
+    with zeros on the right.
+    """
+    array = np.array(values, dtype=np.str_)
+    width = max(array.dtype.itemsize // 4, 1)
+    return array.view(np.uint32).reshape(len(values), width)
+
+
+def parse_timestamps(values: list) -> np.ndarray | None:
+    """
+    Vectorized equivalent of `datetime.strptime(value, "%d-%m-%Y %H:%M")` for
+    zero padded timestamps.
+
+    Returns:
+        np.ndarray | None: datetime64[m] values, or None if any value is not a
+        zero padded, valid timestamp.
+    """
+    if not values or any(not isinstance(value, str) for value in values):
+        return None
+
+    codes = _code_points(values)
+    if codes.shape[1] != TIMESTAMP_WIDTH or not (codes != 0).all():
+        return None
+    for position, separator in TIMESTAMP_SEPARATORS.items():
+        if not (codes[:, position] == ord(separator)).all():
+            return None
+
+    digits = codes[:, TIMESTAMP_DIGITS].astype(np.int64) - ord("0")
+    if not ((digits >= 0) & (digits <= 9)).all():
+        return None
+
+    day = digits[:, 0] * 10 + digits[:, 1]
+    month = digits[:, 2] * 10 + digits[:, 3]
+    year = digits[:, 4] * 1000 + digits[:, 5] * 100 + digits[:, 6] * 10 + digits[:, 7]
+    hour = digits[:, 8] * 10 + digits[:, 9]
+    minute = digits[:, 10] * 10 + digits[:, 11]
+
+    in_range = np.logical_and.reduce(
+        [
+            year >= 1,
+            month >= 1,
+            month <= 12,
+            day >= 1,
+            day <= 31,
+            hour <= 23,
+            minute <= 59,
+        ]
+    )
+    if not in_range.all():
+        return None
+
+    months = (year - 1970) * 12 + (month - 1)
+    first_of_month = months.astype("datetime64[M]")
+    dates = first_of_month.astype("datetime64[D]") + (day - 1).astype("timedelta64[D]")
+    # Days past the end of the month roll over into the next one
+    if not (dates.astype("datetime64[M]") == first_of_month).all():
+        return None
+
+    return dates.astype("datetime64[m]") + (hour * 60 + minute).astype("timedelta64[m]")
+
+
+def parse_integers(values: list) -> np.ndarray | None:
+    """
+    Vectorized integer conversion for strings made only of ASCII digits.
+
+    Returns:
+        np.ndarray | None: int64 values, or None if any value is not a plain
+        non-negative integer of at most `MAX_INT_DIGITS` digits.
+    """
+    if not values:
+        return np.zeros(0, dtype=np.int64)
+    if any(not isinstance(value, str) for value in values):
+        return None
+
+    codes = _code_points(values)
+    present = codes != 0
+    if codes.shape[1] > MAX_INT_DIGITS or not present[:, 0].all():
+        return None
+    # Zero code points may only be the right padding
+    if not (present[:, 1:] <= present[:, :-1]).all():
+        return None
+
+    digits = codes.astype(np.int64) - ord("0")
+    if not (((digits >= 0) & (digits <= 9)) | ~present).all():
+        return None
+
+    result: np.ndarray = np.zeros(len(values), dtype=np.int64)
+    for column in range(codes.shape[1]):
+        result = np.where(present[:, column], result * 10 + digits[:, column], result)
+    return result
+
+
+def drop_ingested_rows(
+    rows: list[dict], watermarks: dict[str, datetime]
+) -> tuple[list[dict], int]:
+    """
+    Drops raw CSV rows that are older than the watermark of their serial number.
+
+    Runs before validation, so already-ingested history costs neither validation
+    nor database round trips. Rows at the watermark itself are kept, as more
+    readings may share that minute, and rows whose timestamp cannot be read are
+    kept so validation can report them.
+
+    Args:
+        rows (list[dict]): Raw CSV rows of one batch.
+        watermarks (dict[str, datetime]): Newest ingested device timestamp keyed by
+            serial number.
+
+    Returns:
+        tuple[list[dict], int]: The remaining rows and the number of dropped rows.
+    """
+    if not rows or not watermarks:
+        return rows, 0
+
+    raw_timestamps = [row.get(DEVICE_TIMESTAMP) for row in rows]
+    timestamps = parse_timestamps(raw_timestamps)
+    if timestamps is None:
+        timestamps = np.array(
+            [_parse_timestamp(value) for value in raw_timestamps],
+            dtype="datetime64[m]",
+        )
+
+    limits = np.array(
+        [watermarks.get(row.get(SERIAL_NUMBER, "")) for row in rows],
+        dtype="datetime64[m]",
+    )
+    # Comparisons with NaT (unknown serial number or timestamp) are False
+    ingested = timestamps < limits
+    kept = [row for row, skip in zip(rows, ingested.tolist()) if not skip]
+    return kept, len(rows) - len(kept)
+
+
+def _parse_timestamp(value) -> datetime | None:
+    try:
+        return datetime.strptime(value, "%d-%m-%Y %H:%M")
+    except (TypeError, ValueError):
+        return None
+
+
+def decode_glucose_rows(rows: list[dict]) -> GlucoseColumns | None:
+    """
+    Decodes a batch of `csv.DictReader` rows into typed columns.
+
+    Args:
+        rows (list[dict]): Raw CSV rows of one batch.
+
+    Returns:
+        GlucoseColumns | None: The decoded columns, or None when the batch contains
+        anything the columnar path cannot convert exactly like `GlucoseRecordCSV`.
+    """
+    if not rows:
+        return None
+
+    keys = set(rows[0])
+    # Extra values (stored under a None key) and unsupported model fields
+    if None in keys or (keys & MODEL_KEYS) - SUPPORTED_KEYS:
+        return None
+    if not {DEVICE, SERIAL_NUMBER, DEVICE_TIMESTAMP, RECORD_TYPE} <= keys:
+        return None
+    if any(row.keys() != keys for row in rows):
+        return None
+
+    device = [row[DEVICE] for row in rows]
+    serial_number = [row[SERIAL_NUMBER] for row in rows]
+    if any(not isinstance(value, str) for value in device + serial_number):
+        return None
+
+    device_timestamp = parse_timestamps([row[DEVICE_TIMESTAMP] for row in rows])
+    record_type = parse_integers([row[RECORD_TYPE] for row in rows])
+    if device_timestamp is None or record_type is None:
+        return None
+
+    raw_glucose = [row.get(GLUCOSE_VALUE_HISTORY) for row in rows]
+    glucose_missing = np.array(
+        [value is None or value == "" for value in raw_glucose], dtype=bool
+    )
+    glucose_values = np.zeros(len(rows), dtype=np.int64)
+    if not glucose_missing.all():
+        present_values = parse_integers(
+            [value for value in raw_glucose if value is not None and value != ""]
+        )
+        if present_values is None:
+            return None
+        glucose_values[~glucose_missing] = present_values
+
+    notes = [row.get(NOTES) for row in rows]
+
+    return GlucoseColumns(
+        device=device,
+        serial_number=serial_number,
+        device_timestamp=device_timestamp,
+        record_type=record_type,
+        glucose_value_history=glucose_values,
+        glucose_value_history_missing=glucose_missing,
+        notes=notes,
+    )
@@ -0,0 +1,146 @@
+import codecs
+import csv
+from typing import Any, AsyncIterator
+
+# Marker of the LibreLink export preamble line that precedes the CSV header
+PREAMBLE_MARKER = "Glukose-Werte"
+
+
+async def iter_text_lines(file: Any, chunk_size: int) -> AsyncIterator[str]:
+    """
+    Reads an uploaded file in fixed-size chunks and yields its decoded lines.
+
+    UTF-8 is decoded incrementally, so multi-byte characters split across chunk
+    boundaries are handled, and at most one chunk plus one partial line is held in
+    memory at a time.
+
+    Args:
+        file (UploadFile): The uploaded file, or any object with an async `read(size)`.
+        chunk_size (int): Number of bytes to read per call.
+
+    Yields:
+        str: Lines of the file without their line terminators.
+    """
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+
+    while True:
+        chunk = await file.read(chunk_size)
+        text = decoder.decode(chunk, final=not chunk)
+        if text:
+            lines = (pending + text).splitlines(keepends=True)
+            pending = ""
+            # The last line is incomplete unless the text ended on a line break
+            if lines[-1].splitlines()[0] == lines[-1]:
+                pending = lines.pop()
+            for line in lines:
+                yield line.splitlines()[0]
+        if not chunk:
+            break
+
+    if pending:
+        yield pending
+
+
+async def iter_csv_records(lines: AsyncIterator[str]) -> AsyncIterator[str]:
+    """
+    Drops the export preamble and blank lines, and joins physical lines into
+    logical CSV records so quoted fields may span several lines.
+
+    Args:
+        lines (AsyncIterator[str]): Decoded lines of the file.
+
+    Yields:
+        str: One complete CSV record at a time.
+    """
+    parts: list[str] = []
+    quotes = 0
+
+    async for line in lines:
+        if line.strip() == "" or PREAMBLE_MARKER in line:
+            continue
+
+        parts.append(line)
+        quotes += line.count('"')
+        # An odd number of quotes means a quoted field continues on the next line
+        if quotes % 2 == 0:
+            yield "\n".join(parts)
+            parts = []
+            quotes = 0
+
+    if parts:
+        yield "\n".join(parts)
+
+
+def parse_csv_records(
+    fieldnames: list[str], records: list[str]
+) -> list[dict[str, str]]:
+    """
+    Parses complete CSV records into row dicts keyed by the header.
+
+    Args:
+        fieldnames (list[str]): The CSV header.
+        records (list[str]): Records as yielded by `iter_csv_records`.
+
+    Returns:
+        list[dict[str, str]]: The parsed rows.
+    """
+    return list(csv.DictReader(records, fieldnames=fieldnames))
+
+
+async def iter_csv_record_blocks(
+    file: Any, block_size: int, chunk_size: int
+) -> AsyncIterator[tuple[list[str], list[str]]]:
+    """
+    Streams an uploaded LibreLink CSV export as blocks of unparsed records.
+
+    Blocks are split at record boundaries, so each one can be parsed on its own,
+    e.g. in another process.
+
+    Args:
+        file (UploadFile): The uploaded CSV file.
+        block_size (int): Maximum number of records per block.
+        chunk_size (int): Number of bytes read from the file at a time.
+
+    Yields:
+        tuple[list[str], list[str]]: The CSV header and the records of a block.
+    """
+    fieldnames: list[str] | None = None
+    records: list[str] = []
+
+    async for record in iter_csv_records(iter_text_lines(file, chunk_size)):
+        if fieldnames is None:
+            fieldnames = next(csv.reader([record]))
+            continue
+
+        records.append(record)
+        if len(records) >= block_size:
+            yield fieldnames, records
+            records = []
+
+    if fieldnames is not None and records:
+        yield fieldnames, records
+
+
+async def iter_csv_row_batches(
+    file: Any, batch_size: int, chunk_size: int
+) -> AsyncIterator[list[dict[str, str]]]:
+    """
+    Streams an uploaded LibreLink CSV export as batches of row dicts.
+
+    The first record after the preamble is used as the header, and every batch is
+    parsed with `csv.DictReader`, so rows look exactly like iterating a
+    `DictReader` over the whole file.
+
+    Args:
+        file (UploadFile): The uploaded CSV file.
+        batch_size (int): Maximum number of rows per batch.
+        chunk_size (int): Number of bytes read from the file at a time.
+
+    Yields:
+        list[dict[str, str]]: Parsed rows keyed by the CSV header.
+    """
+    async for fieldnames, records in iter_csv_record_blocks(
+        file, block_size=batch_size, chunk_size=chunk_size
+    ):
+        yield parse_csv_records(fieldnames, records)
@@ -0,0 +1,84 @@
+"""
+Largest-Triangle-Three-Buckets (LTTB) downsampling of glucose series for charts.
+
+LTTB keeps the first and the last reading and splits the readings in between into
+equal buckets, one per remaining point. From every bucket it keeps the reading that
+forms the largest triangle with the reading kept from the previous bucket and the
+average of the next bucket, so peaks and troughs survive while flat stretches are
+thinned out (Steinarsson, "Downsampling Time Series for Visual Representation").
+
+On top of that, the lowest and the highest reading are always kept, so a chart never
+hides a hypo or a spike.
+"""
+
+import numpy as np
+
+
+def _bucket_edges(count: int, buckets: int) -> np.ndarray:
+    # Bucket i holds the points edges[i]:edges[i + 1] of points 1 to count - 2
+    edges = 1 + np.arange(buckets + 1) * (count - 2) // buckets
+    edges[-1] = count - 1
+    return edges
+
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, max_points: int) -> np.ndarray:
+    """
+    Picks the points of a series that LTTB keeps.
+
+    The averages every bucket is compared against are computed for all buckets at
+    once and the triangle areas of a bucket's points in one array operation, so
+    Python only loops over the buckets.
+
+    Args:
+        x (np.ndarray): Ascending x coordinates, e.g. timestamps in seconds.
+        y (np.ndarray): Values, without NaN.
+        max_points (int): Maximum number of points kept, at least 4.
+
+    Returns:
+        np.ndarray: Ascending indices of the kept points; all indices if the series
+        has at most `max_points` points.
+    """
+    count = len(x)
+    if count <= max_points:
+        return np.arange(count)
+
+    # Relative to the first point, so the products keep their precision
+    x = x.astype(np.float64) - x[0]
+    y = y.astype(np.float64)
+
+    extremes = np.unique([np.argmin(y), np.argmax(y)])
+    edges = _bucket_edges(count, max_points - 2)
+    buckets = np.searchsorted(edges, extremes, side="right") - 1
+    if len(set(buckets.tolist())) < len(extremes) and 0 <= buckets[0] < len(edges) - 1:
+        # Both extremes fall in one bucket and are kept, so one bucket less
+        edges = _bucket_edges(count, max_points - 3)
+        buckets = np.searchsorted(edges, extremes, side="right") - 1
+
+    forced: dict[int, list[int]] = {}
+    for index, bucket in zip(extremes.tolist(), buckets.tolist()):
+        forced.setdefault(bucket, []).append(index)
+
+    # Average point of every bucket; the last bucket is compared to the last point
+    sizes = np.diff(edges)
+    average_x = np.add.reduceat(x[:-1], edges[:-1]) / sizes
+    average_y = np.add.reduceat(y[:-1], edges[:-1]) / sizes
+    next_x = np.append(average_x[1:], x[-1])
+    next_y = np.append(average_y[1:], y[-1])
+
+    selected = [0]
+    previous = 0
+    for bucket in range(len(sizes)):
+        if bucket in forced:
+            selected.extend(forced[bucket])
+        else:
+            low, high = edges[bucket], edges[bucket + 1]
+            # Twice the triangle areas, via the cross product
+            base_x = next_x[bucket] - x[previous]
+            base_y = next_y[bucket] - y[previous]
+            side_x = x[low:high] - x[previous]
+            side_y = y[low:high] - y[previous]
+            area = np.abs(base_x * side_y - base_y * side_x)
+            selected.append(low + int(np.argmax(area)))
+        previous = selected[-1]
+    selected.append(count - 1)
+    return np.array(selected, dtype=np.int64)
@@ -2,3 +2,27 @@ class WrongFileFormatException(Exception):
     """Raised when a file format is not supported."""
 
     pass
+
+
+class InvalidCursorException(Exception):
+    """Raised when a pagination cursor cannot be decoded."""
+
+    pass
+
+
+class InvalidCSVDataException(Exception):
+    """Raised when a CSV row fails validation."""
+
+    pass
+
+
+class InvalidFieldsException(Exception):
+    """Raised when a sparse fieldset names an unknown field."""
+
+    pass
+
+
+class IngestQueueFullException(Exception):
+    """Raised when too many background ingestion jobs are waiting to run."""
+
+    pass
@@ -0,0 +1,33 @@
+from dataclasses import dataclass
+
+from prometheus_client import Counter
+
+# Rows of CSV uploads by outcome: parsed, skipped (older than the ingest watermark),
+# rejected (failed validation) or inserted (committed)
+INGEST_ROWS = Counter(
+    "glucose_ingest_rows_total", "Rows of uploaded CSV files by outcome", ["outcome"]
+)
+INGEST_BYTES = Counter(
+    "glucose_ingest_uploaded_bytes_total", "Bytes of uploaded CSV files"
+)
+
+
+@dataclass
+class IngestStats:
+    """
+    Counters describing a single CSV ingestion run.
+    """
+
+    rows_parsed: int = 0
+    rows_inserted: int = 0
+    # Rows older than the ingest watermark, dropped before validation
+    rows_skipped: int = 0
+    elapsed_seconds: float = 0.0
+    # Set when a byte-identical file was already ingested and nothing was written
+    duplicate_upload: bool = False
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.rows_inserted / self.elapsed_seconds
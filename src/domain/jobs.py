@@ -0,0 +1,255 @@
+import asyncio
+import glob
+import logging
+import os
+import tempfile
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from enum import Enum
+from typing import Any, AsyncIterator, Callable
+
+from fastapi import UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.domain.exceptions import IngestQueueFullException, InvalidCSVDataException
+from src.domain.ingest import IngestStats
+from src.domain.service import GlucoseDataService
+
+_logger = logging.getLogger(__name__)
+
+
+class JobStatus(str, Enum):
+    queued = "queued"
+    running = "running"
+    succeeded = "succeeded"
+    failed = "failed"
+
+
+@dataclass
+class IngestJob:
+    """
+    State and progress of a background CSV ingestion.
+    """
+
+    id: str
+    user_id: str
+    filename: str
+    status: JobStatus = JobStatus.queued
+    stats: IngestStats = field(default_factory=IngestStats)
+    errors: list[str] = field(default_factory=list)
+    created_at: datetime = field(default_factory=datetime.now)
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+
+    @property
+    def rows_per_second(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        elapsed = (
+            (self.finished_at or datetime.now()) - self.started_at
+        ).total_seconds()
+        if elapsed <= 0:
+            return 0.0
+        return self.stats.rows_inserted / elapsed
+
+    @property
+    def is_finished(self) -> bool:
+        return self.status in (JobStatus.succeeded, JobStatus.failed)
+
+
+class IngestJobManager:
+    """
+    Runs CSV ingestions in the background with bounded concurrency.
+
+    Uploads are spooled to disk so the request can return right away, and at most
+    `max_concurrent_jobs` files are processed at the same time, each with its own
+    database session. At most `max_queued_jobs` jobs wait for their turn, which
+    bounds the spooled data, and finished jobs are forgotten after
+    `job_retention_seconds`. Job state lives in process memory, so a job is only
+    visible on the worker that accepted it.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], AsyncIterator[AsyncSession]],
+        service_factory: Callable[[AsyncSession], GlucoseDataService],
+        spool_dir: str | None = None,
+        max_concurrent_jobs: int = 2,
+        max_retained_jobs: int = 1000,
+        read_chunk_size: int = 64 * 1024,
+        max_queued_jobs: int = 100,
+        job_retention_seconds: float = 3600.0,
+    ) -> None:
+        """
+        Args:
+            session_factory (Callable): Async generator function yielding a database
+                session, e.g. `DatabaseManager.get_session`.
+            service_factory (Callable): Builds a `GlucoseDataService` for a session.
+            spool_dir (str | None): Directory for spooled uploads (system temp dir
+                if None).
+            max_concurrent_jobs (int): Maximum number of jobs processed at once.
+            max_retained_jobs (int): Number of finished jobs kept for status queries.
+            read_chunk_size (int): Number of bytes copied at a time while spooling.
+            max_queued_jobs (int): Maximum number of jobs waiting to be processed.
+            job_retention_seconds (float): Time after which a finished job is no
+                longer kept for status queries.
+        """
+        self.session_factory = session_factory
+        self.service_factory = service_factory
+        self.spool_dir = spool_dir
+        self.max_retained_jobs = max_retained_jobs
+        self.read_chunk_size = read_chunk_size
+        self.max_queued_jobs = max_queued_jobs
+        self.job_retention_seconds = job_retention_seconds
+        self._semaphore = asyncio.Semaphore(max_concurrent_jobs)
+        self._jobs: OrderedDict[str, IngestJob] = OrderedDict()
+        self._tasks: set[asyncio.Task] = set()
+        self._spool_paths: dict[str, str] = {}
+
+    async def submit(self, file: Any, user_id: str) -> IngestJob:
+        """
+        Spools an uploaded CSV file to disk and schedules its ingestion.
+
+        Args:
+            file (UploadFile): The uploaded CSV file.
+            user_id (str): The ID of the user the records belong to.
+
+        Returns:
+            IngestJob: The queued job.
+
+        Raises:
+            IngestQueueFullException: If `max_queued_jobs` jobs are already waiting.
+        """
+        self._evict_finished_jobs()
+        queued = sum(job.status == JobStatus.queued for job in self._jobs.values())
+        if queued >= self.max_queued_jobs:
+            raise IngestQueueFullException(f"{queued} ingestion jobs are waiting")
+
+        # Registered before spooling, so concurrent uploads count against the queue
+        job = IngestJob(id=str(uuid.uuid4()), user_id=user_id, filename=file.filename)
+        self._jobs[job.id] = job
+        try:
+            path = await self._spool(file)
+        except BaseException:
+            del self._jobs[job.id]
+            raise
+        self._spool_paths[job.id] = path
+
+        task = asyncio.create_task(self._run(job, path))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+        return job
+
+    def get(self, job_id: str) -> IngestJob | None:
+        """
+        Returns the job with the given ID, or None if it is unknown.
+        """
+        self._evict_finished_jobs()
+        return self._jobs.get(job_id)
+
+    async def shutdown(self) -> None:
+        """
+        Cancels queued and running jobs, waits for them to stop and removes the
+        files they spooled.
+        """
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        # Tasks cancelled before they started never remove their file
+        for path in self._spool_paths.values():
+            self._remove_spool_file(path)
+        self._spool_paths.clear()
+
+    def remove_stale_spool_files(self) -> int:
+        """
+        Removes spooled uploads older than `job_retention_seconds` that no job of
+        this manager owns, e.g. left behind by a worker that was killed.
+
+        Returns:
+            int: The number of removed files.
+        """
+        spool_dir = self.spool_dir or tempfile.gettempdir()
+        owned = set(self._spool_paths.values())
+        cutoff = time.time() - self.job_retention_seconds
+        removed = 0
+        for path in glob.glob(os.path.join(spool_dir, "ingest-*.csv")):
+            try:
+                if path not in owned and os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+                    removed += 1
+            except FileNotFoundError:
+                continue
+        return removed
+
+    async def _spool(self, file: Any) -> str:
+        spool = tempfile.NamedTemporaryFile(
+            dir=self.spool_dir, prefix="ingest-", suffix=".csv", delete=False
+        )
+        try:
+            with spool:
+                while chunk := await file.read(self.read_chunk_size):
+                    await asyncio.to_thread(spool.write, chunk)
+        except Exception:
+            os.remove(spool.name)
+            raise
+        return spool.name
+
+    async def _run(self, job: IngestJob, path: str) -> None:
+        try:
+            async with self._semaphore:
+                job.status = JobStatus.running
+                job.started_at = datetime.now()
+                await self._ingest(job, path)
+                job.status = JobStatus.succeeded
+        except InvalidCSVDataException as e:
+            job.status = JobStatus.failed
+            job.errors.append(f"Invalid CSV data: {str(e)}")
+        except asyncio.CancelledError:
+            job.status = JobStatus.failed
+            job.errors.append("Job was cancelled")
+            raise
+        except Exception as ex:
+            _logger.error(
+                f"Ingestion job {job.id} failed. Exception: {ex}",
+                exc_info=True,
+            )
+            job.status = JobStatus.failed
+            job.errors.append("Something went wrong")
+        finally:
+            job.finished_at = datetime.now()
+            self._spool_paths.pop(job.id, None)
+            self._remove_spool_file(path)
+
+    @staticmethod
+    def _remove_spool_file(path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    async def _ingest(self, job: IngestJob, path: str) -> None:
+        with open(path, "rb") as spooled:
+            file = UploadFile(file=spooled, filename=job.filename)
+            async for session in self.session_factory():
+                service = self.service_factory(session)
+                content_hash = await service.hash_csv_file(file)
+                _, batches = await service.parse_csv_file(file, stats=job.stats)
+                await service.store_glucose_row_batches(
+                    batches=batches,
+                    user_id=job.user_id,
+                    stats=job.stats,
+                    content_hash=content_hash,
+                )
+
+    def _evict_finished_jobs(self) -> None:
+        finished = [job_id for job_id, job in self._jobs.items() if job.is_finished]
+        expired_before = datetime.now() - timedelta(seconds=self.job_retention_seconds)
+        for index, job_id in enumerate(finished):
+            finished_at = self._jobs[job_id].finished_at
+            expired = finished_at is not None and finished_at < expired_before
+            if expired or index < len(finished) - self.max_retained_jobs:
+                del self._jobs[job_id]
@@ -0,0 +1,94 @@
+"""
+Clinical CGM metrics computed with NumPy over a window of sensor readings.
+
+Ranges follow the international consensus on time in range (mg/dL): very low < 54,
+low 54-69, in range 70-180, high 181-250 and very high > 250. The glucose
+management indicator is GMI (%) = 3.31 + 0.02392 * mean glucose (mg/dL).
+"""
+
+from dataclasses import dataclass
+
+import numpy as np
+
+from src.domain.aggregation import PERCENTILES, grouped_statistics
+
+# Upper bounds (exclusive) of the time-in-range bands, in mg/dL
+VERY_LOW_BELOW = 54
+LOW_BELOW = 70
+IN_RANGE_UP_TO = 180
+HIGH_UP_TO = 250
+
+# Width of the time-of-day bins of the ambulatory glucose profile
+AGP_BIN_MINUTES = 5
+
+
+@dataclass
+class GlucoseMetrics:
+    """
+    Summary metrics of a window of glucose readings.
+    """
+
+    reading_count: int
+    mean: float
+    standard_deviation: float
+    coefficient_of_variation: float  # %
+    glucose_management_indicator: float  # %
+    time_in_ranges: dict[str, float]  # % of readings per band
+    agp: list[dict]  # time-of-day bins ("HH:MM") with their percentiles
+
+
+def compute_glucose_metrics(
+    timestamps: np.ndarray, values: np.ndarray
+) -> GlucoseMetrics | None:
+    """
+    Computes time in range, GMI, CV and the ambulatory glucose profile.
+
+    The standard deviation is the population standard deviation of the readings.
+    The AGP groups readings by time of day in `AGP_BIN_MINUTES` bins and gives
+    the `PERCENTILES` of every bin that has readings.
+
+    Args:
+        timestamps (np.ndarray): Reading timestamps as datetime64[m].
+        values (np.ndarray): Glucose values in mg/dL as float64.
+
+    Returns:
+        GlucoseMetrics | None: The metrics, or None if there are no readings.
+    """
+    reading_count = len(values)
+    if reading_count == 0:
+        return None
+
+    mean = float(values.mean())
+    standard_deviation = float(values.std())
+
+    bands = np.searchsorted(
+        [VERY_LOW_BELOW, LOW_BELOW, IN_RANGE_UP_TO + 1, HIGH_UP_TO + 1],
+        values,
+        side="right",
+    )
+    band_counts = np.bincount(bands, minlength=5) * 100 / reading_count
+    time_in_ranges = dict(
+        zip(["very_low", "low", "in_range", "high", "very_high"], band_counts.tolist())
+    )
+
+    minute_of_day = (timestamps - timestamps.astype("datetime64[D]")).astype(np.int64)
+    bin_ids, columns = grouped_statistics(
+        minute_of_day // AGP_BIN_MINUTES, values, list(PERCENTILES)
+    )
+    agp: list[dict] = [
+        {"time": f"{minute // 60:02d}:{minute % 60:02d}"}
+        for minute in (bin_ids * AGP_BIN_MINUTES).tolist()
+    ]
+    for metric, column in columns.items():
+        for row, value in zip(agp, column.tolist()):
+            row[metric] = value
+
+    return GlucoseMetrics(
+        reading_count=reading_count,
+        mean=mean,
+        standard_deviation=standard_deviation,
+        coefficient_of_variation=standard_deviation / mean * 100,
+        glucose_management_indicator=3.31 + 0.02392 * mean,
+        time_in_ranges=time_in_ranges,
+        agp=agp,
+    )
@@ -0,0 +1,42 @@
+import base64
+import binascii
+from datetime import datetime
+
+from src.domain.exceptions import InvalidCursorException
+
+
+def encode_cursor(device_timestamp: datetime, id: int) -> str:
+    """
+    Encodes the position of a glucose record into an opaque pagination cursor.
+
+    Args:
+        device_timestamp (datetime): Device timestamp of the last record on the page.
+        id (int): ID of the last record on the page.
+
+    Returns:
+        str: URL-safe cursor pointing right after the given record.
+    """
+    raw = f"{device_timestamp.isoformat()}|{id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """
+    Decodes a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor (str): The opaque cursor sent by the client.
+
+    Returns:
+        tuple[datetime, int]: The device timestamp and ID the next page starts after.
+
+    Raises:
+        InvalidCursorException: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode("ascii")).decode("utf-8")
+        timestamp, id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(timestamp), int(id)
+    except (ValueError, binascii.Error, UnicodeError) as e:
+        raise InvalidCursorException(str(e))
@@ -0,0 +1,38 @@
+from datetime import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class GlucoseRecordCSV(BaseModel):
+    Gerät: str
+    Seriennummer: str
+    Gerätezeitstempel: datetime
+    Aufzeichnungstyp: int
+    Glukosewert_Verlauf_mg_dL: Optional[int] = Field(
+        None, alias="Glukosewert-Verlauf mg/dL"
+    )
+    Glukose_Scan_mg_dL: Optional[int] = None
+    Nicht_numerisches_schnellwirkendes_Insulin: Optional[str] = None
+    Schnellwirkendes_Insulin_Einheiten: Optional[float] = None
+    Nicht_numerische_Nahrungsdaten: Optional[str] = None
+    Kohlenhydrate_Gramm: Optional[float] = None
+    Kohlenhydrate_Portionen: Optional[float] = None
+    Nicht_numerisches_Depotinsulin: Optional[str] = None
+    Depotinsulin_Einheiten: Optional[float] = None
+    Notizen: Optional[str] = None
+    Glukose_Teststreifen_mg_dL: Optional[int] = None
+    Keton_mmol_L: Optional[float] = None
+    Mahlzeiteninsulin_Einheiten: Optional[float] = None
+    Korrekturinsulin_Einheiten: Optional[float] = None
+    Insulin_Änderung_durch_Anwender_Einheiten: Optional[float] = None
+
+    @field_validator("Gerätezeitstempel", mode="before")
+    def parse_datetime(cls, value):
+        if isinstance(value, str):
+            return datetime.strptime(value, "%d-%m-%Y %H:%M")
+        return value
+
+    @field_validator("Glukosewert_Verlauf_mg_dL", mode="before")
+    def empty_str_to_none(cls, v):
+        return None if v == "" else v
@@ -1,11 +1,81 @@
-import csv
+import asyncio
+import hashlib
+import logging
+import time
+from collections import deque
+from concurrent.futures import Executor
 from datetime import datetime
-from io import StringIO
-from typing import Any, Sequence
+from typing import Any, AsyncIterable, AsyncIterator, Sequence
 
-from src.db.models import UserGlucoseData
-from src.db.repository import DatabaseRepository
-from src.domain.exceptions import WrongFileFormatException
+import numpy as np
+from sqlalchemy import Row
+
+from src.db.models import CsvUpload, UserDataVersion, UserGlucoseData
+from src.db.repository import EXPORT_COLUMNS, DatabaseRepository
+from src.domain.aggregation import (
+    BUCKET_MINUTES,
+    SQL_METRICS,
+    aggregate_buckets,
+    select_rollup,
+)
+from src.domain.columnar import decode_glucose_rows, drop_ingested_rows
+from src.domain.csv_reader import (
+    iter_csv_record_blocks,
+    iter_csv_row_batches,
+    parse_csv_records,
+)
+from src.domain.downsampling import lttb_indices
+from src.domain.exceptions import (
+    InvalidCSVDataException,
+    InvalidFieldsException,
+    WrongFileFormatException,
+)
+from src.domain.export import (
+    GlucoseSeries,
+    encode_csv,
+    encode_csv_header,
+    encode_ndjson,
+)
+from src.domain.ingest import INGEST_BYTES, INGEST_ROWS, IngestStats
+from src.domain.metrics import GlucoseMetrics, compute_glucose_metrics
+from src.domain.pagination import decode_cursor
+from src.domain.records import GlucoseRecordCSV
+
+_logger = logging.getLogger(__name__)
+
+# Fields a sparse fieldset of glucose levels may select
+LEVEL_FIELDS = [column.name for column in EXPORT_COLUMNS]
+
+
+def parse_csv_block(
+    fieldnames: list[str],
+    records: list[str],
+    user_id: str,
+    watermarks: dict[str, datetime] | None = None,
+) -> tuple[list[dict], int]:
+    """
+    Parses, validates and converts one block of CSV records into database rows.
+
+    Defined at module level so it can be sent to a `ProcessPoolExecutor`.
+
+    Args:
+        fieldnames (list[str]): The CSV header.
+        records (list[str]): Complete CSV records of the block.
+        user_id (str): The ID of the user the rows belong to.
+        watermarks (dict[str, datetime] | None): Newest ingested device timestamp
+            keyed by serial number. Older rows are dropped before validation.
+
+    Returns:
+        tuple[list[dict], int]: Rows keyed by `UserGlucoseData` column names, and
+        the number of dropped rows.
+
+    Raises:
+        InvalidCSVDataException: On the first row that fails validation.
+    """
+    rows, skipped = drop_ingested_rows(
+        parse_csv_records(fieldnames, records), watermarks or {}
+    )
+    return GlucoseDataService.decode_csv_rows(rows, user_id), skipped
 
 
 class GlucoseDataService:
@@ -13,57 +83,391 @@ class GlucoseDataService:
     Service class for managing and processing glucose data.
     """
 
-    def __init__(self, database_repository: DatabaseRepository) -> None:
+    def __init__(
+        self,
+        database_repository: DatabaseRepository,
+        csv_batch_size: int = 1000,
+        csv_read_chunk_size: int = 64 * 1024,
+        csv_executor: Executor | None = None,
+        csv_max_pending_blocks: int = 4,
+        export_batch_size: int = 5000,
+    ) -> None:
         self.database_repository = database_repository
+        self.csv_batch_size = csv_batch_size
+        self.csv_read_chunk_size = csv_read_chunk_size
+        self.csv_executor = csv_executor
+        self.csv_max_pending_blocks = csv_max_pending_blocks
+        self.export_batch_size = export_batch_size
 
-    async def process_csv_file(self, file: Any) -> tuple[Any, csv.DictReader[str]]:
+    async def process_csv_file(
+        self, file: Any
+    ) -> tuple[str, AsyncIterator[list[dict[str, str]]]]:
         """
         Processes a CSV file, validates its format, and extracts the user ID.
 
+        The file content is not read here: the returned iterator streams the upload
+        in chunks and yields parsed rows in batches of `csv_batch_size`, so memory
+        use does not grow with the file size.
+
+        Args:
+            file (UploadFile): The uploaded CSV file containing glucose data.
+
+        Returns:
+            Tuple[str, AsyncIterator]: user ID and an iterator over batches of CSV rows.
+
+        Raises:
+            WrongFileFormatException: If the uploaded file is not a CSV format.
+        """
+        user_id = self.extract_user_id(file.filename)
+
+        row_batches = iter_csv_row_batches(
+            file,
+            batch_size=self.csv_batch_size,
+            chunk_size=self.csv_read_chunk_size,
+        )
+
+        return user_id, row_batches
+
+    async def parse_csv_file(
+        self, file: Any, stats: IngestStats | None = None
+    ) -> tuple[str, AsyncIterator[list[dict]]]:
+        """
+        Checks an uploaded CSV file and opens a stream of its validated database rows.
+
+        The upload is split into blocks of `csv_batch_size` records. With a
+        `csv_executor`, blocks are parsed and validated in parallel in the executor
+        while the event loop keeps serving other requests; at most
+        `csv_max_pending_blocks` blocks are in flight, and results come back in file
+        order. Without an executor, blocks are parsed inline.
+
+        Rows older than the user's ingest watermark for their serial number are
+        dropped before validation, as they were stored by an earlier upload.
+
         Args:
             file (UploadFile): The uploaded CSV file containing glucose data.
+            stats (IngestStats | None): Counters to update with parsed and skipped
+                rows (optional).
 
         Returns:
-            Tuple[str, csv.DictReader]: user ID and a CSV DictReader object that parses the CSV data.
+            Tuple[str, AsyncIterator]: user ID and an iterator over batches of rows
+            keyed by `UserGlucoseData` column names.
 
         Raises:
             WrongFileFormatException: If the uploaded file is not a CSV format.
         """
+        user_id = self.extract_user_id(file.filename)
+        return user_id, self._parse_csv_blocks(file, user_id, stats)
+
+    async def _parse_csv_blocks(
+        self, file: Any, user_id: str, stats: IngestStats | None
+    ) -> AsyncIterator[list[dict]]:
+        run_stats = stats if stats is not None else IngestStats()
+        watermarks = await self.database_repository.get_ingest_watermarks(user_id)
+        blocks = iter_csv_record_blocks(
+            file,
+            block_size=self.csv_batch_size,
+            chunk_size=self.csv_read_chunk_size,
+        )
+
+        def count(rows: list[dict], skipped: int) -> list[dict]:
+            run_stats.rows_parsed += len(rows)
+            run_stats.rows_skipped += skipped
+            INGEST_ROWS.labels("parsed").inc(len(rows))
+            INGEST_ROWS.labels("skipped").inc(skipped)
+            return rows
+
+        if self.csv_executor is None:
+            async for fieldnames, records in blocks:
+                try:
+                    parsed = parse_csv_block(fieldnames, records, user_id, watermarks)
+                except InvalidCSVDataException:
+                    INGEST_ROWS.labels("rejected").inc()
+                    raise
+                yield count(*parsed)
+            return
+
+        loop = asyncio.get_running_loop()
+        pending: deque[asyncio.Future[tuple[list[dict], int]]] = deque()
+        try:
+            async for fieldnames, records in blocks:
+                pending.append(
+                    loop.run_in_executor(
+                        self.csv_executor,
+                        parse_csv_block,
+                        fieldnames,
+                        records,
+                        user_id,
+                        watermarks,
+                    )
+                )
+                if len(pending) >= self.csv_max_pending_blocks:
+                    yield count(*await pending.popleft())
+
+            while pending:
+                yield count(*await pending.popleft())
+        except InvalidCSVDataException:
+            INGEST_ROWS.labels("rejected").inc()
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+
+    async def hash_csv_file(self, file: Any) -> str:
+        """
+        Computes the SHA-256 of an uploaded file and rewinds it.
+
+        The file is read in chunks of `csv_read_chunk_size` bytes, so this must run
+        before the file is streamed by `parse_csv_file`.
+
+        Args:
+            file (UploadFile): The uploaded CSV file.
+
+        Returns:
+            str: The hex digest of the file content.
+        """
+        digest = hashlib.sha256()
+        while chunk := await file.read(self.csv_read_chunk_size):
+            digest.update(chunk)
+            INGEST_BYTES.inc(len(chunk))
+        await file.seek(0)
+        return digest.hexdigest()
+
+    @staticmethod
+    def extract_user_id(filename: str | None) -> str:
+        """
+        Checks that an uploaded file is a CSV file and extracts the user ID from
+        its name.
+
+        Args:
+            filename (str | None): Name of the uploaded file.
+
+        Returns:
+            str: The user ID.
+
+        Raises:
+            WrongFileFormatException: If the file is not a CSV file.
+        """
         # Check if the file is a valid CSV
-        if file.filename is None or not file.filename.lower().endswith(".csv"):
+        if filename is None or not filename.lower().endswith(".csv"):
             raise WrongFileFormatException
 
         # Extract user_id from the file name
-        user_id = file.filename.removesuffix(".csv")
+        return filename.removesuffix(".csv")
 
-        # Read and decode the file contents
-        contents = await file.read()
-        csv_text = contents.decode("utf-8")
+    @staticmethod
+    def parse_level_fields(value: str) -> list[str]:
+        """
+        Parses a comma-separated sparse fieldset of glucose level fields.
 
-        # Remove the header and any empty line
-        filtered_lines = [
-            line
-            for line in csv_text.splitlines()
-            if line.strip() != "" and "Glukose-Werte" not in line
-        ]
-        csv_data = "\n".join(filtered_lines)  # Rejoin the remaining lines
+        Args:
+            value (str): Field names, e.g. "device_timestamp,glucose_value_history".
+
+        Returns:
+            list[str]: The field names in request order, without duplicates.
+
+        Raises:
+            InvalidFieldsException: If the fieldset is empty or names an unknown
+            field.
+        """
+        fields = list(
+            dict.fromkeys(name.strip() for name in value.split(",") if name.strip())
+        )
+        if not fields:
+            raise InvalidFieldsException("No fields requested")
+        unknown = [name for name in fields if name not in LEVEL_FIELDS]
+        if unknown:
+            raise InvalidFieldsException(f"Unknown fields: {', '.join(unknown)}")
+        return fields
+
+    @staticmethod
+    def validate_csv_rows(rows: list[dict[str, str]]) -> list[GlucoseRecordCSV]:
+        """
+        Validates raw CSV rows into `GlucoseRecordCSV` records.
+
+        Args:
+            rows (list[dict[str, str]]): Rows as produced by `csv.DictReader`.
+
+        Returns:
+            list[GlucoseRecordCSV]: The validated records.
+
+        Raises:
+            InvalidCSVDataException: On the first row that fails validation.
+        """
+        records: list[GlucoseRecordCSV] = []
+        for row in rows:
+            try:
+                records.append(GlucoseRecordCSV(**row))
+            except Exception as e:
+                raise InvalidCSVDataException(str(e))
+        return records
+
+    @staticmethod
+    def decode_csv_rows(rows: list[dict[str, str]], user_id: str) -> list[dict]:
+        """
+        Validates raw CSV rows and converts them into database rows.
 
-        # Parse the CSV data
-        csv_reader = csv.DictReader(StringIO(csv_data))
+        The batch is decoded column by column with NumPy. Batches the columnar
+        decoder does not accept go through `validate_csv_rows` instead, so results
+        and error messages are the same as with the pydantic model.
 
-        return user_id, csv_reader
+        Args:
+            rows (list[dict[str, str]]): Rows as produced by `csv.DictReader`.
+            user_id (str): The ID of the user the rows belong to.
+
+        Returns:
+            list[dict]: Rows keyed by `UserGlucoseData` column names.
+
+        Raises:
+            InvalidCSVDataException: On the first row that fails validation.
+        """
+        columns = decode_glucose_rows(rows)
+        if columns is not None:
+            return columns.to_rows(user_id)
+
+        return [
+            UserGlucoseData.convert_item_to_row(record, user_id)
+            for record in GlucoseDataService.validate_csv_rows(rows)
+        ]
 
-    async def store_glucose_records(self, records: list, user_id: str) -> None:
+    async def store_glucose_records(self, records: list, user_id: str) -> IngestStats:
         """
         Saves a list of glucose records for the specified user.
 
+        Records older than the user's ingest watermark for their serial number are
+        skipped.
+
         Args:
             records (list): A list of parsed glucose records.
             user_id (str): The ID of the user the records belong to.
+
+        Returns:
+            IngestStats: The number of inserted and skipped rows and the insert
+            throughput.
+        """
+        stats = IngestStats(rows_parsed=len(records))
+        watermarks = await self.database_repository.get_ingest_watermarks(user_id)
+        new_records = []
+        for record in records:
+            watermark = watermarks.get(record.Seriennummer)
+            if watermark is None or record.Gerätezeitstempel >= watermark:
+                new_records.append(record)
+        stats.rows_skipped = len(records) - len(new_records)
+        INGEST_ROWS.labels("parsed").inc(len(records))
+        INGEST_ROWS.labels("skipped").inc(stats.rows_skipped)
+
+        async def single_batch() -> AsyncIterator[list[dict]]:
+            yield [
+                UserGlucoseData.convert_item_to_row(record, user_id)
+                for record in new_records
+            ]
+
+        return await self.store_glucose_row_batches(single_batch(), user_id, stats)
+
+    async def store_glucose_row_batches(
+        self,
+        batches: AsyncIterable[list[dict]],
+        user_id: str,
+        stats: IngestStats | None = None,
+        content_hash: str | None = None,
+    ) -> IngestStats:
+        """
+        Saves a stream of database row batches for the specified user in one
+        transaction.
+
+        When `content_hash` is given and a file with the same content was already
+        ingested for the user, the batches are not consumed and nothing is written.
+        Otherwise the upload is recorded together with the rows, and the user's
+        ingest watermarks are raised to the newest stored reading per serial number.
+
+        Args:
+            batches (AsyncIterable[list[dict]]): Batches of rows keyed by
+                `UserGlucoseData` column names.
+            user_id (str): The ID of the user the rows belong to.
+            stats (IngestStats | None): Counters to update while the rows are
+                written, e.g. to report progress (optional).
+            content_hash (str | None): SHA-256 of the uploaded file (optional).
+
+        Returns:
+            IngestStats: The number of inserted rows and the insert throughput.
         """
-        await self.database_repository.save_glucose_records_to_database(
-            records=records, user_id=user_id
+        run_stats = stats if stats is not None else IngestStats()
+
+        upload = None
+        if content_hash is not None:
+            if await self.database_repository.csv_upload_exists(user_id, content_hash):
+                _logger.info(
+                    f"Skipping upload for user_id={user_id}: "
+                    f"file {content_hash} was already ingested"
+                )
+                run_stats.duplicate_upload = True
+                return run_stats
+            upload = CsvUpload(user_id=user_id, content_hash=content_hash)
+
+        started = time.perf_counter()
+
+        def on_batch_saved(row_count: int) -> None:
+            run_stats.rows_inserted += row_count
+
+        rows_before = run_stats.rows_inserted
+        await self.database_repository.save_glucose_row_batches_to_database(
+            batches=self._track_watermarks(batches, user_id),
+            on_batch_saved=on_batch_saved,
+            upload=upload,
+        )
+        # Counted once the rows are committed
+        INGEST_ROWS.labels("inserted").inc(run_stats.rows_inserted - rows_before)
+        run_stats.elapsed_seconds = time.perf_counter() - started
+        _logger.info(
+            f"Inserted {run_stats.rows_inserted} records for user_id={user_id} "
+            f"(skipped {run_stats.rows_skipped} already ingested) "
+            f"in {run_stats.elapsed_seconds:.3f}s "
+            f"({run_stats.rows_per_second:.0f} rows/s)"
         )
+        return run_stats
+
+    async def _track_watermarks(
+        self, batches: AsyncIterable[list[dict]], user_id: str
+    ) -> AsyncIterator[list[dict]]:
+        """
+        Passes batches through and, once the stream is exhausted, raises the ingest
+        watermarks inside the still open insert transaction.
+        """
+        latest: dict[str, datetime] = {}
+        async for rows in batches:
+            for row in rows:
+                serial_number = row["serial_number"]
+                timestamp = row["device_timestamp"]
+                if serial_number not in latest or timestamp > latest[serial_number]:
+                    latest[serial_number] = timestamp
+            yield rows
+
+        await self.database_repository.update_ingest_watermarks(user_id, latest)
+
+    async def get_user_data_version(self, user_id: str) -> UserDataVersion | None:
+        """
+        Retrieves the version of a user's glucose data, which changes with every
+        ingestion for the user.
+
+        Args:
+            user_id (str): The ID of the user.
+
+        Returns:
+            UserDataVersion | None: The version, or None if nothing was ingested for
+            the user yet.
+        """
+        return await self.database_repository.get_user_data_version(user_id)
+
+    async def get_glucose_level_data_version(self, id: int) -> UserDataVersion | None:
+        """
+        Retrieves the data version of the user a glucose level record belongs to.
+
+        Args:
+            id (int): The ID of the glucose level record.
+
+        Returns:
+            UserDataVersion | None: The version, or None if the record doesn't exist.
+        """
+        return await self.database_repository.get_user_data_version_by_level_id(id)
 
     async def get_user_glucose_data(
         self,
@@ -73,6 +477,7 @@ class GlucoseDataService:
         sort: str = "desc",
         limit: int = 100,
         offset: int = 0,
+        cursor: str | None = None,
     ) -> Sequence[UserGlucoseData]:
         """
         Retrieves a paginated list of glucose records for a specific user,
@@ -84,10 +489,15 @@ class GlucoseDataService:
             sort (str): Sort direction, either 'asc' or 'desc'. Defaults to 'desc'.
             limit (int): Maximum number of records to return. Defaults to 100.
             offset (int): Number of records to skip for pagination. Defaults to 0.
+            cursor (str | None): Opaque cursor returned with the previous page.
 
         Returns:
             Sequence[UserGlucoseData]: A list of glucose records matching the criteria.
+
+        Raises:
+            InvalidCursorException: If the cursor cannot be decoded.
         """
+        after = decode_cursor(cursor) if cursor else None
         glucose_levels = (
             await self.database_repository.get_user_glucose_data_from_database(
                 user_id=user_id,
@@ -96,10 +506,324 @@ class GlucoseDataService:
                 sort=sort,
                 limit=limit,
                 offset=offset,
+                after=after,
             )
         )
         return glucose_levels
 
+    async def get_users_glucose_data(
+        self,
+        user_ids: list[str],
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+        limit: int = 100,
+    ) -> dict[str, list[UserGlucoseData]]:
+        """
+        Retrieves the first page of glucose records of several users with one query.
+
+        Args:
+            user_ids (list[str]): The IDs of the users; duplicates are ignored.
+            start (datetime | None): Optional start date for filtering records.
+            end (datetime | None): Optional end date for filtering records.
+            sort (str): Sort direction, either 'asc' or 'desc'. Defaults to 'desc'.
+            limit (int): Maximum number of records per user. Defaults to 100.
+
+        Returns:
+            dict[str, list[UserGlucoseData]]: The records of every user, in the order
+            of `user_ids`; users without records map to an empty list.
+        """
+        levels_by_user: dict[str, list[UserGlucoseData]] = {
+            user_id: [] for user_id in user_ids
+        }
+        levels = await self.database_repository.get_users_glucose_data_from_database(
+            user_ids=list(levels_by_user),
+            start=start,
+            end=end,
+            sort=sort,
+            limit=limit,
+        )
+        for level in levels:
+            levels_by_user[level.user_id].append(level)
+        return levels_by_user
+
+    async def get_user_glucose_rows(
+        self,
+        fields: list[str],
+        user_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+        limit: int = 100,
+        offset: int = 0,
+        cursor: str | None = None,
+    ) -> Sequence[Row]:
+        """
+        Retrieves the same page as `get_user_glucose_data`, with only the requested
+        fields selected from the database and without building ORM objects.
+
+        Args:
+            fields (list[str]): Fields to return, see `parse_level_fields`.
+
+        Returns:
+            Sequence[Row]: The rows, with the requested fields as attributes (and
+            `id` and `device_timestamp` for the pagination cursor).
+
+        Raises:
+            InvalidCursorException: If the cursor cannot be decoded.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        return await self.database_repository.get_user_glucose_rows_from_database(
+            columns=fields,
+            user_id=user_id,
+            start=start,
+            end=end,
+            sort=sort,
+            limit=limit,
+            offset=offset,
+            after=after,
+        )
+
+    async def get_user_glucose_series(
+        self,
+        user_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+        limit: int = 100,
+        offset: int = 0,
+        cursor: str | None = None,
+    ) -> GlucoseSeries:
+        """
+        Retrieves the same page as `get_user_glucose_data` as column arrays of
+        record IDs, timestamps and glucose values, e.g. for binary encoding.
+
+        The value of a record is its history value, or else its scan value.
+
+        Returns:
+            GlucoseSeries: The page, column by column.
+
+        Raises:
+            InvalidCursorException: If the cursor cannot be decoded.
+        """
+        after = decode_cursor(cursor) if cursor else None
+        rows = await self.database_repository.get_user_glucose_columns_from_database(
+            user_id=user_id,
+            start=start,
+            end=end,
+            sort=sort,
+            limit=limit,
+            offset=offset,
+            after=after,
+        )
+        return GlucoseSeries.from_rows(rows)
+
+    async def get_downsampled_glucose_rows(
+        self,
+        fields: list[str],
+        user_id: str,
+        max_points: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+    ) -> Sequence[Row]:
+        """
+        Retrieves at most `max_points` records of a user's glucose curve in a range,
+        picked with LTTB downsampling, e.g. to draw a chart whose payload does not
+        grow with the length of the range.
+
+        All records with a glucose value in the range are fetched with one query of
+        only the requested fields and downsampled with NumPy; the lowest and the
+        highest reading are always kept.
+
+        Args:
+            fields (list[str]): Fields to return, see `parse_level_fields`.
+            max_points (int): Maximum number of records returned, at least 4.
+
+        Returns:
+            Sequence[Row]: The kept rows, with the requested fields, `id`,
+            `device_timestamp` and the glucose `value` as attributes.
+        """
+        rows = await self.database_repository.get_user_glucose_value_rows_from_database(
+            columns=fields, user_id=user_id, start=start, end=end
+        )
+        timestamps = np.array(
+            [row.device_timestamp for row in rows], dtype="datetime64[s]"
+        )
+        values = np.fromiter(
+            (row.value for row in rows), dtype=np.float64, count=len(rows)
+        )
+        indices = lttb_indices(timestamps.astype(np.int64), values, max_points)
+        kept = [rows[index] for index in indices.tolist()]
+        return kept[::-1] if sort == "desc" else kept
+
+    async def get_downsampled_glucose_series(
+        self,
+        user_id: str,
+        max_points: int,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        sort: str = "desc",
+    ) -> GlucoseSeries:
+        """
+        Retrieves the same records as `get_downsampled_glucose_rows` as column
+        arrays of record IDs, timestamps and glucose values.
+        """
+        rows = await self.get_downsampled_glucose_rows(
+            fields=[],
+            user_id=user_id,
+            max_points=max_points,
+            start=start,
+            end=end,
+            sort=sort,
+        )
+        return GlucoseSeries.from_rows(
+            [(row.id, row.device_timestamp, row.value) for row in rows]
+        )
+
+    async def export_glucose_levels(
+        self,
+        user_id: str,
+        export_format: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Streams all glucose records of a user, oldest first, as encoded chunks.
+
+        Records are read from a server-side cursor in batches of
+        `export_batch_size` rows and every batch is encoded into one chunk, so
+        memory use stays constant however long the history is.
+
+        Args:
+            user_id (str): The ID of the user whose glucose data is exported.
+            export_format (str): "ndjson" or "csv".
+            start (datetime | None): Optional start date for filtering records.
+            end (datetime | None): Optional end date for filtering records.
+
+        Yields:
+            bytes: The encoded records; for CSV the first chunk is the header.
+        """
+        columns = [column.name for column in EXPORT_COLUMNS]
+        if export_format == "csv":
+            yield encode_csv_header(columns)
+
+        async for rows in self.database_repository.stream_user_glucose_rows(
+            user_id=user_id,
+            start=start,
+            end=end,
+            batch_size=self.export_batch_size,
+        ):
+            if export_format == "csv":
+                yield encode_csv(rows)
+            else:
+                yield encode_ndjson(columns, rows)
+
+    async def get_glucose_aggregates(
+        self,
+        user_id: str,
+        bucket: str,
+        metrics: list[str],
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> list[dict]:
+        """
+        Computes bucketed statistics of a user's glucose readings.
+
+        The value of a reading is its history value, or else its scan value. Count,
+        mean, min and max are aggregated by the database with GROUP BY, from the
+        coarsest rollup table that covers the buckets and range exactly, or else
+        from the raw readings. Percentiles are not available in MySQL, so when one
+        is requested only the timestamps and values are fetched and every metric is
+        computed with NumPy.
+
+        Args:
+            user_id (str): The ID of the user whose readings are aggregated.
+            bucket (str): Bucket width, one of `BUCKET_MINUTES`.
+            metrics (list[str]): Metrics to compute per bucket.
+            start (datetime | None): Optional start date for filtering records.
+            end (datetime | None): Optional end date for filtering records.
+
+        Returns:
+            list[dict]: One dict per non-empty bucket in ascending order, with the
+            bucket `start` and the requested metrics.
+        """
+        bucket_minutes = BUCKET_MINUTES[bucket]
+
+        if set(metrics) <= SQL_METRICS:
+            rollup = select_rollup(bucket_minutes, start, end)
+            if rollup is not None:
+                rollup_minutes, rollup_start, rollup_end = rollup
+                buckets = (
+                    await self.database_repository.get_glucose_aggregates_from_rollup(
+                        rollup_minutes=rollup_minutes,
+                        user_id=user_id,
+                        bucket_minutes=bucket_minutes,
+                        start=rollup_start,
+                        end=rollup_end,
+                    )
+                )
+            else:
+                buckets = (
+                    await self.database_repository.get_glucose_aggregates_from_database(
+                        user_id=user_id,
+                        bucket_minutes=bucket_minutes,
+                        start=start,
+                        end=end,
+                    )
+                )
+            return [
+                {"start": row["start"], **{metric: row[metric] for metric in metrics}}
+                for row in buckets
+            ]
+
+        timestamps, values = await self._load_glucose_values(user_id, start, end)
+        return aggregate_buckets(timestamps, values, bucket_minutes, metrics)
+
+    async def get_glucose_metrics(
+        self,
+        user_id: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+    ) -> GlucoseMetrics | None:
+        """
+        Computes clinical CGM metrics of a user's sensor readings.
+
+        Only the periodic history values of the sensor are used, as scans would
+        over-weight the times a user checked their glucose. The readings are fetched
+        with one query and every metric is computed with NumPy.
+
+        Args:
+            user_id (str): The ID of the user whose readings are summarized.
+            start (datetime | None): Optional start date for filtering records.
+            end (datetime | None): Optional end date for filtering records.
+
+        Returns:
+            GlucoseMetrics | None: The metrics, or None if there are no readings.
+        """
+        timestamps, values = await self._load_glucose_values(
+            user_id, start, end, sensor_only=True
+        )
+        return compute_glucose_metrics(timestamps, values)
+
+    async def _load_glucose_values(
+        self,
+        user_id: str,
+        start: datetime | None,
+        end: datetime | None,
+        sensor_only: bool = False,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        readings = await self.database_repository.get_glucose_values_from_database(
+            user_id=user_id, start=start, end=end, sensor_only=sensor_only
+        )
+        timestamps = np.array(
+            [timestamp for timestamp, _ in readings], dtype="datetime64[m]"
+        )
+        values = np.fromiter(
+            (value for _, value in readings), dtype=np.float64, count=len(readings)
+        )
+        return timestamps, values
+
     async def get_glucose_level_by_id(self, id: int) -> UserGlucoseData | None:
         """
         Retrieves a single glucose level record by its unique ID.
@@ -114,3 +838,26 @@ class GlucoseDataService:
             await self.database_repository.get_glucose_level_by_id_from_database(id=id)
         )
         return glucose_level
+
+    async def get_glucose_levels_by_ids(
+        self, ids: list[int]
+    ) -> tuple[list[UserGlucoseData], list[int]]:
+        """
+        Retrieves several glucose level records by their IDs at once.
+
+        Args:
+            ids (list[int]): The IDs of the records; duplicates are ignored.
+
+        Returns:
+            tuple[list[UserGlucoseData], list[int]]: The records that exist, and the
+            IDs that don't, both in the order of `ids`.
+        """
+        unique_ids = list(dict.fromkeys(ids))
+        levels = await self.database_repository.get_glucose_levels_by_ids_from_database(
+            ids=unique_ids
+        )
+        levels_by_id = {level.id: level for level in levels}
+        return (
+            [levels_by_id[id] for id in unique_ids if id in levels_by_id],
+            [id for id in unique_ids if id not in levels_by_id],
+        )
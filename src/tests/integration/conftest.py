@@ -73,3 +73,4 @@ async def create_dummpy_glucose_records(test_db_session):
     statement = insert(UserGlucoseData).values(dummy_records)
     await test_db_session.execute(statement)
     await test_db_session.commit()
+    await DatabaseRepository(test_db_session).rebuild_glucose_rollups()
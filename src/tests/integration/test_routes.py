@@ -1,19 +1,32 @@
+import json
+from datetime import datetime
 from io import BytesIO
+from pathlib import Path
 
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
 
 from src.db.main import DatabaseManager
+from src.db.repository import DatabaseRepository
+from src.domain.export import decode_glc1
+from src.domain.pagination import encode_cursor
 from src.tests.integration.helpers import get_session_test, get_settings_test
+from src.webapp.conditional import build_etag
+from src.webapp.dependencies import get_session_factory
 from src.webapp.main import app, get_settings
+from src.webapp.schema import GlucoseLevelFieldsResponse, GlucoseLevelResponse
 
 client = TestClient(app)
 
+SAMPLE_DATA_DIR = Path(__file__).parents[3] / "sample-data"
+
 
 @pytest_asyncio.fixture(scope="class", autouse=True)
 async def override_dependency():
     app.dependency_overrides[DatabaseManager.get_session] = get_session_test
+    app.dependency_overrides[get_session_factory] = lambda: get_session_test
     app.dependency_overrides[get_settings] = get_settings_test
     yield
     app.dependency_overrides = {}
@@ -38,6 +51,44 @@ class TestRoutes:
         assert response.status_code == 400
         assert response.json()["detail"] == "Only CSV files are allowed"
 
+    async def test_ingest_glucose_csv_success(self):
+        content = (
+            SAMPLE_DATA_DIR / "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa.csv"
+        ).read_bytes()
+
+        response = client.post(
+            "/api/v1/upload-csv/",
+            files={
+                "file": (
+                    "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa.csv",
+                    BytesIO(content),
+                    "text/csv",
+                )
+            },
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "status": "Successfully processed 1199 recordes",
+            "inserted": 1199,
+            "skipped": 0,
+        }
+
+    async def test_ingest_glucose_csv_invalid_row(self):
+        content = (
+            "Gerät,Seriennummer,Gerätezeitstempel,Aufzeichnungstyp\n"
+            "FreeStyle LibreLink,1D48A10E,18-02-2021 10:57,0\n"
+            "FreeStyle LibreLink,1D48A10E,not-a-date,0\n"
+        ).encode("utf-8")
+
+        response = client.post(
+            "/api/v1/upload-csv/",
+            files={"file": ("rrrrrrrr.csv", BytesIO(content), "text/csv")},
+        )
+
+        assert response.status_code == 422
+        assert response.json()["detail"].startswith("Invalid CSV data:")
+
     async def test_get_glucose_levels_success(self, create_dummpy_glucose_records):
         response = client.get(
             "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&limit=100&offset=0&sort=desc"
@@ -46,6 +97,111 @@ class TestRoutes:
         assert isinstance(response.json(), list)
         assert len(response.json()) == 5
 
+    async def test_get_glucose_levels_not_modified(
+        self, create_dummpy_glucose_records, test_db_session
+    ):
+        repository = DatabaseRepository(test_db_session)
+        await repository.bump_user_data_versions(
+            ["aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"]
+        )
+        await test_db_session.commit()
+        version = await repository.get_user_data_version(
+            "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+        )
+
+        response = client.get(
+            "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            headers={"If-None-Match": f"W/{build_etag(version)}"},
+        )
+
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["ETag"] == build_etag(version)
+
+    async def test_get_glucose_levels_glc1(self, create_dummpy_glucose_records):
+        response = client.get(
+            "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&limit=2",
+            headers={"Accept": "application/vnd.glucose-data.glc1"},
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/vnd.glucose-data.glc1"
+        assert response.headers["Vary"] == "Accept"
+        timestamps, values = decode_glc1(response.content)
+        assert timestamps.tolist() == [
+            datetime(2021, 2, 18, 11, 57),
+            datetime(2021, 2, 18, 11, 42),
+        ]
+        assert values.tolist() == [75.0, 76.0]
+        assert response.headers["X-Next-Cursor"] == encode_cursor(
+            datetime(2021, 2, 18, 11, 42), 4
+        )
+
+    async def test_get_glucose_levels_with_fields(self, create_dummpy_glucose_records):
+        response = client.get(
+            "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&limit=2"
+            "&sort=asc&fields=device_timestamp,glucose_value_history"
+        )
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"device_timestamp": "2021-02-18T10:57:00", "glucose_value_history": 77},
+            {"device_timestamp": "2021-02-18T11:12:00", "glucose_value_history": 78},
+        ]
+        TypeAdapter(list[GlucoseLevelFieldsResponse]).validate_json(response.content)
+        assert response.headers["X-Next-Cursor"] == encode_cursor(
+            datetime(2021, 2, 18, 11, 12), 2
+        )
+
+    async def test_get_glucose_levels_downsampled(self, create_dummpy_glucose_records):
+        response = client.get(
+            "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&max_points=4"
+            "&sort=asc&fields=device_timestamp,glucose_value_history"
+        )
+
+        assert response.status_code == 200
+        assert response.json() == [
+            {"device_timestamp": "2021-02-18T10:57:00", "glucose_value_history": 77},
+            {"device_timestamp": "2021-02-18T11:12:00", "glucose_value_history": 78},
+            {"device_timestamp": "2021-02-18T11:27:00", "glucose_value_history": 78},
+            {"device_timestamp": "2021-02-18T11:57:00", "glucose_value_history": 75},
+        ]
+        assert "X-Next-Cursor" not in response.headers
+
+    async def test_get_glucose_levels_downsampled_glc1(
+        self, create_dummpy_glucose_records
+    ):
+        response = client.get(
+            "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&max_points=4",
+            headers={"Accept": "application/vnd.glucose-data.glc1"},
+        )
+
+        assert response.status_code == 200
+        timestamps, values = decode_glc1(response.content)
+        assert timestamps.tolist() == [
+            datetime(2021, 2, 18, 11, 57),
+            datetime(2021, 2, 18, 11, 27),
+            datetime(2021, 2, 18, 11, 12),
+            datetime(2021, 2, 18, 10, 57),
+        ]
+        assert values.tolist() == [75.0, 78.0, 78.0, 77.0]
+
+    async def test_get_glucose_levels_invalid_max_points(self):
+        response = client.get(
+            "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&max_points=3"
+        )
+
+        assert response.status_code == 422
+
+    async def test_get_glucose_levels_with_unknown_fields(self):
+        response = client.get(
+            "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+            "&fields=device_timestamp,secret"
+        )
+
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Unknown fields: secret"}
+
     async def test_get_glucose_levels_no_records(self):
         response = client.get(
             "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&limit=100&offset=0&sort=desc"
@@ -62,12 +218,164 @@ class TestRoutes:
         assert isinstance(response.json(), list)
         assert len(response.json()) == 3
 
+    async def test_get_glucose_levels_next_cursor(self, create_dummpy_glucose_records):
+        response = client.get(
+            "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&limit=3&sort=asc"
+        )
+        assert response.status_code == 200
+        assert response.headers["X-Next-Cursor"] == encode_cursor(
+            datetime(2021, 2, 18, 11, 27), 3
+        )
+
+    async def test_get_glucose_levels_cursor_pagination(
+        self, create_dummpy_glucose_records
+    ):
+        cursor = encode_cursor(datetime(2021, 2, 18, 11, 27), 3)
+        response = client.get(
+            f"/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&limit=3&sort=asc&cursor={cursor}"
+        )
+        assert response.status_code == 200
+        assert [level["id"] for level in response.json()] == [4, 5]
+        assert "X-Next-Cursor" not in response.headers
+
+    async def test_get_glucose_levels_invalid_cursor(self):
+        response = client.get(
+            "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&cursor=invalid"
+        )
+        assert response.status_code == 400
+        assert response.json() == {"detail": "Invalid cursor"}
+
     async def test_get_glucose_levels_invalid_limit(self):
         response = client.get(
             "/api/v1/levels/?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa&limit=-1&offset=0&sort=desc"
         )
         assert response.status_code == 422
 
+    async def test_get_glucose_levels_batch(self, create_dummpy_glucose_records):
+        response = client.post(
+            "/api/v1/levels/batch",
+            json={
+                "user_ids": [
+                    "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+                    "nonexistent-user-id",
+                ],
+                "start": "2021-02-18T11:00:00",
+                "limit": 3,
+                "sort": "asc",
+            },
+        )
+
+        assert response.status_code == 200
+        users = response.json()["users"]
+        assert [user["user_id"] for user in users] == [
+            "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            "nonexistent-user-id",
+        ]
+        assert [level["device_timestamp"] for level in users[0]["levels"]] == [
+            "2021-02-18T11:12:00",
+            "2021-02-18T11:27:00",
+            "2021-02-18T11:42:00",
+        ]
+        assert users[1]["levels"] == []
+
+    async def test_get_glucose_levels_batch_without_users(self):
+        response = client.post("/api/v1/levels/batch", json={"user_ids": []})
+
+        assert response.status_code == 422
+
+    async def test_get_glucose_aggregates(self, create_dummpy_glucose_records):
+        response = client.get(
+            "/api/v1/levels/aggregate?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+            "&bucket=1h&metrics=mean&metrics=p50"
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "user_id": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            "bucket": "1h",
+            "buckets": [
+                {"start": "2021-02-18T10:00:00", "mean": 77.0, "p50": 77.0},
+                {"start": "2021-02-18T11:00:00", "mean": 76.75, "p50": 77.0},
+            ],
+        }
+
+    async def test_get_glucose_aggregates_invalid_bucket(self):
+        response = client.get(
+            "/api/v1/levels/aggregate?user_id=aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+            "&bucket=2h"
+        )
+
+        assert response.status_code == 422
+
+    async def test_get_glucose_metrics(self, create_dummpy_glucose_records):
+        response = client.get(
+            "/api/v1/users/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa/metrics"
+            "?start=2021-02-18T11:40:00"
+        )
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "user_id": "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            "start": "2021-02-18T11:40:00",
+            "end": None,
+            "reading_count": 2,
+            "mean": 75.5,
+            "standard_deviation": 0.5,
+            "coefficient_of_variation": pytest.approx(0.5 / 75.5 * 100),
+            "glucose_management_indicator": pytest.approx(3.31 + 0.02392 * 75.5),
+            "time_in_ranges": {
+                "very_low": 0.0,
+                "low": 0.0,
+                "in_range": 100.0,
+                "high": 0.0,
+                "very_high": 0.0,
+            },
+            "agp": [
+                {
+                    "time": "11:40",
+                    "p5": 76.0,
+                    "p25": 76.0,
+                    "p50": 76.0,
+                    "p75": 76.0,
+                    "p95": 76.0,
+                },
+                {
+                    "time": "11:55",
+                    "p5": 75.0,
+                    "p25": 75.0,
+                    "p50": 75.0,
+                    "p75": 75.0,
+                    "p95": 75.0,
+                },
+            ],
+        }
+
+    async def test_get_glucose_metrics_no_records(self):
+        response = client.get(
+            "/api/v1/users/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa/metrics"
+        )
+
+        assert response.status_code == 404
+
+    async def test_export_glucose_levels_ndjson(self, create_dummpy_glucose_records):
+        app.dependency_overrides[get_session_factory] = lambda: get_session_test
+
+        response = client.get(
+            "/api/v1/users/aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa/export?format=ndjson"
+        )
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        records = [json.loads(line) for line in response.text.splitlines()]
+        assert [record["device_timestamp"] for record in records] == [
+            "2021-02-18T10:57:00",
+            "2021-02-18T11:12:00",
+            "2021-02-18T11:27:00",
+            "2021-02-18T11:42:00",
+            "2021-02-18T11:57:00",
+        ]
+        assert records[0]["glucose_value_history"] == 77
+
     async def test_get_glucose_level_by_id_success(self, create_dummpy_glucose_records):
         response = client.get("api/v1/levels/1/")
         assert response.status_code == 200
@@ -96,6 +404,22 @@ class TestRoutes:
             "insulin_change_by_user": None,
         }
 
+    async def test_get_glucose_levels_by_ids(self, create_dummpy_glucose_records):
+        response = client.post("/api/v1/levels/by-ids", json={"ids": [3, 999, 1, 3]})
+
+        assert response.status_code == 200
+        assert [level["id"] for level in response.json()["levels"]] == [3, 1]
+        assert response.json()["levels"][1]["device_timestamp"] == "2021-02-18T10:57:00"
+        assert list(response.json()["levels"][1]) == list(
+            GlucoseLevelResponse.model_fields
+        )
+        assert response.json()["missing_ids"] == [999]
+
+    async def test_get_glucose_levels_by_too_many_ids(self):
+        response = client.post("/api/v1/levels/by-ids", json={"ids": list(range(5001))})
+
+        assert response.status_code == 422
+
     async def test_get_glucose_level_by_id_not_found(self):
         response = client.get("api/v1/levels/999999/")
         assert response.status_code == 404
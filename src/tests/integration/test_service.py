@@ -1,10 +1,23 @@
 from datetime import datetime
 
 import pytest
-from sqlalchemy import select
-
-from src.db.models import UserGlucoseData
-from src.webapp.schema import GlucoseRecordCSV
+import pytest_asyncio
+from sqlalchemy import Select, select, text
+from sqlalchemy.dialects import mysql
+from sqlalchemy.dialects.mysql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import (
+    CsvUpload,
+    GlucoseRollupDaily,
+    GlucoseRollupHourly,
+    UserGlucoseData,
+)
+from src.db.partitions import month_partitions, partition_definitions
+from src.db.repository import DatabaseRepository
+from src.domain.pagination import encode_cursor
+from src.domain.records import GlucoseRecordCSV
+from src.domain.service import GlucoseDataService
 
 
 @pytest.mark.asyncio
@@ -62,6 +75,32 @@ class TestGlucoseDataService:
 
         assert len(glucose_level) == 2
 
+    async def test_store_glucose_records_in_chunks(self, test_db_session):
+        glucose_data_service = GlucoseDataService(
+            DatabaseRepository(test_db_session, insert_chunk_size=2)
+        )
+        dummy_records = [
+            GlucoseRecordCSV(
+                Gerät="FreeStyle LibreLink",
+                Seriennummer="1D48A10E-DDFB-4888-8158-026F08814832",
+                Gerätezeitstempel=f"10-02-2021 10:{minute:02d}",
+                Aufzeichnungstyp=0,
+                Glukosewert_Verlauf_mg_dL=77,
+            )
+            for minute in range(5)
+        ]
+
+        stats = await glucose_data_service.store_glucose_records(
+            records=dummy_records, user_id="rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr"
+        )
+
+        query = select(UserGlucoseData)
+        result = await test_db_session.execute(query)
+        glucose_level = result.scalars().all()
+
+        assert stats.rows_inserted == 5
+        assert len(glucose_level) == 5
+
     async def test_store_empty_glucose_records(
         self, glucose_data_service_test_instance, test_db_session
     ):
@@ -104,6 +143,155 @@ class TestGlucoseDataService:
 
         assert len(glucose_level) == 2
 
+    async def test_store_overlapping_glucose_records_upserts(
+        self, glucose_data_service_test_instance, test_db_session
+    ):
+        def record(notes: str) -> GlucoseRecordCSV:
+            return GlucoseRecordCSV(
+                Gerät="FreeStyle LibreLink",
+                Seriennummer="1D48A10E-DDFB-4888-8158-026F08814832",
+                Gerätezeitstempel="10-02-2021 10:25",
+                Aufzeichnungstyp=0,
+                Notizen=notes,
+            )
+
+        first = await glucose_data_service_test_instance.store_glucose_records(
+            records=[record("before")], user_id="rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr"
+        )
+        second = await glucose_data_service_test_instance.store_glucose_records(
+            records=[record("after")], user_id="rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr"
+        )
+
+        query = select(UserGlucoseData)
+        result = await test_db_session.execute(query)
+        glucose_level = result.scalars().all()
+
+        assert len(glucose_level) == 1
+        assert glucose_level[0].notes == "after"
+        assert (first.rows_inserted, second.rows_inserted) == (1, 0)
+
+    async def test_insert_counts_only_new_readings(self, test_db_session):
+        repository = DatabaseRepository(test_db_session, insert_chunk_size=2)
+
+        def row(minute: int, notes: str | None = None) -> dict:
+            return {
+                "user_id": "rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr",
+                "device": "FreeStyle LibreLink",
+                "serial_number": "1D48A10E-DDFB-4888-8158-026F08814832",
+                "device_timestamp": datetime(2021, 2, 10, 10, minute),
+                "record_type": 0,
+                "notes": notes,
+            }
+
+        stored = await repository.insert_glucose_rows([row(0), row(1)])
+        # Unchanged, updated, new, and new twice across chunks
+        inserted = await repository.insert_glucose_rows(
+            [row(0), row(1, notes="changed"), row(2), row(3), row(2), row(3, "x")]
+        )
+
+        assert (stored, inserted) == (2, 2)
+
+    async def test_store_glucose_records_bumps_data_version(
+        self, glucose_data_service_test_instance
+    ):
+        for timestamp in ["10-02-2021 10:25", "10-02-2021 10:40"]:
+            await glucose_data_service_test_instance.store_glucose_records(
+                records=[
+                    GlucoseRecordCSV(
+                        Gerät="FreeStyle LibreLink",
+                        Seriennummer="1D48A10E-DDFB-4888-8158-026F08814832",
+                        Gerätezeitstempel=timestamp,
+                        Aufzeichnungstyp=0,
+                    )
+                ],
+                user_id="rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr",
+            )
+
+        version = await glucose_data_service_test_instance.get_user_data_version(
+            user_id="rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr"
+        )
+        level_version = (
+            await glucose_data_service_test_instance.get_glucose_level_data_version(
+                id=1
+            )
+        )
+
+        assert version.version == 2
+        assert level_version is version
+
+    async def test_store_skips_records_before_watermark(
+        self, glucose_data_service_test_instance, test_db_session
+    ):
+        def record(timestamp: str) -> GlucoseRecordCSV:
+            return GlucoseRecordCSV(
+                Gerät="FreeStyle LibreLink",
+                Seriennummer="1D48A10E-DDFB-4888-8158-026F08814832",
+                Gerätezeitstempel=timestamp,
+                Aufzeichnungstyp=0,
+            )
+
+        await glucose_data_service_test_instance.store_glucose_records(
+            records=[record("10-02-2021 10:25"), record("10-02-2021 10:40")],
+            user_id="rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr",
+        )
+        stats = await glucose_data_service_test_instance.store_glucose_records(
+            records=[
+                record("10-02-2021 10:25"),
+                record("10-02-2021 10:40"),
+                record("10-02-2021 10:55"),
+            ],
+            user_id="rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr",
+        )
+
+        watermarks = await glucose_data_service_test_instance.database_repository.get_ingest_watermarks(
+            "rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr"
+        )
+        query = select(UserGlucoseData)
+        result = await test_db_session.execute(query)
+        glucose_level = result.scalars().all()
+
+        assert stats.rows_skipped == 1
+        # 10:40 is at the watermark, so it is written again but only updated
+        assert stats.rows_inserted == 1
+        assert len(glucose_level) == 3
+        assert watermarks == {
+            "1D48A10E-DDFB-4888-8158-026F08814832": datetime(2021, 2, 10, 10, 55)
+        }
+
+    async def test_store_identical_upload_is_skipped(
+        self, glucose_data_service_test_instance, test_db_session
+    ):
+        rows = [
+            {
+                "user_id": "rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr",
+                "device": "FreeStyle LibreLink",
+                "serial_number": "1D48A10E-DDFB-4888-8158-026F08814832",
+                "device_timestamp": datetime(2021, 2, 10, 10, 25),
+                "record_type": 0,
+                "glucose_value_history": 77,
+            }
+        ]
+
+        async def batches():
+            yield rows
+
+        first = await glucose_data_service_test_instance.store_glucose_row_batches(
+            batches(), "rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr", content_hash="a" * 64
+        )
+        second = await glucose_data_service_test_instance.store_glucose_row_batches(
+            batches(), "rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr", content_hash="a" * 64
+        )
+
+        uploads = (await test_db_session.execute(select(CsvUpload))).scalars().all()
+
+        assert not first.duplicate_upload
+        assert first.rows_inserted == 1
+        assert second.duplicate_upload
+        assert second.rows_inserted == 0
+        assert [(upload.content_hash, upload.row_count) for upload in uploads] == [
+            ("a" * 64, 1)
+        ]
+
     async def test_get_user_glucose_data_success(
         self, glucose_data_service_test_instance, create_dummpy_glucose_records
     ):
@@ -185,6 +373,243 @@ class TestGlucoseDataService:
         # Making sure the returned ids are unique
         assert page_1_ids.isdisjoint(page_2_ids)
 
+    async def test_get_user_glucose_data_cursor_pagination(
+        self, glucose_data_service_test_instance, create_dummpy_glucose_records
+    ):
+        page_1 = await glucose_data_service_test_instance.get_user_glucose_data(
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa", sort="asc", limit=3
+        )
+        cursor = encode_cursor(page_1[-1].device_timestamp, page_1[-1].id)
+
+        page_2 = await glucose_data_service_test_instance.get_user_glucose_data(
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            sort="asc",
+            limit=3,
+            cursor=cursor,
+        )
+
+        assert len(page_2) == 2
+        assert page_1[-1].device_timestamp < page_2[0].device_timestamp
+        assert {level.id for level in page_1}.isdisjoint({level.id for level in page_2})
+
+    async def test_get_user_glucose_data_cursor_pagination_desc(
+        self, glucose_data_service_test_instance, create_dummpy_glucose_records
+    ):
+        page_1 = await glucose_data_service_test_instance.get_user_glucose_data(
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa", sort="desc", limit=4
+        )
+        cursor = encode_cursor(page_1[-1].device_timestamp, page_1[-1].id)
+
+        page_2 = await glucose_data_service_test_instance.get_user_glucose_data(
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            sort="desc",
+            limit=4,
+            cursor=cursor,
+        )
+
+        assert len(page_2) == 1
+        assert page_2[0].device_timestamp == datetime(2021, 2, 18, 10, 57)
+
+    async def test_get_users_glucose_data(
+        self, glucose_data_service_test_instance, create_dummpy_glucose_records
+    ):
+        await glucose_data_service_test_instance.store_glucose_records(
+            records=[
+                GlucoseRecordCSV(
+                    Gerät="FreeStyle LibreLink",
+                    Seriennummer="1D48A10E-DDFB-4888-8158-026F08814832",
+                    Gerätezeitstempel="10-02-2021 10:25",
+                    Aufzeichnungstyp=0,
+                ),
+            ],
+            user_id="rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr",
+        )
+
+        levels_by_user = (
+            await glucose_data_service_test_instance.get_users_glucose_data(
+                user_ids=[
+                    "rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr",
+                    "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+                    "nonexistent-user-id",
+                    "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+                ],
+                sort="desc",
+                limit=2,
+            )
+        )
+
+        assert list(levels_by_user) == [
+            "rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr",
+            "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            "nonexistent-user-id",
+        ]
+        assert [
+            level.device_timestamp
+            for level in levels_by_user["rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr"]
+        ] == [datetime(2021, 2, 10, 10, 25)]
+        assert [
+            level.device_timestamp
+            for level in levels_by_user["aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"]
+        ] == [datetime(2021, 2, 18, 11, 57), datetime(2021, 2, 18, 11, 42)]
+        assert levels_by_user["nonexistent-user-id"] == []
+
+    async def test_get_glucose_aggregates_in_sql(
+        self,
+        glucose_data_service_test_instance,
+        create_dummpy_glucose_records,
+    ):
+        buckets = await glucose_data_service_test_instance.get_glucose_aggregates(
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            bucket="1h",
+            metrics=["count", "mean", "min", "max"],
+        )
+
+        assert buckets == [
+            {
+                "start": datetime(2021, 2, 18, 10),
+                "count": 1,
+                "mean": 77.0,
+                "min": 77.0,
+                "max": 77.0,
+            },
+            {
+                "start": datetime(2021, 2, 18, 11),
+                "count": 4,
+                "mean": 76.75,
+                "min": 75.0,
+                "max": 78.0,
+            },
+        ]
+
+    async def test_get_glucose_aggregates_with_percentiles(
+        self,
+        glucose_data_service_test_instance,
+        create_dummpy_glucose_records,
+    ):
+        buckets = await glucose_data_service_test_instance.get_glucose_aggregates(
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            bucket="1d",
+            metrics=["mean", "p50"],
+            start=datetime(2021, 2, 18, 11),
+        )
+
+        assert buckets == [
+            {"start": datetime(2021, 2, 18), "mean": 76.75, "p50": 77.0},
+        ]
+
+    async def test_get_glucose_metrics(
+        self,
+        glucose_data_service_test_instance,
+        create_dummpy_glucose_records,
+    ):
+        metrics = await glucose_data_service_test_instance.get_glucose_metrics(
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            start=datetime(2021, 2, 18, 11),
+        )
+
+        assert metrics.reading_count == 4
+        assert metrics.mean == 76.75
+        assert metrics.time_in_ranges["in_range"] == 100.0
+        assert [row["time"] for row in metrics.agp] == [
+            "11:10",
+            "11:25",
+            "11:40",
+            "11:55",
+        ]
+
+    async def test_get_glucose_metrics_no_records(
+        self, glucose_data_service_test_instance
+    ):
+        metrics = await glucose_data_service_test_instance.get_glucose_metrics(
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+        )
+
+        assert metrics is None
+
+    async def test_store_glucose_records_refreshes_rollups(
+        self, glucose_data_service_test_instance, test_db_session
+    ):
+        def record(timestamp: str, value: int) -> GlucoseRecordCSV:
+            return GlucoseRecordCSV(
+                **{
+                    "Gerät": "FreeStyle LibreLink",
+                    "Seriennummer": "1D48A10E-DDFB-4888-8158-026F08814832",
+                    "Gerätezeitstempel": timestamp,
+                    "Aufzeichnungstyp": 0,
+                    "Glukosewert-Verlauf mg/dL": value,
+                }
+            )
+
+        await glucose_data_service_test_instance.store_glucose_records(
+            records=[record("10-02-2021 10:25", 60), record("10-02-2021 10:40", 200)],
+            user_id="rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr",
+        )
+        # Overlapping upload: 10:40 is upserted and must not be counted twice
+        await glucose_data_service_test_instance.store_glucose_records(
+            records=[record("10-02-2021 10:40", 100), record("10-02-2021 11:10", 120)],
+            user_id="rrrrrrrr-rrrr-rrrr-rrrr-rrrrrrrrrrrr",
+        )
+
+        hourly = (
+            (
+                await test_db_session.execute(
+                    select(GlucoseRollupHourly).order_by(
+                        GlucoseRollupHourly.bucket_start
+                    )
+                )
+            )
+            .scalars()
+            .all()
+        )
+        daily = (
+            (await test_db_session.execute(select(GlucoseRollupDaily))).scalars().all()
+        )
+
+        assert [
+            (
+                row.bucket_start,
+                row.reading_count,
+                row.value_sum,
+                row.value_sum_squares,
+                row.value_min,
+                row.value_max,
+                row.below_range_count,
+                row.in_range_count,
+                row.above_range_count,
+            )
+            for row in hourly
+        ] == [
+            (datetime(2021, 2, 10, 10), 2, 160.0, 13600.0, 60.0, 100.0, 1, 1, 0),
+            (datetime(2021, 2, 10, 11), 1, 120.0, 14400.0, 120.0, 120.0, 0, 1, 0),
+        ]
+        assert [(row.bucket_start, row.reading_count) for row in daily] == [
+            (datetime(2021, 2, 10), 3)
+        ]
+
+    async def test_get_glucose_aggregates_from_rollup_matches_raw(
+        self,
+        glucose_data_service_test_instance,
+        create_dummpy_glucose_records,
+    ):
+        repository = glucose_data_service_test_instance.database_repository
+
+        from_rollup = await repository.get_glucose_aggregates_from_rollup(
+            rollup_minutes=24 * 60,
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            bucket_minutes=7 * 24 * 60,
+            start=datetime(2021, 2, 15),
+            end=datetime(2021, 2, 22),
+        )
+        from_raw = await repository.get_glucose_aggregates_from_database(
+            user_id="aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa",
+            bucket_minutes=7 * 24 * 60,
+            start=datetime(2021, 2, 15),
+            end=datetime(2021, 2, 21, 23, 59),
+        )
+
+        assert from_rollup == from_raw
+        assert from_rollup[0]["count"] == 5
+
     async def test_get_glucose_level_by_id_success(
         self, glucose_data_service_test_instance, create_dummpy_glucose_records
     ):
@@ -204,3 +629,89 @@ class TestGlucoseDataService:
         )
 
         assert glucose_level is None
+
+
+@pytest.mark.asyncio
+class TestPartitionPruning:
+    """
+    Runs `EXPLAIN` on the repository's page queries against `user_glucose_data`
+    partitioned by month like the partitioning migration does.
+    """
+
+    USER_ID = "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+
+    @pytest_asyncio.fixture(autouse=True)
+    async def partitioned_table(self, test_db_session):
+        partitions = month_partitions(datetime(2024, 1, 1), datetime(2024, 5, 1))
+        await test_db_session.execute(
+            text(
+                "ALTER TABLE user_glucose_data "
+                "PARTITION BY RANGE COLUMNS (device_timestamp) "
+                f"({partition_definitions(partitions)})"
+            )
+        )
+        await test_db_session.execute(
+            insert(UserGlucoseData).values(
+                [
+                    {
+                        "user_id": self.USER_ID,
+                        "device": "FreeStyle LibreLink",
+                        "serial_number": "1D48A10E-DDFB-4888-8158-026F08814832",
+                        "device_timestamp": datetime(2024, month, 15, 12, 0),
+                        "record_type": 0,
+                        "glucose_value_history": 100 + month,
+                    }
+                    for month in range(1, 7)
+                ]
+            )
+        )
+        await test_db_session.commit()
+
+    def page(self, **kwargs) -> Select:
+        return DatabaseRepository._user_glucose_data_query(
+            select(UserGlucoseData),
+            self.USER_ID,
+            start=kwargs.get("start"),
+            end=kwargs.get("end"),
+            sort=kwargs.get("sort", "desc"),
+            limit=100,
+            offset=0,
+            after=kwargs.get("after"),
+        )
+
+    @staticmethod
+    async def explain_partitions(session: AsyncSession, query: Select) -> list[str]:
+        sql = query.compile(
+            dialect=mysql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+        connection = await session.connection()
+        plan = (await connection.exec_driver_sql(f"EXPLAIN {sql}")).mappings().one()
+        return plan["partitions"].split(",")
+
+    async def test_range_page_reads_only_its_months(self, test_db_session):
+        query = self.page(start=datetime(2024, 2, 10), end=datetime(2024, 3, 5))
+
+        partitions = await self.explain_partitions(test_db_session, query)
+
+        assert partitions == ["p202402", "p202403"]
+
+    async def test_cursor_page_reads_only_older_months(self, test_db_session):
+        query = self.page(
+            start=datetime(2024, 3, 1), after=(datetime(2024, 4, 15, 12, 0), 4)
+        )
+
+        partitions = await self.explain_partitions(test_db_session, query)
+
+        assert partitions == ["p202403", "p202404"]
+
+    async def test_unbounded_page_reads_every_partition(self, test_db_session):
+        partitions = await self.explain_partitions(test_db_session, self.page())
+
+        assert partitions == [
+            "p202401",
+            "p202402",
+            "p202403",
+            "p202404",
+            "p202405",
+            "p_future",
+        ]
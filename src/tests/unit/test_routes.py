@@ -1,12 +1,23 @@
-from unittest.mock import MagicMock
+from io import BytesIO
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
 import pytest_asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.main import DatabaseManager
+from src.db.main import DatabaseManager, PoolStatus, PoolWaitStats
+from src.domain.cache import QueryCache
+from src.domain.exceptions import IngestQueueFullException
+from src.domain.jobs import IngestJob, IngestJobManager
+from src.webapp.dependencies import (
+    get_ingest_job_manager,
+    get_pool_status,
+    get_query_cache,
+    get_session_factory,
+)
 from src.webapp.main import app, get_settings
+from src.webapp.schema import GlucoseLevelResponse
 from src.webapp.settings import Settings
 
 client = TestClient(app)
@@ -30,6 +41,7 @@ def get_settings_test():
 @pytest_asyncio.fixture(scope="class", autouse=True)
 async def override_dependency():
     app.dependency_overrides[DatabaseManager.get_session] = get_mock_session_test
+    app.dependency_overrides[get_session_factory] = lambda: get_mock_session_test
     app.dependency_overrides[get_settings] = get_settings_test
     yield
     app.dependency_overrides = {}
@@ -59,3 +71,155 @@ class TestRoutes:
         mock_check_db_connection.assert_called_once()
         assert response.status_code == 500
         assert response.json() == {"detail": "Database connection failed"}
+
+    async def test_levels_schema_declares_sparse_fieldsets(self):
+        openapi = app.openapi()
+        content = openapi["paths"]["/api/v1/levels/"]["get"]["responses"]["200"][
+            "content"
+        ]
+
+        assert [
+            schema["items"]["$ref"]
+            for schema in content["application/json"]["schema"]["anyOf"]
+        ] == [
+            "#/components/schemas/GlucoseLevelResponse",
+            "#/components/schemas/GlucoseLevelFieldsResponse",
+        ]
+        sparse = openapi["components"]["schemas"]["GlucoseLevelFieldsResponse"]
+        assert "required" not in sparse
+        assert list(sparse["properties"]) == list(GlucoseLevelResponse.model_fields)
+
+    async def test_metrics(self, mocker):
+        mocker.patch("src.webapp.main.check_db_connection", return_value=True)
+        client.get("/api/v1/health")
+
+        response = client.get("/metrics")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert (
+            'http_request_duration_seconds_count{method="GET",'
+            'route="/api/v1/health",status="200"}'
+        ) in response.text
+
+    async def test_ingest_glucose_csv_background(self):
+        job = IngestJob(id="job-1", user_id="rrrrrrrr", filename="rrrrrrrr.csv")
+        job_manager = MagicMock(spec=IngestJobManager)
+        job_manager.submit = AsyncMock(return_value=job)
+        app.dependency_overrides[get_ingest_job_manager] = lambda: job_manager
+
+        response = client.post(
+            "/api/v1/upload-csv/?background=true",
+            files={"file": ("rrrrrrrr.csv", BytesIO(b"a,b\n"), "text/csv")},
+        )
+
+        job_manager.submit.assert_awaited_once()
+        assert response.status_code == 202
+        assert response.json() == {"job_id": "job-1", "status": "queued"}
+
+    async def test_ingest_glucose_csv_background_queue_full(self):
+        job_manager = MagicMock(spec=IngestJobManager)
+        job_manager.submit = AsyncMock(side_effect=IngestQueueFullException("full"))
+        app.dependency_overrides[get_ingest_job_manager] = lambda: job_manager
+
+        response = client.post(
+            "/api/v1/upload-csv/?background=true",
+            files={"file": ("rrrrrrrr.csv", BytesIO(b"a,b\n"), "text/csv")},
+        )
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "60"
+
+    async def test_ingest_glucose_csv_background_wrong_file_format(self):
+        job_manager = MagicMock(spec=IngestJobManager)
+        app.dependency_overrides[get_ingest_job_manager] = lambda: job_manager
+
+        response = client.post(
+            "/api/v1/upload-csv/?background=true",
+            files={"file": ("test.json", BytesIO(b"{}"), "application/json")},
+        )
+
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Only CSV files are allowed"
+
+    async def test_get_ingest_job(self):
+        job = IngestJob(id="job-1", user_id="rrrrrrrr", filename="rrrrrrrr.csv")
+        job_manager = MagicMock(spec=IngestJobManager)
+        job_manager.get.return_value = job
+        app.dependency_overrides[get_ingest_job_manager] = lambda: job_manager
+
+        response = client.get("/api/v1/jobs/job-1")
+
+        assert response.status_code == 200
+        assert response.json()["status"] == "queued"
+        assert response.json()["rows_inserted"] == 0
+
+    async def test_get_ingest_job_not_found(self):
+        job_manager = MagicMock(spec=IngestJobManager)
+        job_manager.get.return_value = None
+        app.dependency_overrides[get_ingest_job_manager] = lambda: job_manager
+
+        response = client.get("/api/v1/jobs/unknown")
+
+        assert response.status_code == 404
+        assert response.json() == {"detail": "Job with ID=unknown not found."}
+
+    async def test_get_cache_stats(self):
+        query_cache = QueryCache(max_rows=10)
+        query_cache.get("missing")
+        app.dependency_overrides[get_query_cache] = lambda: query_cache
+
+        response = client.get("/api/v1/internal/cache")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "hits": 0,
+            "misses": 1,
+            "evictions": 0,
+            "invalidations": 0,
+            "entries": 0,
+            "rows": 0,
+            "max_rows": 10,
+        }
+
+    async def test_get_cache_stats_disabled(self):
+        app.dependency_overrides[get_query_cache] = lambda: None
+
+        response = client.get("/api/v1/internal/cache")
+
+        assert response.status_code == 404
+
+    async def test_get_pool_stats(self):
+        pool_status = PoolStatus(
+            size=10,
+            max_overflow=20,
+            checked_out=3,
+            idle=7,
+            overflow=0,
+            wait=PoolWaitStats(acquisitions=12, wait_seconds_total=0.5),
+        )
+        app.dependency_overrides[get_pool_status] = lambda: pool_status
+
+        response = client.get("/api/v1/internal/pool")
+
+        assert response.status_code == 200
+        assert response.json() == {
+            "size": 10,
+            "max_overflow": 20,
+            "checked_out": 3,
+            "idle": 7,
+            "overflow": 0,
+            "wait": {
+                "acquisitions": 12,
+                "timeouts": 0,
+                "wait_seconds_total": 0.5,
+                "wait_seconds_max": 0.0,
+            },
+        }
+
+    async def test_get_pool_stats_without_engine(self):
+        app.dependency_overrides[get_pool_status] = lambda: None
+
+        response = client.get("/api/v1/internal/pool")
+
+        assert response.status_code == 404
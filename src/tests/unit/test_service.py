@@ -1,6 +1,1188 @@
+import asyncio
+import csv
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from io import BytesIO, StringIO
+from pathlib import Path
+
+import numpy as np
 import pytest
+from fastapi.responses import JSONResponse
+from prometheus_client import REGISTRY
+from pydantic import TypeAdapter, ValidationError
+from sqlalchemy.engine import result_tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.db.models import UserDataVersion, UserGlucoseData
+from src.db.repository import EXPORT_COLUMNS, DatabaseRepository
+from src.domain.aggregation import (
+    BUCKET_MINUTES,
+    PERCENTILES,
+    aggregate_buckets,
+    select_rollup,
+)
+from src.domain.cache import CachingGlucoseDataService, QueryCache
+from src.domain.columnar import decode_glucose_rows, drop_ingested_rows
+from src.domain.downsampling import lttb_indices
+from src.domain.exceptions import (
+    IngestQueueFullException,
+    InvalidCSVDataException,
+    InvalidFieldsException,
+)
+from src.domain.export import (
+    GlucoseSeries,
+    decode_glc1,
+    encode_glc1,
+    encode_levels_json,
+)
+from src.domain.ingest import IngestStats
+from src.domain.jobs import IngestJobManager, JobStatus
+from src.domain.metrics import compute_glucose_metrics
+from src.domain.records import GlucoseRecordCSV
+from src.domain.service import GlucoseDataService
+from src.webapp.schema import GlucoseLevelFieldsResponse, GlucoseLevelResponse
+
+SAMPLE_DATA_DIR = Path(__file__).parents[3] / "sample-data"
+
+USER_ID = "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa"
+
+HEADER = "Gerät,Seriennummer,Gerätezeitstempel,Aufzeichnungstyp,Glukosewert-Verlauf mg/dL,Notizen"
+
+
+def read_sample_rows(file_name: str) -> list[dict]:
+    lines = [
+        line
+        for line in (SAMPLE_DATA_DIR / file_name).read_text("utf-8").splitlines()
+        if line.strip() != "" and "Glukose-Werte" not in line
+    ]
+    return list(csv.DictReader(StringIO("\n".join(lines))))
+
+
+def parse_rows(*lines: str) -> list[dict]:
+    return list(csv.DictReader(StringIO("\n".join([HEADER, *lines]))))
+
+
+def reference_rows(rows: list[dict]) -> list[dict]:
+    return [
+        UserGlucoseData.convert_item_to_row(GlucoseRecordCSV(**row), USER_ID)
+        for row in rows
+    ]
+
+
+def reference_error(rows: list[dict]) -> str:
+    with pytest.raises(InvalidCSVDataException) as exc_info:
+        GlucoseDataService.validate_csv_rows(rows)
+    return str(exc_info.value)
 
 
 @pytest.mark.asyncio
 class TestGlucoseDataService:
-    pass
+
+    @pytest.mark.parametrize(
+        "file_name",
+        [
+            "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa.csv",
+            "bbbbbbbb-bbbb-bbbb-bbbb-bbbbbbbbbbbb.csv",
+            "cccccccc-cccc-cccc-cccc-cccccccccccc.csv",
+        ],
+    )
+    async def test_columnar_decoder_matches_pydantic(self, file_name):
+        rows = read_sample_rows(file_name)
+
+        columns = decode_glucose_rows(rows)
+
+        assert columns is not None
+        assert columns.to_rows(USER_ID) == reference_rows(rows)
+
+    async def test_columnar_decoder_edge_values(self):
+        rows = parse_rows(
+            "Libre,1D48,29-02-2024 00:00,1,,",
+            "Libre,1D48,31-12-2021 23:59,0,007,some note",
+        )
+
+        columns = decode_glucose_rows(rows)
+
+        assert columns is not None
+        assert columns.to_rows(USER_ID) == reference_rows(rows)
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "Libre,1D48,1-2-2021 3:04,0,77,",
+            "Libre,1D48,18-02-2021 10:57,+1,77,",
+            "Libre,1D48,18-02-2021 10:57,0, 77,",
+        ],
+    )
+    async def test_columnar_decoder_falls_back_on_lax_values(self, line):
+        rows = parse_rows(line)
+
+        assert decode_glucose_rows(rows) is None
+        assert GlucoseDataService.decode_csv_rows(rows, USER_ID) == reference_rows(rows)
+
+    @pytest.mark.parametrize(
+        "line",
+        [
+            "Libre,1D48,30-02-2021 10:00,0,77,",
+            "Libre,1D48,18-02-2021 24:00,0,77,",
+            "Libre,1D48,18-02-2021 10:57,x,77,",
+            "Libre,1D48,18-02-2021 10:57,0,7.5,",
+            "Libre,1D48,18-02-2021 10:57,0,٣,",
+            "Libre,1D48",
+            "Libre,1D48,18-02-2021 10:57,0,77,,unexpected",
+        ],
+    )
+    async def test_decode_csv_rows_reports_same_error_as_pydantic(self, line):
+        rows = parse_rows(
+            "Libre,1D48,18-02-2021 10:42,0,76,",
+            line,
+            "Libre,1D48,18-02-2021 11:12,0,78,",
+        )
+
+        with pytest.raises(InvalidCSVDataException) as exc_info:
+            GlucoseDataService.decode_csv_rows(rows, USER_ID)
+
+        assert str(exc_info.value) == reference_error(rows)
+
+
+async def collect_batches(batches) -> list[list[dict]]:
+    return [rows async for rows in batches]
+
+
+@pytest.fixture
+def repository(mocker):
+    repository = mocker.MagicMock(spec=DatabaseRepository)
+    repository.get_ingest_watermarks.return_value = {}
+    repository.csv_upload_exists.return_value = False
+    repository.with_primary_reads.return_value = repository
+    return repository
+
+
+@pytest.fixture(scope="module")
+def executor():
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        yield executor
+
+
+@pytest.mark.asyncio
+class TestReadWriteSplit:
+
+    async def test_queries_use_read_session(self, mock_db_session, mocker):
+        read_session = mocker.MagicMock(spec=AsyncSession)
+        for session in (mock_db_session, read_session):
+            session.execute.return_value = mocker.MagicMock()
+        repository = DatabaseRepository(mock_db_session, read_session=read_session)
+
+        await repository.get_glucose_level_by_id_from_database(1)
+        await repository.get_user_data_version(USER_ID)
+
+        assert read_session.execute.await_count == 2
+        mock_db_session.execute.assert_not_called()
+
+    async def test_lookup_by_ids_in_chunks(self, mock_db_session, mocker):
+        mock_db_session.execute.return_value = mocker.MagicMock()
+        repository = DatabaseRepository(mock_db_session, lookup_chunk_size=2)
+
+        await repository.get_glucose_levels_by_ids_from_database([1, 2, 3, 4, 5])
+
+        assert mock_db_session.execute.await_count == 3
+
+    async def test_primary_reads(self, mock_db_session, mocker):
+        read_session = mocker.MagicMock(spec=AsyncSession)
+        mock_db_session.execute.return_value = mocker.MagicMock()
+        repository = DatabaseRepository(mock_db_session, read_session=read_session)
+
+        primary = repository.with_primary_reads()
+        await primary.get_glucose_level_by_id_from_database(1)
+
+        mock_db_session.execute.assert_awaited_once()
+        read_session.execute.assert_not_called()
+        assert repository.read_session is read_session
+
+    async def test_read_session_is_opened_on_first_query(self, mock_db_session, mocker):
+        read_session = mocker.MagicMock(spec=AsyncSession)
+        for session in (mock_db_session, read_session):
+            session.execute.return_value = mocker.MagicMock()
+        opened, closed = [], []
+
+        async def read_session_factory():
+            opened.append(read_session)
+            try:
+                yield read_session
+            finally:
+                closed.append(read_session)
+
+        repository = DatabaseRepository(
+            mock_db_session, read_session_factory=read_session_factory
+        )
+        await repository.get_ingest_watermarks(USER_ID)
+        assert opened == []
+
+        await repository.get_glucose_level_by_id_from_database(1)
+        await repository.get_user_data_version(USER_ID)
+        await repository.close()
+
+        assert opened == closed == [read_session]
+        assert read_session.execute.await_count == 2
+
+    async def test_ingestion_reads_use_primary_session(self, mock_db_session, mocker):
+        read_session = mocker.MagicMock(spec=AsyncSession)
+        for session in (mock_db_session, read_session):
+            session.execute.return_value = mocker.MagicMock()
+        repository = DatabaseRepository(mock_db_session, read_session=read_session)
+
+        await repository.get_ingest_watermarks(USER_ID)
+        await repository.csv_upload_exists(USER_ID, "hash")
+
+        assert mock_db_session.execute.await_count == 2
+        read_session.execute.assert_not_called()
+
+
+@pytest.mark.asyncio
+class TestParallelCSVParsing:
+
+    async def test_parallel_parsing_keeps_file_order(self, repository, executor):
+        file_name = "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa.csv"
+        content = (SAMPLE_DATA_DIR / file_name).read_bytes()
+
+        inline_service = GlucoseDataService(repository, csv_batch_size=100)
+        _, inline_batches = await inline_service.parse_csv_file(
+            UploadStub(file_name, content)
+        )
+        parallel_service = GlucoseDataService(
+            repository,
+            csv_batch_size=100,
+            csv_executor=executor,
+            csv_max_pending_blocks=3,
+        )
+        user_id, parallel_batches = await parallel_service.parse_csv_file(
+            UploadStub(file_name, content)
+        )
+
+        expected = await collect_batches(inline_batches)
+        assert user_id == USER_ID
+        assert await collect_batches(parallel_batches) == expected
+        assert [row for rows in expected for row in rows] == reference_rows(
+            read_sample_rows(file_name)
+        )
+
+    async def test_parallel_parsing_reports_invalid_rows(self, repository, executor):
+        content = "\n".join(
+            [HEADER, *["Libre,1D48,18-02-2021 10:57,0,77,"] * 5, "Libre,1D48,x,0,77,"]
+        ).encode("utf-8")
+        service = GlucoseDataService(
+            repository,
+            csv_batch_size=2,
+            csv_executor=executor,
+        )
+        _, batches = await service.parse_csv_file(UploadStub("user.csv", content))
+
+        received = []
+        with pytest.raises(InvalidCSVDataException):
+            async for rows in batches:
+                received.append(rows)
+        assert [len(rows) for rows in received] == [2, 2]
+
+
+@pytest.mark.asyncio
+class TestUploadHash:
+
+    async def test_hash_csv_file_rewinds_file(self, repository):
+        service = GlucoseDataService(repository, csv_read_chunk_size=4)
+        upload = UploadStub("user.csv", b"same content")
+
+        content_hash = await service.hash_csv_file(upload)
+
+        assert content_hash == hashlib.sha256(b"same content").hexdigest()
+        assert await upload.read() == b"same content"
+
+
+@pytest.mark.asyncio
+class TestIngestWatermark:
+
+    @pytest.mark.parametrize("parallel", [False, True])
+    async def test_rows_before_watermark_are_skipped(
+        self, repository, executor, parallel
+    ):
+        repository.get_ingest_watermarks.return_value = {
+            "1D48": datetime(2021, 2, 18, 10, 57)
+        }
+        content = "\n".join(
+            [
+                HEADER,
+                "Libre,1D48,18-02-2021 10:42,0,76,",
+                "Libre,1D48,18-02-2021 10:57,0,77,",
+                "Libre,1D48,18-02-2021 11:12,0,78,",
+                "Libre,9F00,18-02-2021 10:42,0,79,",
+            ]
+        ).encode("utf-8")
+        service = GlucoseDataService(
+            repository, csv_executor=executor if parallel else None
+        )
+        stats = IngestStats()
+
+        _, batches = await service.parse_csv_file(
+            UploadStub("user.csv", content), stats
+        )
+        rows = [row for rows in await collect_batches(batches) for row in rows]
+
+        assert [row["glucose_value_history"] for row in rows] == [77, 78, 79]
+        assert stats.rows_parsed == 3
+        assert stats.rows_skipped == 1
+
+    async def test_unreadable_timestamps_are_left_to_validation(self):
+        rows = parse_rows(
+            "Libre,1D48,18-02-2021 10:42,0,76,", "Libre,1D48,not-a-date,0,77,"
+        )
+
+        kept, skipped = drop_ingested_rows(
+            rows, {"1D48": datetime(2021, 2, 18, 10, 57)}
+        )
+
+        assert kept == rows[1:]
+        assert skipped == 1
+
+    async def test_store_raises_watermarks(self, repository):
+        async def save_batches(batches, on_batch_saved=None, upload=None):
+            async for rows in batches:
+                on_batch_saved(len(rows))
+
+        repository.save_glucose_row_batches_to_database.side_effect = save_batches
+        rows = reference_rows(
+            parse_rows(
+                "Libre,1D48,18-02-2021 11:12,0,78,",
+                "Libre,1D48,18-02-2021 10:57,0,77,",
+            )
+        )
+
+        async def batches():
+            yield rows
+
+        stats = await GlucoseDataService(repository).store_glucose_row_batches(
+            batches(), USER_ID
+        )
+
+        assert stats.rows_inserted == 2
+        repository.update_ingest_watermarks.assert_awaited_once_with(
+            USER_ID, {"1D48": datetime(2021, 2, 18, 11, 12)}
+        )
+
+
+def ingest_rows(outcome: str) -> float:
+    labels = {"outcome": outcome}
+    return REGISTRY.get_sample_value("glucose_ingest_rows_total", labels) or 0.0
+
+
+@pytest.mark.asyncio
+class TestIngestMetrics:
+
+    async def test_counts_upload(self, repository):
+        async def save_batches(batches, on_batch_saved=None, upload=None):
+            async for rows in batches:
+                on_batch_saved(len(rows))
+
+        repository.save_glucose_row_batches_to_database.side_effect = save_batches
+        repository.get_ingest_watermarks.return_value = {
+            "1D48": datetime(2021, 2, 18, 11, 0)
+        }
+        content = "\n".join(
+            [
+                HEADER,
+                "Libre,1D48,18-02-2021 10:57,0,77,",
+                "Libre,1D48,18-02-2021 11:12,0,78,",
+                "Libre,1D48,18-02-2021 11:27,0,79,",
+            ]
+        ).encode("utf-8")
+        outcomes = ["parsed", "skipped", "inserted", "rejected"]
+        before = {outcome: ingest_rows(outcome) for outcome in outcomes}
+        bytes_before = REGISTRY.get_sample_value("glucose_ingest_uploaded_bytes_total")
+        service = GlucoseDataService(repository)
+        upload = UploadStub("user.csv", content)
+
+        content_hash = await service.hash_csv_file(upload)
+        user_id, batches = await service.parse_csv_file(upload)
+        await service.store_glucose_row_batches(
+            batches, user_id, content_hash=content_hash
+        )
+
+        assert {
+            outcome: ingest_rows(outcome) - before[outcome] for outcome in outcomes
+        } == {"parsed": 2, "skipped": 1, "inserted": 2, "rejected": 0}
+        assert REGISTRY.get_sample_value(
+            "glucose_ingest_uploaded_bytes_total"
+        ) - bytes_before == len(content)
+
+    @pytest.mark.parametrize("parallel", [False, True])
+    async def test_counts_rejected_rows(self, repository, executor, parallel):
+        content = "\n".join([HEADER, "Libre,1D48,x,0,77,"]).encode("utf-8")
+        service = GlucoseDataService(
+            repository, csv_executor=executor if parallel else None
+        )
+        before = ingest_rows("rejected")
+
+        _, batches = await service.parse_csv_file(UploadStub("user.csv", content))
+        with pytest.raises(InvalidCSVDataException):
+            await collect_batches(batches)
+
+        assert ingest_rows("rejected") - before == 1
+
+
+@pytest.mark.asyncio
+class TestAggregation:
+
+    @pytest.mark.parametrize("bucket", list(BUCKET_MINUTES))
+    async def test_aggregate_buckets_matches_numpy(self, bucket):
+        generator = np.random.default_rng(42)
+        timestamps = np.datetime64("2021-02-01T00:00") + generator.integers(
+            0, 60 * 24 * 21, size=2000
+        ).astype("timedelta64[m]")
+        values = generator.integers(40, 300, size=2000).astype(np.float64)
+        metrics = ["count", "mean", "min", "max", *PERCENTILES]
+
+        buckets = aggregate_buckets(timestamps, values, BUCKET_MINUTES[bucket], metrics)
+
+        minutes = BUCKET_MINUTES[bucket]
+        origin = np.datetime64("2000-01-03T00:00")
+        starts = origin + (
+            (timestamps - origin).astype(np.int64) // minutes * minutes
+        ).astype("timedelta64[m]")
+        assert [row["start"] for row in buckets] == sorted(
+            set(starts.astype("datetime64[us]").tolist())
+        )
+        for row in buckets:
+            group = values[starts == np.datetime64(row["start"], "m")]
+            assert row["count"] == len(group)
+            assert row["mean"] == pytest.approx(group.mean())
+            assert row["min"] == group.min()
+            assert row["max"] == group.max()
+            for metric, percentile in PERCENTILES.items():
+                assert row[metric] == pytest.approx(np.percentile(group, percentile))
+
+    async def test_weekly_buckets_start_on_monday(self):
+        timestamps = np.array(
+            ["2021-02-14T23:59", "2021-02-15T00:00"], dtype="datetime64[m]"
+        )
+
+        buckets = aggregate_buckets(
+            timestamps, np.array([70.0, 80.0]), BUCKET_MINUTES["1w"], ["mean"]
+        )
+
+        assert buckets == [
+            {"start": datetime(2021, 2, 8), "mean": 70.0},
+            {"start": datetime(2021, 2, 15), "mean": 80.0},
+        ]
+
+    @pytest.mark.parametrize(
+        "bucket_minutes, start, end, expected",
+        [
+            (60, None, None, (60, None, None)),
+            (24 * 60, None, None, (24 * 60, None, None)),
+            (7 * 24 * 60, None, None, (24 * 60, None, None)),
+            (15, None, None, None),
+            (
+                24 * 60,
+                datetime(2021, 2, 1),
+                datetime(2021, 2, 28, 23, 59, 59),
+                (24 * 60, datetime(2021, 2, 1), datetime(2021, 3, 1)),
+            ),
+            (
+                24 * 60,
+                datetime(2021, 2, 1, 6),
+                None,
+                (60, datetime(2021, 2, 1, 6), None),
+            ),
+            (
+                60,
+                None,
+                datetime(2021, 2, 1, 6, 30),
+                None,
+            ),
+        ],
+    )
+    async def test_select_rollup(self, bucket_minutes, start, end, expected):
+        assert select_rollup(bucket_minutes, start, end) == expected
+
+    async def test_aggregate_without_readings(self):
+        buckets = aggregate_buckets(
+            np.array([], dtype="datetime64[m]"), np.array([]), 60, ["mean"]
+        )
+
+        assert buckets == []
+
+
+@pytest.mark.asyncio
+class TestGlucoseMetrics:
+
+    async def test_metrics_match_numpy(self):
+        generator = np.random.default_rng(7)
+        # 90 days of readings every 15 minutes
+        timestamps = np.datetime64("2021-01-01T00:03") + (
+            np.arange(90 * 24 * 4) * 15
+        ).astype("timedelta64[m]")
+        values = generator.integers(40, 400, size=len(timestamps)).astype(np.float64)
+
+        metrics = compute_glucose_metrics(timestamps, values)
+
+        assert metrics is not None
+        assert metrics.reading_count == len(values)
+        assert metrics.mean == pytest.approx(values.mean())
+        assert metrics.standard_deviation == pytest.approx(values.std())
+        assert metrics.coefficient_of_variation == pytest.approx(
+            values.std() / values.mean() * 100
+        )
+        assert metrics.glucose_management_indicator == pytest.approx(
+            3.31 + 0.02392 * values.mean()
+        )
+        assert metrics.time_in_ranges == pytest.approx(
+            {
+                "very_low": (values < 54).mean() * 100,
+                "low": ((values >= 54) & (values < 70)).mean() * 100,
+                "in_range": ((values >= 70) & (values <= 180)).mean() * 100,
+                "high": ((values > 180) & (values <= 250)).mean() * 100,
+                "very_high": (values > 250).mean() * 100,
+            }
+        )
+
+        reading_times = timestamps.astype(datetime)
+        assert [row["time"] for row in metrics.agp] == [
+            f"{hour:02d}:{minute:02d}"
+            for hour in range(24)
+            for minute in (0, 15, 30, 45)
+        ]
+        for row in metrics.agp:
+            hour, minute = map(int, row["time"].split(":"))
+            group = values[
+                [
+                    timestamp.hour == hour and timestamp.minute // 5 * 5 == minute
+                    for timestamp in reading_times
+                ]
+            ]
+            for metric, percentile in PERCENTILES.items():
+                assert row[metric] == pytest.approx(np.percentile(group, percentile))
+
+    async def test_metrics_without_readings(self):
+        assert (
+            compute_glucose_metrics(np.array([], dtype="datetime64[m]"), np.array([]))
+            is None
+        )
+
+
+def reference_lttb(x: np.ndarray, y: np.ndarray, max_points: int) -> list[int]:
+    # Point by point LTTB as described by Steinarsson
+    x = x.astype(np.float64) - x[0]
+    every = (len(x) - 2) / (max_points - 2)
+    selected = [0]
+    for bucket in range(max_points - 2):
+        low, high = int(bucket * every) + 1, int((bucket + 1) * every) + 1
+        if bucket == max_points - 3:
+            next_x, next_y = x[-1], y[-1]
+        else:
+            next_high = int((bucket + 2) * every) + 1
+            next_x, next_y = x[high:next_high].mean(), y[high:next_high].mean()
+        ax, ay = x[selected[-1]], y[selected[-1]]
+        areas = [
+            abs((ax - next_x) * (y[i] - ay) - (ax - x[i]) * (next_y - ay))
+            for i in range(low, high)
+        ]
+        selected.append(low + areas.index(max(areas)))
+    selected.append(len(x) - 1)
+    return selected
+
+
+@pytest.mark.asyncio
+class TestDownsampling:
+
+    @staticmethod
+    def curve(count: int) -> tuple[np.ndarray, np.ndarray]:
+        generator = np.random.default_rng(3)
+        # Readings every 15 minutes, in seconds since the epoch
+        x = 1609459200 + np.arange(count) * 900
+        y = 120 + 60 * np.sin(np.arange(count) / 40) + generator.normal(0, 5, count)
+        return x, y
+
+    async def test_matches_reference_lttb(self):
+        x, y = self.curve(90 * 24 * 4)
+        # Extremes where LTTB keeps them anyway
+        y[0], y[-1] = y.max() + 1, y.min() - 1
+
+        assert lttb_indices(x, y, 800).tolist() == reference_lttb(x, y, 800)
+
+    @pytest.mark.parametrize("max_points", [4, 5, 100, 800])
+    async def test_keeps_ends_and_extremes(self, max_points):
+        x, y = self.curve(5000)
+        # Neighbouring extremes, i.e. in the same bucket
+        y[2500], y[2501] = 30, 400
+
+        indices = lttb_indices(x, y, max_points)
+
+        assert len(indices) == max_points
+        assert np.all(np.diff(indices) > 0)
+        assert {0, 2500, 2501, 4999} <= set(indices.tolist())
+
+    async def test_short_series_is_kept(self):
+        x, y = self.curve(10)
+
+        assert lttb_indices(x, y, 10).tolist() == list(range(10))
+
+    async def test_downsampled_rows(self, repository):
+        make_row = result_tuple(["id", "device_timestamp", "value"])
+        rows = [
+            make_row([id, datetime(2021, 2, 18, 10, id), value])
+            for id, value in enumerate([100, 101, 100, 180, 100, 99, 100, 100])
+        ]
+        repository.get_user_glucose_value_rows_from_database.return_value = rows
+        service = GlucoseDataService(repository)
+
+        kept = await service.get_downsampled_glucose_rows(
+            fields=[], user_id=USER_ID, max_points=4, sort="desc"
+        )
+
+        assert [row.id for row in kept] == [7, 5, 3, 0]
+        series = await service.get_downsampled_glucose_series(
+            user_id=USER_ID, max_points=4, sort="asc"
+        )
+        assert series.ids.tolist() == [0, 3, 5, 7]
+        assert series.values.tolist() == [100, 180, 99, 100]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.mark.asyncio
+class TestQueryCache:
+
+    @pytest.fixture
+    def clock(self):
+        return FakeClock()
+
+    @pytest.fixture
+    def cache(self, clock):
+        return QueryCache(max_rows=3, ttl_seconds=10, clock=clock)
+
+    @pytest.fixture
+    def service(self, repository, cache):
+        return CachingGlucoseDataService(repository, query_cache=cache)
+
+    async def test_evicts_least_recently_used(self, cache):
+        cache.put("a", USER_ID, 0, ["a"], 1)
+        cache.put("b", USER_ID, 0, ["b1", "b2"], 2)
+        cache.get("a")
+        cache.put("c", USER_ID, 0, ["c"], 1)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == ["a"]
+        assert cache.get("c") == ["c"]
+        assert cache.stats.evictions == 1
+        assert cache.stats.rows == 2
+
+    async def test_entries_expire(self, cache, clock):
+        cache.put("a", USER_ID, 0, ["a"], 1)
+        clock.now = 10
+
+        assert cache.get("a") is None
+        assert cache.stats.entries == 0
+
+    async def test_entries_of_other_data_versions_are_misses(self, cache):
+        cache.put("a", USER_ID, 0, ["a"], 1, data_version=1)
+
+        assert cache.get("a") == ["a"]
+        assert cache.get("a", data_version=1) == ["a"]
+        assert cache.get("a", data_version=2) is None
+        assert cache.stats.entries == 0
+
+    async def test_read_before_invalidation_is_not_cached(self, cache):
+        generation = cache.generation(USER_ID)
+        cache.invalidate_user(USER_ID)
+        cache.put("a", USER_ID, generation, ["a"], 1)
+
+        assert cache.get("a") is None
+
+    async def test_recently_invalidated(self, cache, clock):
+        assert not cache.recently_invalidated()
+        clock.now = 100
+        cache.invalidate_user(USER_ID)
+        clock.now = 104
+
+        assert cache.recently_invalidated(USER_ID)
+        assert cache.recently_invalidated()
+        assert not cache.recently_invalidated("other-user")
+        clock.now = 105
+        assert not cache.recently_invalidated(USER_ID)
+        assert not cache.recently_invalidated()
+
+    async def test_levels_are_served_from_cache(self, service, repository, cache):
+        repository.get_user_glucose_data_from_database.return_value = ["level"]
+
+        first = await service.get_user_glucose_data(user_id=USER_ID, limit=10)
+        second = await service.get_user_glucose_data(user_id=USER_ID, limit=10)
+
+        assert first == second == ["level"]
+        repository.get_user_glucose_data_from_database.assert_awaited_once()
+        assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    async def test_ingestion_on_another_worker_refreshes_levels(
+        self, repository, cache
+    ):
+        # The persisted version was bumped by an ingestion this cache didn't see
+        versions = [
+            UserDataVersion(
+                user_id=USER_ID, version=1, updated_at=datetime(2024, 5, 1)
+            ),
+            UserDataVersion(
+                user_id=USER_ID, version=2, updated_at=datetime(2024, 5, 2)
+            ),
+        ]
+        repository.get_user_glucose_data_from_database.side_effect = [["old"], ["new"]]
+
+        levels = []
+        for version in versions + versions[1:]:
+            repository.get_user_data_version.return_value = version
+            service = CachingGlucoseDataService(repository, query_cache=cache)
+            await service.get_user_data_version(USER_ID)
+            levels.append(await service.get_user_glucose_data(user_id=USER_ID))
+
+        assert levels == [["old"], ["new"], ["new"]]
+        assert repository.get_user_data_version.await_count == 3
+
+    async def test_rows_are_cached_per_fieldset(self, service, repository):
+        repository.get_user_glucose_rows_from_database.return_value = ["row"]
+
+        await service.get_user_glucose_rows(["id"], user_id=USER_ID)
+        await service.get_user_glucose_rows(["id"], user_id=USER_ID)
+        await service.get_user_glucose_rows(["id", "notes"], user_id=USER_ID)
+
+        assert repository.get_user_glucose_rows_from_database.await_count == 2
+
+    async def test_ingestion_invalidates_user(self, service, repository):
+        repository.get_user_glucose_data_from_database.return_value = ["level"]
+        repository.get_glucose_level_by_id_from_database.return_value = UserGlucoseData(
+            id=1, user_id=USER_ID
+        )
+        await service.get_user_glucose_data(user_id=USER_ID)
+        await service.get_user_glucose_data(user_id="other-user")
+        await service.get_glucose_level_by_id(1)
+
+        await service.store_glucose_records([], USER_ID)
+        await service.get_user_glucose_data(user_id=USER_ID)
+        await service.get_user_glucose_data(user_id="other-user")
+        await service.get_glucose_level_by_id(1)
+
+        assert repository.get_user_glucose_data_from_database.await_count == 3
+        assert repository.get_glucose_level_by_id_from_database.await_count == 2
+
+    async def test_reads_primary_after_ingestion(
+        self, service, repository, clock, mocker
+    ):
+        primary = mocker.MagicMock(spec=DatabaseRepository)
+        primary.get_user_glucose_data_from_database.return_value = ["new level"]
+        repository.with_primary_reads.return_value = primary
+        repository.get_user_glucose_data_from_database.return_value = ["old level"]
+
+        await service.store_glucose_records([], USER_ID)
+        after_ingestion = await service.get_user_glucose_data(user_id=USER_ID)
+        cached = await service.get_user_glucose_data(user_id=USER_ID)
+        clock.now = 5
+        replica = await service.get_user_glucose_data(user_id=USER_ID, limit=10)
+
+        assert after_ingestion == cached == ["new level"]
+        assert replica == ["old level"]
+        primary.get_user_glucose_data_from_database.assert_awaited_once()
+        assert service.database_repository is repository
+
+    async def test_lookup_by_ids_shares_cached_records(self, service, repository):
+        repository.get_glucose_level_by_id_from_database.return_value = UserGlucoseData(
+            id=1, user_id=USER_ID
+        )
+        repository.get_glucose_levels_by_ids_from_database.return_value = [
+            UserGlucoseData(id=2, user_id=USER_ID)
+        ]
+        await service.get_glucose_level_by_id(1)
+
+        levels, missing_ids = await service.get_glucose_levels_by_ids([2, 1, 3, 2])
+
+        assert [level.id for level in levels] == [2, 1]
+        assert missing_ids == [3]
+        repository.get_glucose_levels_by_ids_from_database.assert_awaited_once_with(
+            ids=[2, 3]
+        )
+        assert (await service.get_glucose_level_by_id(2)).id == 2
+        assert repository.get_glucose_level_by_id_from_database.await_count == 1
+
+
+@pytest.mark.asyncio
+class TestExport:
+
+    RECORDS = [
+        {
+            "id": 1,
+            "user_id": USER_ID,
+            "device": "FreeStyle LibreLink",
+            "serial_number": "SN",
+            "device_timestamp": datetime(2021, 2, 18, 10, 57),
+            "record_type": 0,
+            "glucose_value_history": 77,
+        },
+        {
+            "id": 2,
+            "user_id": USER_ID,
+            "device": "FreeStyle LibreLink",
+            "serial_number": "SN",
+            "device_timestamp": datetime(2021, 2, 18, 11, 12),
+            "record_type": 1,
+            "notes": 'Sport, "Laufen"',
+        },
+    ]
+
+    @pytest.fixture
+    def service(self, repository):
+        rows = [
+            tuple(record.get(column.name) for column in EXPORT_COLUMNS)
+            for record in self.RECORDS
+        ]
+
+        async def stream_rows(**kwargs):
+            yield rows[:1]
+            yield rows[1:]
+
+        repository.stream_user_glucose_rows.side_effect = stream_rows
+        return GlucoseDataService(repository, export_batch_size=1)
+
+    async def collect(self, service, export_format):
+        chunks = [
+            chunk
+            async for chunk in service.export_glucose_levels(
+                user_id=USER_ID, export_format=export_format
+            )
+        ]
+        return b"".join(chunks).decode("utf-8")
+
+    async def test_export_ndjson(self, service):
+        content = await self.collect(service, "ndjson")
+
+        assert [json.loads(line) for line in content.splitlines()] == [
+            {
+                column.name: (
+                    record[column.name].isoformat()
+                    if column.name == "device_timestamp"
+                    else record.get(column.name)
+                )
+                for column in EXPORT_COLUMNS
+            }
+            for record in self.RECORDS
+        ]
+
+    async def test_export_csv(self, service):
+        content = await self.collect(service, "csv")
+
+        rows = list(csv.DictReader(StringIO(content)))
+        assert len(rows) == 2
+        assert rows[0]["device_timestamp"] == "2021-02-18T10:57:00"
+        assert rows[0]["glucose_value_history"] == "77"
+        assert rows[1]["glucose_value_history"] == ""
+        assert rows[1]["notes"] == 'Sport, "Laufen"'
+
+
+@pytest.mark.asyncio
+class TestGLC1Encoding:
+
+    async def test_round_trip(self):
+        series = GlucoseSeries.from_rows(
+            [
+                (2, datetime(2021, 2, 18, 11, 12), 78),
+                (1, datetime(2021, 2, 18, 10, 57), None),
+            ]
+        )
+
+        content = encode_glc1(series)
+        timestamps, values = decode_glc1(content)
+
+        assert len(content) == 8 + 2 * 12
+        assert content[:4] == b"GLC1"
+        assert timestamps.tolist() == [
+            datetime(2021, 2, 18, 11, 12),
+            datetime(2021, 2, 18, 10, 57),
+        ]
+        assert values[0] == 78.0
+        assert np.isnan(values[1])
+        assert int.from_bytes(content[8:16], "little") == 1613646720
+
+    async def test_empty_series(self):
+        content = encode_glc1(GlucoseSeries.from_rows([]))
+
+        assert content == b"GLC1\x00\x00\x00\x00"
+        assert [len(column) for column in decode_glc1(content)] == [0, 0]
+
+    async def test_truncated_payload(self):
+        content = encode_glc1(
+            GlucoseSeries.from_rows([(1, datetime(2021, 2, 18, 10, 57), 77)])
+        )
+
+        with pytest.raises(ValueError):
+            decode_glc1(content[:-1])
+
+
+@pytest.mark.asyncio
+class TestSparseFieldsets:
+
+    async def test_parse_level_fields(self):
+        fields = GlucoseDataService.parse_level_fields(
+            "device_timestamp, glucose_value_history,device_timestamp"
+        )
+
+        assert fields == ["device_timestamp", "glucose_value_history"]
+
+    @pytest.mark.parametrize("value", ["", " , ", "device_timestamp,password"])
+    async def test_parse_invalid_level_fields(self, value):
+        with pytest.raises(InvalidFieldsException):
+            GlucoseDataService.parse_level_fields(value)
+
+    async def test_encodes_only_selected_fields(self):
+        row = UserGlucoseData(
+            id=1,
+            device_timestamp=datetime(2021, 2, 18, 10, 57),
+            glucose_value_history=77,
+            notes="ignored",
+        )
+
+        content = encode_levels_json(
+            [row], ["glucose_value_history", "device_timestamp"]
+        )
+
+        assert json.loads(content) == [
+            {"glucose_value_history": 77, "device_timestamp": "2021-02-18T10:57:00"}
+        ]
+
+    async def test_fields_response_keeps_only_set_fields(self):
+        level = GlucoseLevelFieldsResponse.model_validate_json(
+            '{"glucose_value_history":null,"device_timestamp":"2021-02-18T10:57:00"}'
+        )
+
+        assert level.model_dump(exclude_unset=True) == {
+            "glucose_value_history": None,
+            "device_timestamp": datetime(2021, 2, 18, 10, 57),
+        }
+
+    async def test_fields_response_rejects_unknown_fields(self):
+        with pytest.raises(ValidationError):
+            GlucoseLevelFieldsResponse.model_validate_json(
+                '{"glucose_value_history":77,"glucose":77}'
+            )
+
+
+@pytest.mark.asyncio
+class TestLevelsJSONEncoding:
+
+    @staticmethod
+    def pydantic_encoding(rows: list[UserGlucoseData]) -> bytes:
+        # What FastAPI renders for a `Sequence[GlucoseLevelResponse]` response model
+        adapter = TypeAdapter(list[GlucoseLevelResponse])
+        models = adapter.validate_python(rows, from_attributes=True)
+        return bytes(JSONResponse(adapter.dump_python(models, mode="json")).body)
+
+    @staticmethod
+    def level(id: int, **values) -> UserGlucoseData:
+        defaults = {
+            "device": "FreeStyle LibreLink",
+            "serial_number": "ABC-123",
+            "device_timestamp": datetime(2021, 2, 18, 10, 57),
+            "record_type": 0,
+        }
+        return UserGlucoseData(id=id, user_id=USER_ID, **{**defaults, **values})
+
+    async def test_matches_response_model_encoding(self):
+        rows = [
+            self.level(1, glucose_value_history=77, notes='Frühstück "Müsli"\n'),
+            self.level(
+                2,
+                device_timestamp=datetime(2021, 2, 18, 11, 2, 30, 125000),
+                glucose_scan=101.5,
+                carbs_grams=1 / 3,
+                ketone=1e16,
+            ),
+            self.level(3, record_type=1, fast_insulin_units=0.0001, notes="\t☃"),
+        ]
+
+        assert encode_levels_json(
+            rows, list(GlucoseLevelResponse.model_fields)
+        ) == self.pydantic_encoding(rows)
+
+    @pytest.mark.parametrize("value", [0.00005, 1e-7, -2.5e-5])
+    async def test_matches_response_model_encoding_of_small_floats(self, value):
+        rows = [self.level(1, ketone=value), self.level(2, glucose_scan=90.0)]
+
+        assert encode_levels_json(
+            rows, list(GlucoseLevelResponse.model_fields)
+        ) == self.pydantic_encoding(rows)
+
+    @pytest.mark.parametrize(
+        "fields",
+        [
+            ("device_timestamp",),
+            ("glucose_value_history", "device_timestamp", "ketone"),
+            ("notes", "id", "glucose_scan"),
+        ],
+    )
+    async def test_matches_fields_response_encoding(self, fields):
+        rows = [
+            self.level(1, glucose_value_history=77, notes="Frühstück\n"),
+            self.level(2, glucose_scan=101.5, ketone=0.00005),
+        ]
+        adapter = TypeAdapter(list[GlucoseLevelFieldsResponse])
+        models = adapter.validate_python(
+            [{field: getattr(row, field) for field in fields} for row in rows]
+        )
+        expected = adapter.dump_python(models, mode="json", exclude_unset=True)
+
+        content = encode_levels_json(rows, list(fields))
+
+        assert json.loads(content) == expected
+        assert all(list(level) == list(fields) for level in json.loads(content))
+
+    async def test_encodes_rows_by_column_name(self):
+        make_row = result_tuple(["id", "device_timestamp", "glucose_value_history"])
+        rows = [make_row([1, datetime(2021, 2, 18, 10, 57), 77])]
+
+        content = encode_levels_json(rows, ["glucose_value_history", "id"])
+
+        assert content == b'[{"glucose_value_history":77,"id":1}]'
+
+    async def test_empty_page(self):
+        assert encode_levels_json([], ["id"]) == b"[]"
+
+
+class UploadStub:
+    """Minimal stand-in for `UploadFile`."""
+
+    def __init__(self, filename: str, content: bytes):
+        self.filename = filename
+        self._buffer = BytesIO(content)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buffer.read(size)
+
+    async def seek(self, offset: int) -> None:
+        self._buffer.seek(offset)
+
+
+@pytest.mark.asyncio
+class TestIngestJobManager:
+
+    @pytest.fixture
+    def saved_rows(self):
+        return []
+
+    @pytest.fixture
+    def job_manager(self, repository, mock_db_session, saved_rows, tmp_path):
+        async def save_batches(batches, on_batch_saved=None, upload=None):
+            async for rows in batches:
+                saved_rows.extend(rows)
+                on_batch_saved(len(rows))
+            return len(saved_rows)
+
+        repository.save_glucose_row_batches_to_database.side_effect = save_batches
+
+        async def session_factory():
+            yield mock_db_session
+
+        return IngestJobManager(
+            session_factory=session_factory,
+            service_factory=lambda session: GlucoseDataService(
+                repository, csv_batch_size=100
+            ),
+            spool_dir=str(tmp_path),
+            max_concurrent_jobs=1,
+        )
+
+    async def wait_for(self, job):
+        for _ in range(100):
+            if job.is_finished:
+                return
+            await asyncio.sleep(0.01)
+
+    async def test_job_ingests_spooled_file(self, job_manager, saved_rows, tmp_path):
+        content = (
+            SAMPLE_DATA_DIR / "aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa.csv"
+        ).read_bytes()
+
+        job = await job_manager.submit(
+            UploadStub("aaaaaaaa-aaaa-aaaa-aaaa-aaaaaaaaaaaa.csv", content), USER_ID
+        )
+        await self.wait_for(job)
+
+        assert job.status == JobStatus.succeeded
+        assert job.stats.rows_parsed == 1199
+        assert job.stats.rows_inserted == 1199
+        assert len(saved_rows) == 1199
+        assert job_manager.get(job.id) is job
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_job_reports_invalid_rows(self, job_manager, saved_rows):
+        content = f"{HEADER}\nLibre,1D48,not-a-date,0,77,\n".encode("utf-8")
+
+        job = await job_manager.submit(UploadStub("user.csv", content), "user")
+        await self.wait_for(job)
+
+        assert job.status == JobStatus.failed
+        assert job.errors[0].startswith("Invalid CSV data:")
+        assert saved_rows == []
+
+    async def test_unknown_job(self, job_manager):
+        assert job_manager.get("unknown") is None
+
+    async def test_rejects_jobs_beyond_queue_depth(self, job_manager, tmp_path):
+        job_manager.max_queued_jobs = 1
+        content = f"{HEADER}\nLibre,1D48,18-02-2021 10:57,0,77,\n".encode("utf-8")
+
+        first = await job_manager.submit(UploadStub("user.csv", content), "user")
+        with pytest.raises(IngestQueueFullException):
+            await job_manager.submit(UploadStub("user.csv", content), "user")
+        assert len(list(tmp_path.iterdir())) == 1
+
+        await self.wait_for(first)
+        second = await job_manager.submit(UploadStub("user.csv", content), "user")
+        await self.wait_for(second)
+        assert second.status == JobStatus.succeeded
+
+    async def test_forgets_jobs_after_retention(self, job_manager):
+        content = f"{HEADER}\nLibre,1D48,18-02-2021 10:57,0,77,\n".encode("utf-8")
+        job = await job_manager.submit(UploadStub("user.csv", content), "user")
+        await self.wait_for(job)
+        assert job_manager.get(job.id) is job
+
+        job.finished_at = datetime.now() - timedelta(seconds=3601)
+
+        assert job_manager.get(job.id) is None
+
+    async def test_shutdown_removes_spooled_files(self, job_manager, tmp_path):
+        content = f"{HEADER}\nLibre,1D48,18-02-2021 10:57,0,77,\n".encode("utf-8")
+        for _ in range(3):
+            await job_manager.submit(UploadStub("user.csv", content), "user")
+
+        await job_manager.shutdown()
+
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_removes_stale_spool_files(self, job_manager, tmp_path):
+        stale, fresh, other = (
+            tmp_path / "ingest-stale.csv",
+            tmp_path / "ingest-fresh.csv",
+            tmp_path / "other.csv",
+        )
+        for path in (stale, fresh, other):
+            path.write_bytes(b"")
+        old = datetime.now().timestamp() - 3601
+        os.utime(stale, (old, old))
+        os.utime(other, (old, old))
+
+        assert job_manager.remove_stale_spool_files() == 1
+        assert sorted(path.name for path in tmp_path.iterdir()) == [
+            "ingest-fresh.csv",
+            "other.csv",
+        ]
@@ -0,0 +1,102 @@
+"""
+HTTP conditional requests for responses derived from a user's glucose data.
+
+The validators come from the persisted `UserDataVersion`, which every ingestion
+bumps in the same transaction as the readings, so they are shared by all API
+workers and can be checked before running the actual query.
+"""
+
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+
+from fastapi import HTTPException, Request, Response, status
+
+from src.db.models import UserDataVersion
+
+# Clients may store responses but have to revalidate them before every use
+CACHE_CONTROL = "private, no-cache"
+
+
+def build_etag(version: UserDataVersion, representation: str | None = None) -> str:
+    """
+    Returns the strong entity tag of a data version, distinguishing the
+    representations of the same data, e.g. JSON and binary encodings.
+    """
+    suffix = f"-{representation}" if representation else ""
+    return f'"{version.version}-{version.updated_at:%Y%m%d%H%M%S}{suffix}"'
+
+
+def check_not_modified(
+    request: Request,
+    response: Response,
+    version: UserDataVersion | None,
+    representation: str | None = None,
+    vary: str | None = None,
+) -> None:
+    """
+    Sets the validators of a data version on the response, and answers the request
+    with 304 Not Modified if the client's copy is still current.
+
+    `If-None-Match` takes precedence over `If-Modified-Since`, as in RFC 9110.
+
+    Args:
+        request (Request): The incoming request.
+        response (Response): The response whose headers are set.
+        version (UserDataVersion | None): The version of the data the response is
+            built from, or None if it is unknown.
+        representation (str | None): Name of the negotiated representation, if
+            the endpoint has several (optional).
+        vary (str | None): Request headers the representation depends on, sent as
+            `Vary` (optional).
+
+    Raises:
+        HTTPException: 304 with the validators, if the client's copy is current.
+    """
+    if vary is not None:
+        response.headers["Vary"] = vary
+    if version is None:
+        return
+
+    etag = build_etag(version, representation)
+    # The database server runs in UTC
+    last_modified = version.updated_at.replace(tzinfo=timezone.utc)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": format_datetime(last_modified, usegmt=True),
+        "Cache-Control": CACHE_CONTROL,
+    }
+    response.headers.update(headers)
+    if vary is not None:
+        headers["Vary"] = vary
+
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    else:
+        if_modified_since = _parse_http_date(request.headers.get("If-Modified-Since"))
+        not_modified = (
+            if_modified_since is not None and last_modified <= if_modified_since
+        )
+
+    if not_modified:
+        raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # Weak comparison: a W/ prefix on either side is ignored
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def _parse_http_date(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
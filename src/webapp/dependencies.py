@@ -3,39 +3,172 @@ Dependency Injection container.
 Centralizes factory functions for clean dependency management.
 """
 
-from fastapi import Depends
+from concurrent.futures import Executor
+from typing import Any, AsyncIterator, Callable
+
+from fastapi import Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.main import DatabaseManager
+from src.db.main import DatabaseManager, PoolStatus
 from src.db.repository import DatabaseRepository
+from src.domain.cache import CachingGlucoseDataService, QueryCache
+from src.domain.jobs import IngestJobManager
 from src.domain.service import GlucoseDataService
+from src.webapp.settings import Settings, get_settings
+
+
+def get_session_factory() -> Callable[[], AsyncIterator[AsyncSession]]:
+    """
+    Returns the factory of read-only database sessions. The repository opens one on
+    its first query, and streamed responses open their own, as they are sent after
+    the request's dependencies are closed.
+
+    Returns:
+        Callable: Async generator function yielding a database session.
+    """
+    return DatabaseManager.get_read_session
 
 
-def get_database_repository(
+async def get_database_repository(
     session: AsyncSession = Depends(DatabaseManager.get_session),
-) -> DatabaseRepository:
+    settings: Settings = Depends(get_settings),
+    read_session_factory: Callable[[], AsyncIterator[AsyncSession]] = Depends(
+        get_session_factory
+    ),
+) -> AsyncIterator[DatabaseRepository]:
     """
-    Creates and returns an instance of DatabaseRepository.
+    Creates and yields an instance of DatabaseRepository, and closes its read
+    session after the request.
 
     Args:
-        session (AsyncSession): The database session.
+        session (AsyncSession): The database session for writes.
+        settings (Settings): The application settings.
+        read_session_factory (Callable): Factory of the session for queries, on a
+            read replica if there is one. The session is opened by the first query.
 
     Returns:
         DatabaseRepository: An instance of DatabaseRepository.
     """
-    return DatabaseRepository(session)
+    repository = DatabaseRepository(
+        session,
+        insert_chunk_size=settings.INSERT_CHUNK_SIZE,
+        lookup_chunk_size=settings.LOOKUP_CHUNK_SIZE,
+        read_session_factory=read_session_factory,
+    )
+    try:
+        yield repository
+    finally:
+        await repository.close()
+
+
+def get_pool_status() -> PoolStatus | None:
+    """
+    Returns the state of the database connection pool of this worker.
+
+    Returns:
+        PoolStatus | None: The pool state, or None if the engine is not created.
+    """
+    return DatabaseManager.get_pool_status()
+
+
+def get_csv_executor(request: Request) -> Executor | None:
+    """
+    Returns the CSV parser process pool created at application startup.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        Executor | None: The application-wide executor, or None if CSV files are
+        parsed on the event loop.
+    """
+    return getattr(request.app.state, "csv_executor", None)
+
+
+def get_query_cache(request: Request) -> QueryCache | None:
+    """
+    Returns the level query cache created at application startup.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        QueryCache | None: The application-wide cache, or None if caching is
+        disabled.
+    """
+    return getattr(request.app.state, "query_cache", None)
 
 
 def get_glucose_data_service(
     database_repository: DatabaseRepository = Depends(get_database_repository),
+    settings: Settings = Depends(get_settings),
+    csv_executor: Executor | None = Depends(get_csv_executor),
+    query_cache: QueryCache | None = Depends(get_query_cache),
 ) -> GlucoseDataService:
     """
     Creates and returns an instance of GlucoseDataService with the provided storage.
 
     Args:
         storage (DatabaseRepository): The repository instance used for data storage and retrieval.
+        settings (Settings): The application settings.
+        csv_executor (Executor | None): Executor used to parse CSV uploads.
+        query_cache (QueryCache | None): Cache for level queries (optional).
 
     Returns:
         GlucoseDataService: A configured GlucoseDataService instance ready for use.
     """
-    return GlucoseDataService(database_repository=database_repository)
+    options: dict[str, Any] = dict(
+        database_repository=database_repository,
+        csv_batch_size=settings.CSV_BATCH_SIZE,
+        csv_read_chunk_size=settings.CSV_READ_CHUNK_SIZE,
+        csv_executor=csv_executor,
+        csv_max_pending_blocks=settings.CSV_PARSER_MAX_PENDING_BLOCKS,
+        export_batch_size=settings.EXPORT_BATCH_SIZE,
+    )
+    if query_cache is not None:
+        return CachingGlucoseDataService(**options, query_cache=query_cache)
+    return GlucoseDataService(**options)
+
+
+def create_glucose_data_service(
+    session: AsyncSession,
+    settings: Settings,
+    csv_executor: Executor | None = None,
+    query_cache: QueryCache | None = None,
+) -> GlucoseDataService:
+    """
+    Builds a GlucoseDataService outside of a request, e.g. for background jobs.
+
+    Args:
+        session (AsyncSession): The database session, for reads and writes.
+        settings (Settings): The application settings.
+        csv_executor (Executor | None): Executor used to parse CSV uploads.
+        query_cache (QueryCache | None): Cache for level queries (optional).
+
+    Returns:
+        GlucoseDataService: A configured GlucoseDataService instance ready for use.
+    """
+    return get_glucose_data_service(
+        database_repository=DatabaseRepository(
+            session,
+            insert_chunk_size=settings.INSERT_CHUNK_SIZE,
+            lookup_chunk_size=settings.LOOKUP_CHUNK_SIZE,
+        ),
+        settings=settings,
+        csv_executor=csv_executor,
+        query_cache=query_cache,
+    )
+
+
+def get_ingest_job_manager(request: Request) -> IngestJobManager | None:
+    """
+    Returns the background ingestion job manager created at application startup.
+
+    Args:
+        request (Request): The incoming request.
+
+    Returns:
+        IngestJobManager | None: The application-wide job manager, or None if the
+        application was started without one.
+    """
+    return getattr(request.app.state, "ingest_job_manager", None)
@@ -0,0 +1,104 @@
+"""
+Prometheus metrics of the API.
+
+`PrometheusMiddleware` records the latency of every request by route template and
+the number of requests in flight. Database statements and CSV ingestion are measured
+where they happen, see `QUERY_DURATION` and `INGEST_ROWS`. `render_metrics` renders
+all of them in the Prometheus text format.
+
+With several worker processes, every worker only counts its own requests. When
+`PROMETHEUS_MULTIPROC_DIR` names an empty directory at startup, the workers write
+their metrics there and `render_metrics` adds them up.
+"""
+
+import os
+import time
+
+from prometheus_client import (
+    REGISTRY,
+    CollectorRegistry,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request until its response is sent completely",
+    ["method", "route", "status"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests being served",
+    ["method", "route"],
+    multiprocess_mode="livesum",
+)
+
+# Route label of requests that match no route, so unknown paths add no time series
+UNMATCHED_ROUTE = "unmatched"
+
+
+def route_template(scope: Scope) -> str:
+    """
+    Returns the path template of the route a request matches, e.g.
+    `/api/v1/levels/{id}/`.
+    """
+    for route in scope["app"].routes:
+        match, _ = route.matches(scope)
+        if match == Match.FULL:
+            return route.path
+    return UNMATCHED_ROUTE
+
+
+class PrometheusMiddleware:
+    """
+    ASGI middleware recording `REQUEST_DURATION` and `REQUESTS_IN_FLIGHT`.
+
+    Streamed responses are timed until their last chunk is sent. Requests failing
+    with an unhandled exception are recorded with status 500.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        route = route_template(scope)
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        in_flight = REQUESTS_IN_FLIGHT.labels(method, route)
+        in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            REQUEST_DURATION.labels(method, route, str(status_code)).observe(
+                time.perf_counter() - started
+            )
+            in_flight.dec()
+
+
+def render_metrics() -> bytes:
+    """
+    Renders the metrics in the Prometheus text format, of all worker processes if
+    `PROMETHEUS_MULTIPROC_DIR` is set.
+    """
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
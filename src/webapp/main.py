@@ -1,51 +1,173 @@
 import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from contextlib import asynccontextmanager
+from dataclasses import asdict
 from datetime import datetime
-from functools import lru_cache
-from typing import List, Optional, Sequence
-
-from fastapi import Depends, FastAPI, File, HTTPException, Query, UploadFile, status
+from functools import partial
+from typing import AsyncIterator, Callable, Optional, Sequence, Union
+
+from fastapi import (
+    Depends,
+    FastAPI,
+    File,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    UploadFile,
+    status,
+)
+from fastapi.responses import StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from src.db.main import DatabaseManager, check_db_connection
-from src.domain.exceptions import WrongFileFormatException
+from src.db.main import DatabaseManager, PoolStatus, check_db_connection
+from src.domain.cache import QueryCache
+from src.domain.exceptions import (
+    IngestQueueFullException,
+    InvalidCSVDataException,
+    InvalidCursorException,
+    InvalidFieldsException,
+    WrongFileFormatException,
+)
+from src.domain.export import GLC1_MEDIA_TYPE, encode_glc1, encode_levels_json
+from src.domain.ingest import IngestStats
+from src.domain.jobs import IngestJobManager
+from src.domain.pagination import encode_cursor
 from src.domain.service import GlucoseDataService
-from src.webapp.dependencies import get_glucose_data_service
+from src.webapp.conditional import check_not_modified
+from src.webapp.dependencies import (
+    create_glucose_data_service,
+    get_glucose_data_service,
+    get_ingest_job_manager,
+    get_pool_status,
+    get_query_cache,
+    get_session_factory,
+)
+from src.webapp.instrumentation import PrometheusMiddleware, render_metrics
 from src.webapp.schema import (
+    AggregationBucket,
+    AggregationMetric,
+    AGPBin,
+    CacheStatsResponse,
+    ExportFormat,
+    GlucoseAggregateBucket,
+    GlucoseAggregateResponse,
+    GlucoseLevelFieldsResponse,
     GlucoseLevelResponse,
-    GlucoseRecordCSV,
+    GlucoseLevelsBatchRequest,
+    GlucoseLevelsBatchResponse,
+    GlucoseLevelsByIdsRequest,
+    GlucoseLevelsByIdsResponse,
+    GlucoseMetricsResponse,
+    IngestJobResponse,
+    IngestJobStatusResponse,
+    IngestResponse,
+    PoolStatusResponse,
     SortOrder,
     StatusResponse,
+    TimeInRanges,
+    UserGlucoseLevels,
 )
-from src.webapp.settings import Settings
+from src.webapp.settings import Settings, get_settings
 
 _logger = logging.getLogger(__name__)
 
+EXPORT_MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv; charset=utf-8",
+}
 
-@lru_cache
-def get_settings():
+
+def _accepts(request: Request, media_type: str) -> bool:
+    """
+    Returns whether the `Accept` header of a request names a media type.
     """
-    Loads the application settings.
+    accepted = request.headers.get("Accept", "").split(",")
+    return any(value.split(";")[0].strip() == media_type for value in accepted)
 
-    Returns:
-        Settings: The cached settings object.
+
+def _set_next_cursor(response: Response, levels: Sequence, limit: int) -> None:
     """
-    return Settings()
+    Sets the `X-Next-Cursor` header when a page of records is full.
+    """
+    if len(levels) == limit:
+        last = levels[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            last.device_timestamp, last.id
+        )
 
 
 @asynccontextmanager
 async def life_span(app: FastAPI):
     # Initialize DB and Logging
-    DatabaseManager(get_settings().ASYNC_DATABASE_URI)
+    settings = get_settings()
+    DatabaseManager(
+        settings.ASYNC_DATABASE_URI,
+        pool_size=settings.DATABASE_POOL_SIZE,
+        max_overflow=settings.DATABASE_POOL_MAX_OVERFLOW,
+        pool_timeout=settings.DATABASE_POOL_TIMEOUT,
+        pool_recycle=settings.DATABASE_POOL_RECYCLE,
+        pool_pre_ping=settings.DATABASE_POOL_PRE_PING,
+        read_replica_uris=settings.DATABASE_READ_REPLICA_URIS,
+    )
     logging.basicConfig(
-        level=get_settings().LOG_LEVEL,
+        level=settings.LOG_LEVEL,
         format="%(levelname)s:%(asctime)s: %(name)s: %(message)s",
     )
+    warm_up_connections = min(
+        settings.DATABASE_POOL_WARM_UP_CONNECTIONS, settings.DATABASE_POOL_SIZE
+    )
+    if warm_up_connections > 0:
+        try:
+            await DatabaseManager.warm_up(warm_up_connections)
+        except Exception as e:
+            # The service still starts, connections are then opened on first use
+            _logger.warning(f"Failed to warm up the database pool: {e}")
+    # CSV parsing is CPU bound, so it runs in worker processes off the event loop
+    app.state.csv_executor = None
+    if settings.CSV_PARSER_WORKERS > 0:
+        app.state.csv_executor = ProcessPoolExecutor(
+            max_workers=settings.CSV_PARSER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    app.state.query_cache = None
+    if settings.QUERY_CACHE_MAX_ROWS > 0:
+        app.state.query_cache = QueryCache(
+            max_rows=settings.QUERY_CACHE_MAX_ROWS,
+            ttl_seconds=settings.QUERY_CACHE_TTL_SECONDS,
+            replica_lag_seconds=settings.QUERY_CACHE_REPLICA_LAG_SECONDS,
+        )
+    app.state.ingest_job_manager = None
+    if settings.INGEST_BACKGROUND_JOBS_ENABLED:
+        app.state.ingest_job_manager = IngestJobManager(
+            session_factory=DatabaseManager.get_session,
+            service_factory=partial(
+                create_glucose_data_service,
+                settings=settings,
+                csv_executor=app.state.csv_executor,
+                query_cache=app.state.query_cache,
+            ),
+            spool_dir=settings.INGEST_SPOOL_DIR,
+            max_concurrent_jobs=settings.INGEST_MAX_CONCURRENT_JOBS,
+            max_retained_jobs=settings.INGEST_MAX_RETAINED_JOBS,
+            read_chunk_size=settings.CSV_READ_CHUNK_SIZE,
+            max_queued_jobs=settings.INGEST_MAX_QUEUED_JOBS,
+            job_retention_seconds=settings.INGEST_JOB_RETENTION_SECONDS,
+        )
+        removed = app.state.ingest_job_manager.remove_stale_spool_files()
+        if removed:
+            _logger.info(f"Removed {removed} stale spooled uploads")
     _logger.info("Starting API service...")
 
     yield
 
     _logger.info("Shutting down API service...")
+    if app.state.ingest_job_manager is not None:
+        await app.state.ingest_job_manager.shutdown()
+    if app.state.csv_executor is not None:
+        app.state.csv_executor.shutdown(cancel_futures=True)
     await DatabaseManager.dispose_engine()
     _logger.info("Cleanup complete. Bye!")
 
@@ -56,6 +178,7 @@ app = FastAPI(
     version="1.0.0",
     lifespan=life_span,
 )
+app.add_middleware(PrometheusMiddleware)
 
 
 @app.get(
@@ -90,29 +213,81 @@ async def health_check(
     "/api/v1/upload-csv/",
     status_code=status.HTTP_200_OK,
     responses={
+        202: {"description": "Accepted for background processing"},
         400: {"description": "Wrong File format"},
+        429: {"description": "Too many background jobs waiting"},
         500: {"description": "Internal server error"},
+        503: {"description": "Background processing not available"},
     },
 )
 async def ingest_glucose_csv(
+    response: Response,
     glucose_data_service: GlucoseDataService = Depends(get_glucose_data_service),
+    ingest_job_manager: Optional[IngestJobManager] = Depends(get_ingest_job_manager),
     file: UploadFile = File(...),
-) -> StatusResponse:
+    background: bool = Query(
+        False, description="Process the file in a background job and return at once"
+    ),
+) -> IngestResponse | IngestJobResponse:
     """
     An endpoint for uploading a CSV file containing a user glucose data.
 
+    With `background=true` the file is spooled to disk and ingested by a
+    background worker; the job can be followed with `GET /api/v1/jobs/{id}`.
+
+    Uploading is idempotent: readings that already exist are updated in place, and a
+    byte-identical file that was already ingested for the user is skipped.
+
     Args:
         file (UploadFile): The uploaded CSV file.
+        background (bool): Whether to process the file in a background job.
 
     Returns:
-        - HTTP 200: Indicating the success of the upload.
+        - HTTP 200: The number of inserted rows, and of rows skipped because an
+          earlier upload already stored them.
+        - HTTP 202: The ID of the background job processing the upload.
         - HTTP 400: If the file is not in a CSV format.
         - HTTP 422: If the CSV data is invalid.
+        - HTTP 429: If too many background jobs are waiting already.
         - HTTP 500: If something goes wrong.
+        - HTTP 503: If background processing is not available.
     """
-    # First step: Check and extract data from CSV file.
+    if background:
+        if ingest_job_manager is None:
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Background processing is not available",
+            )
+        try:
+            user_id = GlucoseDataService.extract_user_id(file.filename)
+            job = await ingest_job_manager.submit(file, user_id)
+        except WrongFileFormatException:
+            raise HTTPException(status_code=400, detail="Only CSV files are allowed")
+        except IngestQueueFullException:
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many background jobs are waiting, try again later",
+                headers={"Retry-After": "60"},
+            )
+        except Exception as ex:
+            _logger.error(
+                f"Error while scheduling CSV ingestion. Exception: {ex}",
+                exc_info=True,
+            )
+            raise HTTPException(
+                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+                detail="Something went wrong",
+            )
+
+        response.status_code = status.HTTP_202_ACCEPTED
+        return IngestJobResponse(job_id=job.id, status=job.status)
+
+    # First step: Check the file and open a stream over its parsed rows.
     try:
-        user_id, csv_reader = await glucose_data_service.process_csv_file(file)
+        stats = IngestStats()
+        user_id, batches = await glucose_data_service.parse_csv_file(file, stats)
+        # The row stream is lazy, so the file can be hashed before it is read
+        content_hash = await glucose_data_service.hash_csv_file(file)
     except WrongFileFormatException:
         raise HTTPException(status_code=400, detail="Only CSV files are allowed")
     except Exception as ex:
@@ -125,24 +300,26 @@ async def ingest_glucose_csv(
             detail="Something went wrong",
         )
 
-    # Second step: Validate and process rows
+    # Second step: Validate and store the rows batch by batch
     try:
-        records: List[GlucoseRecordCSV] = []
-        for row in csv_reader:
-            try:
-                records.append(GlucoseRecordCSV(**row))
-            except Exception as e:
-                raise HTTPException(
-                    status_code=422, detail=f"Invalid CSV data: {str(e)}"
-                )
-
-        await glucose_data_service.store_glucose_records(
-            records=records, user_id=user_id
+        await glucose_data_service.store_glucose_row_batches(
+            batches=batches,
+            user_id=user_id,
+            stats=stats,
+            content_hash=content_hash,
+        )
+        if stats.duplicate_upload:
+            return IngestResponse(
+                status="File was already processed", inserted=0, skipped=0
+            )
+        return IngestResponse(
+            status=f"Successfully processed {stats.rows_inserted} recordes",
+            inserted=stats.rows_inserted,
+            skipped=stats.rows_skipped,
         )
-        return StatusResponse(status=f"Successfully processed {len(records)} recordes")
 
-    except HTTPException:
-        raise  # Re-raise existing HTTP exceptions
+    except InvalidCSVDataException as e:
+        raise HTTPException(status_code=422, detail=f"Invalid CSV data: {str(e)}")
 
     except Exception as ex:
         _logger.error(
@@ -158,45 +335,178 @@ async def ingest_glucose_csv(
 @app.get(
     "/api/v1/levels/",
     status_code=status.HTTP_200_OK,
+    response_model=Union[
+        Sequence[GlucoseLevelResponse], Sequence[GlucoseLevelFieldsResponse]
+    ],
     responses={
+        200: {
+            "content": {GLC1_MEDIA_TYPE: {}},
+            "description": "JSON records (only the requested fields with `fields`), "
+            "or a packed GLC1 series if requested",
+        },
+        304: {"description": "Not modified"},
+        400: {"description": "Invalid cursor"},
         500: {"description": "Internal server error"},
     },
 )
 async def get_glucose_levels(
+    request: Request,
+    response: Response,
     glucose_data_service: GlucoseDataService = Depends(get_glucose_data_service),
     user_id: str = Query(..., description="User ID"),
     start: Optional[datetime] = Query(None, description="Start timestamp (ISO format)"),
     end: Optional[datetime] = Query(None, description="End timestamp (ISO format)"),
     limit: int = Query(100, ge=1, le=1000, description="Limit number of results"),
     offset: int = Query(0, ge=0, description="Offset for pagination"),
+    cursor: Optional[str] = Query(
+        None, description="Cursor from the `X-Next-Cursor` header of the previous page"
+    ),
     sort: SortOrder = SortOrder.desc,
-) -> Sequence[GlucoseLevelResponse]:
+    fields: Optional[str] = Query(
+        None,
+        description="Comma-separated fields to return, e.g. "
+        "`device_timestamp,glucose_value_history`",
+    ),
+    max_points: Optional[int] = Query(
+        None,
+        ge=4,
+        le=5000,
+        description="Return the curve of the whole range downsampled to at most "
+        "this many records instead of a page",
+    ),
+) -> Response:
     """
     Endpoint for retrieving glucose data for a specific user, with optional
     filters for timestamps, pagination, and sorting.
 
+    When a page is full, the response carries an `X-Next-Cursor` header. Passing it
+    back as `cursor` fetches the next page with an index seek, so deep pages cost the
+    same as the first one.
+
+    Responses carry an `ETag` and `Last-Modified` derived from the user's data
+    version. A request with a matching `If-None-Match` (or `If-Modified-Since`) is
+    answered with 304 Not Modified before the records are queried.
+
+    With `Accept: application/vnd.glucose-data.glc1` only the timestamps and glucose
+    values of the page are returned, in the packed binary GLC1 layout (see the
+    README), which is built from column arrays and is far smaller than the JSON.
+
+    With `fields`, only the named fields are selected from the database and
+    returned, as `GlucoseLevelFieldsResponse` records without the other keys.
+
+    JSON pages are encoded straight from the database rows, without building ORM
+    objects or validating a response model per record.
+
+    With `max_points`, e.g. the width of a chart in pixels, the response is not a
+    page but the glucose curve of the whole range, downsampled with LTTB to at most
+    `max_points` records that keep its shape and its lowest and highest reading.
+    Records without a glucose value are left out, and `limit`, `offset` and
+    `cursor` do not apply.
+
     Args:
         user_id (str): User ID for whom the glucose data is requested.
         start (Optional[datetime]): Start timestamp for filtering records (ISO format).
         end (Optional[datetime]): End timestamp for filtering records (ISO format).
         limit (int): Number of results to return (between 1 and 1000).
         offset (int): Pagination offset.
+        cursor (Optional[str]): Keyset pagination cursor of the previous page.
         sort (SortOrder): Sorting order for the results (`asc` or `desc`).
+        fields (Optional[str]): Sparse fieldset of the records.
+        max_points (Optional[int]): Downsample the range to at most this many
+            records.
 
     Returns:
         - HTTP 200: A list of glucose level records for the user.
+        - HTTP 304: If the client's copy of the page is still current.
+        - HTTP 400: If the cursor or the fieldset is invalid.
         - HTTP 500: If something goes wrong.
     """
+    binary = _accepts(request, GLC1_MEDIA_TYPE)
     try:
-        levels = await glucose_data_service.get_user_glucose_data(
+        selected = (
+            GlucoseDataService.parse_level_fields(fields)
+            if fields is not None and not binary
+            else None
+        )
+        version = await glucose_data_service.get_user_data_version(user_id=user_id)
+        check_not_modified(
+            request,
+            response,
+            version,
+            representation="glc1" if binary else None,
+            vary="Accept",
+        )
+        if binary and max_points:
+            series = await glucose_data_service.get_downsampled_glucose_series(
+                user_id=user_id,
+                max_points=max_points,
+                start=start,
+                end=end,
+                sort=sort,
+            )
+            return Response(
+                content=encode_glc1(series),
+                media_type=GLC1_MEDIA_TYPE,
+                headers=dict(response.headers),
+            )
+        if binary:
+            series = await glucose_data_service.get_user_glucose_series(
+                user_id=user_id,
+                start=start,
+                end=end,
+                sort=sort,
+                limit=limit,
+                offset=offset,
+                cursor=cursor,
+            )
+            if len(series) == limit:
+                response.headers["X-Next-Cursor"] = encode_cursor(
+                    series.timestamps[-1].item(), int(series.ids[-1])
+                )
+            return Response(
+                content=encode_glc1(series),
+                media_type=GLC1_MEDIA_TYPE,
+                headers=dict(response.headers),
+            )
+
+        if selected is None:
+            selected = list(GlucoseLevelResponse.model_fields)
+        if max_points:
+            rows = await glucose_data_service.get_downsampled_glucose_rows(
+                fields=selected,
+                user_id=user_id,
+                max_points=max_points,
+                start=start,
+                end=end,
+                sort=sort,
+            )
+            return Response(
+                content=encode_levels_json(rows, selected),
+                media_type="application/json",
+                headers=dict(response.headers),
+            )
+        rows = await glucose_data_service.get_user_glucose_rows(
+            fields=selected,
             user_id=user_id,
             start=start,
             end=end,
             sort=sort,
             limit=limit,
             offset=offset,
+            cursor=cursor,
         )
-        return levels
+        _set_next_cursor(response, rows, limit)
+        return Response(
+            content=encode_levels_json(rows, selected),
+            media_type="application/json",
+            headers=dict(response.headers),
+        )
+    except InvalidCursorException:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    except InvalidFieldsException as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as ex:
         _logger.error(
             f"Failed to retrieve glucose records for user_id= {user_id}. Exception: {ex}",
@@ -208,21 +518,324 @@ async def get_glucose_levels(
         )
 
 
+@app.post(
+    "/api/v1/levels/batch",
+    status_code=status.HTTP_200_OK,
+    responses={
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_glucose_levels_batch(
+    batch: GlucoseLevelsBatchRequest,
+    glucose_data_service: GlucoseDataService = Depends(get_glucose_data_service),
+) -> GlucoseLevelsBatchResponse:
+    """
+    Endpoint for retrieving the glucose data of several users at once, e.g. the
+    latest readings of every patient of a care team.
+
+    All users share the time window, sort order and per-user limit, and the first
+    `limit` records of every user are read with a single query, instead of one
+    request and query per user.
+
+    Args:
+        batch (GlucoseLevelsBatchRequest): User IDs (up to 200), window, per-user
+            limit and sort order.
+
+    Returns:
+        - HTTP 200: The records grouped by user, in the order of `user_ids`.
+        - HTTP 500: If something goes wrong.
+    """
+    try:
+        levels_by_user = await glucose_data_service.get_users_glucose_data(
+            user_ids=batch.user_ids,
+            start=batch.start,
+            end=batch.end,
+            sort=batch.sort,
+            limit=batch.limit,
+        )
+    except Exception as ex:
+        _logger.error(
+            f"Failed to retrieve glucose records for {len(batch.user_ids)} users. "
+            f"Exception: {ex}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong",
+        )
+
+    return GlucoseLevelsBatchResponse(
+        users=[
+            UserGlucoseLevels(
+                user_id=user_id,
+                levels=[GlucoseLevelResponse.model_validate(level) for level in levels],
+            )
+            for user_id, levels in levels_by_user.items()
+        ]
+    )
+
+
+@app.get(
+    "/api/v1/levels/aggregate",
+    status_code=status.HTTP_200_OK,
+    response_model_exclude_none=True,
+    responses={
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_glucose_aggregates(
+    glucose_data_service: GlucoseDataService = Depends(get_glucose_data_service),
+    user_id: str = Query(..., description="User ID"),
+    start: Optional[datetime] = Query(None, description="Start timestamp (ISO format)"),
+    end: Optional[datetime] = Query(None, description="End timestamp (ISO format)"),
+    bucket: AggregationBucket = Query(
+        AggregationBucket.hour, description="Bucket width"
+    ),
+    metrics: list[AggregationMetric] = Query(
+        [
+            AggregationMetric.count,
+            AggregationMetric.mean,
+            AggregationMetric.min,
+            AggregationMetric.max,
+        ],
+        description="Statistics to compute per bucket",
+    ),
+) -> GlucoseAggregateResponse:
+    """
+    Endpoint for retrieving bucketed statistics of a user's glucose values, e.g. to
+    draw a chart without downloading every reading.
+
+    Buckets are aligned to midnight (weeks start on Monday) and only non-empty
+    buckets are returned, each with the requested metrics.
+
+    Args:
+        user_id (str): User ID for whom the glucose data is aggregated.
+        start (Optional[datetime]): Start timestamp for filtering records (ISO format).
+        end (Optional[datetime]): End timestamp for filtering records (ISO format).
+        bucket (AggregationBucket): Bucket width: 15m, 1h, 1d or 1w.
+        metrics (list[AggregationMetric]): Statistics to compute per bucket.
+
+    Returns:
+        - HTTP 200: The bucket series.
+        - HTTP 500: If something goes wrong.
+    """
+    try:
+        buckets = await glucose_data_service.get_glucose_aggregates(
+            user_id=user_id,
+            bucket=bucket,
+            metrics=list(dict.fromkeys(metrics)),
+            start=start,
+            end=end,
+        )
+    except Exception as ex:
+        _logger.error(
+            f"Failed to aggregate glucose records for user_id= {user_id}. Exception: {ex}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong",
+        )
+
+    return GlucoseAggregateResponse(
+        user_id=user_id,
+        bucket=bucket,
+        buckets=[GlucoseAggregateBucket(**row) for row in buckets],
+    )
+
+
+@app.get(
+    "/api/v1/users/{user_id}/metrics",
+    status_code=status.HTTP_200_OK,
+    responses={
+        404: {"description": "No readings in the requested window"},
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_glucose_metrics(
+    user_id: str,
+    glucose_data_service: GlucoseDataService = Depends(get_glucose_data_service),
+    start: Optional[datetime] = Query(None, description="Start timestamp (ISO format)"),
+    end: Optional[datetime] = Query(None, description="End timestamp (ISO format)"),
+) -> GlucoseMetricsResponse:
+    """
+    Endpoint for retrieving clinical CGM metrics of a user's sensor readings:
+    time in ranges, glucose management indicator, coefficient of variation and the
+    ambulatory glucose profile in 5-minute time-of-day bins.
+
+    Args:
+        user_id (str): User ID for whom the metrics are computed.
+        start (Optional[datetime]): Start timestamp for filtering records (ISO format).
+        end (Optional[datetime]): End timestamp for filtering records (ISO format).
+
+    Returns:
+        - HTTP 200: The metrics of the window.
+        - HTTP 404: If there are no sensor readings in the window.
+        - HTTP 500: If something goes wrong.
+    """
+    try:
+        metrics = await glucose_data_service.get_glucose_metrics(
+            user_id=user_id, start=start, end=end
+        )
+    except Exception as ex:
+        _logger.error(
+            f"Failed to compute glucose metrics for user_id= {user_id}. Exception: {ex}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong",
+        )
+
+    if metrics is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"No glucose readings found for user_id={user_id}.",
+        )
+    return GlucoseMetricsResponse(
+        user_id=user_id,
+        start=start,
+        end=end,
+        reading_count=metrics.reading_count,
+        mean=metrics.mean,
+        standard_deviation=metrics.standard_deviation,
+        coefficient_of_variation=metrics.coefficient_of_variation,
+        glucose_management_indicator=metrics.glucose_management_indicator,
+        time_in_ranges=TimeInRanges(**metrics.time_in_ranges),
+        agp=[AGPBin(**row) for row in metrics.agp],
+    )
+
+
+@app.get(
+    "/api/v1/users/{user_id}/export",
+    status_code=status.HTTP_200_OK,
+    response_class=StreamingResponse,
+    responses={
+        200: {
+            "content": {EXPORT_MEDIA_TYPES[f]: {} for f in ExportFormat},
+            "description": "The user's glucose records, oldest first",
+        },
+    },
+)
+async def export_glucose_levels(
+    user_id: str,
+    settings: Settings = Depends(get_settings),
+    session_factory: Callable[[], AsyncIterator[AsyncSession]] = Depends(
+        get_session_factory
+    ),
+    format: ExportFormat = Query(ExportFormat.ndjson, description="Export format"),
+    start: Optional[datetime] = Query(None, description="Start timestamp (ISO format)"),
+    end: Optional[datetime] = Query(None, description="End timestamp (ISO format)"),
+) -> StreamingResponse:
+    """
+    Endpoint for downloading a user's full glucose history in one response.
+
+    Records are streamed from a server-side cursor in fixed-size batches, so the
+    export runs in constant memory. The stream uses its own database session, as it
+    outlives the request. Once streaming has started, errors can no longer change
+    the status code: the body is cut short and the error is logged.
+
+    Args:
+        user_id (str): User ID whose glucose data is exported.
+        format (ExportFormat): `ndjson` (one JSON object per line) or `csv`.
+        start (Optional[datetime]): Start timestamp for filtering records (ISO format).
+        end (Optional[datetime]): End timestamp for filtering records (ISO format).
+
+    Returns:
+        - HTTP 200: The records as NDJSON or CSV.
+    """
+
+    async def stream() -> AsyncIterator[bytes]:
+        try:
+            async for session in session_factory():
+                service = create_glucose_data_service(session, settings)
+                async for chunk in service.export_glucose_levels(
+                    user_id=user_id, export_format=format, start=start, end=end
+                ):
+                    yield chunk
+        except Exception as ex:
+            _logger.error(
+                f"Failed to export glucose records for user_id= {user_id}. Exception: {ex}",
+                exc_info=True,
+            )
+
+    return StreamingResponse(
+        stream(),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={
+            "Content-Disposition": f'attachment; filename="{user_id}.{format.value}"'
+        },
+    )
+
+
+@app.post(
+    "/api/v1/levels/by-ids",
+    status_code=status.HTTP_200_OK,
+    responses={
+        500: {"description": "Internal server error"},
+    },
+)
+async def get_glucose_levels_by_ids(
+    lookup: GlucoseLevelsByIdsRequest,
+    glucose_data_service: GlucoseDataService = Depends(get_glucose_data_service),
+) -> GlucoseLevelsByIdsResponse:
+    """
+    Endpoint for retrieving several glucose level records by their IDs at once,
+    e.g. the readings a client has annotated or flagged.
+
+    The records are read with a few `WHERE id IN (...)` queries of up to
+    `LOOKUP_CHUNK_SIZE` IDs each, instead of one request and query per ID.
+
+    Args:
+        lookup (GlucoseLevelsByIdsRequest): The IDs of the records (up to 5000).
+
+    Returns:
+        - HTTP 200: The records that exist, like `GET /api/v1/levels/{id}/`, and the
+          IDs that don't, both in request order.
+        - HTTP 500: If something goes wrong.
+    """
+    try:
+        glucose_levels, missing_ids = (
+            await glucose_data_service.get_glucose_levels_by_ids(ids=lookup.ids)
+        )
+    except Exception as ex:
+        _logger.error(
+            f"Failed to retrieve {len(lookup.ids)} glucose level records by ID. "
+            f"Exception: {ex}",
+            exc_info=True,
+        )
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Something went wrong",
+        )
+
+    return GlucoseLevelsByIdsResponse(
+        levels=[GlucoseLevelResponse.model_validate(level) for level in glucose_levels],
+        missing_ids=missing_ids,
+    )
+
+
 @app.get(
     "/api/v1/levels/{id}/",
     status_code=status.HTTP_200_OK,
     responses={
+        304: {"description": "Not modified"},
         404: {"description": "ID doesn't exist"},
         500: {"description": "Internal server error"},
     },
 )
 async def get_glucose_level_by_id(
     id: int,
+    request: Request,
+    response: Response,
     glucose_data_service: GlucoseDataService = Depends(get_glucose_data_service),
 ) -> GlucoseLevelResponse:
     """
     Endpoint for retrieving a specific glucose level record by its ID.
 
+    Like `GET /api/v1/levels/`, responses carry validators derived from the data
+    version of the record's user and support conditional requests.
+
     Args:
         id (int): The ID of the glucose level record to retrieve.
 
@@ -231,11 +844,16 @@ async def get_glucose_level_by_id(
 
     Raises:
         - HTTP 200: A glucose level record identified by the ID.
+        - HTTP 304: If the client's copy of the record is still current.
         - HTTP 404: if the glucose level with the specified ID doesn't exist.
         - HTTP 500: If something goes wrong.
     """
     try:
+        version = await glucose_data_service.get_glucose_level_data_version(id=id)
+        check_not_modified(request, response, version)
         glucose_level = await glucose_data_service.get_glucose_level_by_id(id=id)
+    except HTTPException:
+        raise
     except Exception as ex:
         _logger.error(
             f"Failed to retrieve glucose level record with ID={id}. Exception: {ex}",
@@ -252,3 +870,109 @@ async def get_glucose_level_by_id(
             detail=f"Glucose level with ID={id} not found.",
         )
     return GlucoseLevelResponse.model_validate(glucose_level)
+
+
+@app.get(
+    "/api/v1/jobs/{id}",
+    status_code=status.HTTP_200_OK,
+    responses={
+        404: {"description": "Job doesn't exist"},
+    },
+)
+async def get_ingest_job(
+    id: str,
+    ingest_job_manager: Optional[IngestJobManager] = Depends(get_ingest_job_manager),
+) -> IngestJobStatusResponse:
+    """
+    Endpoint for following the progress of a background CSV ingestion.
+
+    Args:
+        id (str): The ID of the ingestion job.
+
+    Returns:
+        - HTTP 200: Status, row counters, throughput and errors of the job.
+        - HTTP 404: If the job doesn't exist (or ran on another worker).
+    """
+    job = ingest_job_manager.get(id) if ingest_job_manager else None
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Job with ID={id} not found.",
+        )
+
+    return IngestJobStatusResponse(
+        job_id=job.id,
+        user_id=job.user_id,
+        status=job.status,
+        rows_parsed=job.stats.rows_parsed,
+        rows_inserted=job.stats.rows_inserted,
+        rows_skipped=job.stats.rows_skipped,
+        rows_per_second=job.rows_per_second,
+        errors=job.errors,
+        created_at=job.created_at,
+        started_at=job.started_at,
+        finished_at=job.finished_at,
+    )
+
+
+@app.get(
+    "/api/v1/internal/cache",
+    status_code=status.HTTP_200_OK,
+    responses={
+        404: {"description": "Caching is disabled"},
+    },
+)
+async def get_cache_stats(
+    query_cache: Optional[QueryCache] = Depends(get_query_cache),
+) -> CacheStatsResponse:
+    """
+    Endpoint for monitoring the in-process level query cache of this worker.
+
+    Returns:
+        - HTTP 200: Hit, miss, eviction and invalidation counters and the cache size.
+        - HTTP 404: If caching is disabled.
+    """
+    if query_cache is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Caching is disabled",
+        )
+    return CacheStatsResponse(
+        **asdict(query_cache.stats), max_rows=query_cache.max_rows
+    )
+
+
+@app.get(
+    "/api/v1/internal/pool",
+    status_code=status.HTTP_200_OK,
+    responses={
+        404: {"description": "The database engine is not initialized"},
+    },
+)
+async def get_pool_stats(
+    pool_status: Optional[PoolStatus] = Depends(get_pool_status),
+) -> PoolStatusResponse:
+    """
+    Endpoint for monitoring the database connection pool of this worker.
+
+    Returns:
+        - HTTP 200: Checked-out, idle and overflow connections, and the time spent
+          waiting for a connection.
+        - HTTP 404: If the database engine is not initialized.
+    """
+    if pool_status is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="The database engine is not initialized",
+        )
+    return PoolStatusResponse.model_validate(asdict(pool_status))
+
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics() -> Response:
+    """
+    Endpoint for scraping the metrics of the service in the Prometheus text format:
+    request latencies by route, requests in flight, database statement durations
+    by statement type, and CSV ingestion counters.
+    """
+    return Response(content=render_metrics(), media_type=CONTENT_TYPE_LATEST)
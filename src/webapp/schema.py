@@ -2,41 +2,9 @@ from datetime import datetime
 from enum import Enum
 from typing import Optional
 
-from pydantic import BaseModel, ConfigDict, Field, field_validator
-
-
-class GlucoseRecordCSV(BaseModel):
-    Gerät: str
-    Seriennummer: str
-    Gerätezeitstempel: datetime
-    Aufzeichnungstyp: int
-    Glukosewert_Verlauf_mg_dL: Optional[int] = Field(
-        None, alias="Glukosewert-Verlauf mg/dL"
-    )
-    Glukose_Scan_mg_dL: Optional[int] = None
-    Nicht_numerisches_schnellwirkendes_Insulin: Optional[str] = None
-    Schnellwirkendes_Insulin_Einheiten: Optional[float] = None
-    Nicht_numerische_Nahrungsdaten: Optional[str] = None
-    Kohlenhydrate_Gramm: Optional[float] = None
-    Kohlenhydrate_Portionen: Optional[float] = None
-    Nicht_numerisches_Depotinsulin: Optional[str] = None
-    Depotinsulin_Einheiten: Optional[float] = None
-    Notizen: Optional[str] = None
-    Glukose_Teststreifen_mg_dL: Optional[int] = None
-    Keton_mmol_L: Optional[float] = None
-    Mahlzeiteninsulin_Einheiten: Optional[float] = None
-    Korrekturinsulin_Einheiten: Optional[float] = None
-    Insulin_Änderung_durch_Anwender_Einheiten: Optional[float] = None
-
-    @field_validator("Gerätezeitstempel", mode="before")
-    def parse_datetime(cls, value):
-        if isinstance(value, str):
-            return datetime.strptime(value, "%d-%m-%Y %H:%M")
-        return value
-
-    @field_validator("Glukosewert_Verlauf_mg_dL", mode="before")
-    def empty_str_to_none(cls, v):
-        return None if v == "" else v
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.domain.jobs import JobStatus
 
 
 class SortOrder(str, Enum):
@@ -44,10 +12,84 @@ class SortOrder(str, Enum):
     desc = "desc"
 
 
+class AggregationBucket(str, Enum):
+    fifteen_minutes = "15m"
+    hour = "1h"
+    day = "1d"
+    week = "1w"
+
+
+class AggregationMetric(str, Enum):
+    count = "count"  # type: ignore[assignment]
+    mean = "mean"
+    min = "min"
+    max = "max"
+    p5 = "p5"
+    p25 = "p25"
+    p50 = "p50"
+    p75 = "p75"
+    p95 = "p95"
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
 class StatusResponse(BaseModel):
     status: str
 
 
+class IngestResponse(StatusResponse):
+    inserted: int
+    skipped: int
+
+
+class IngestJobResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+
+
+class IngestJobStatusResponse(BaseModel):
+    job_id: str
+    user_id: str
+    status: JobStatus
+    rows_parsed: int
+    rows_inserted: int
+    rows_skipped: int
+    rows_per_second: float
+    errors: list[str]
+    created_at: datetime
+    started_at: Optional[datetime]
+    finished_at: Optional[datetime]
+
+
+class CacheStatsResponse(BaseModel):
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    entries: int
+    rows: int
+    max_rows: int
+
+
+class PoolWaitResponse(BaseModel):
+    acquisitions: int
+    timeouts: int
+    wait_seconds_total: float
+    wait_seconds_max: float
+
+
+class PoolStatusResponse(BaseModel):
+    size: int
+    max_overflow: int
+    checked_out: int
+    idle: int
+    overflow: int
+    wait: PoolWaitResponse
+
+
 class GlucoseLevelResponse(BaseModel):
     id: int
     user_id: str
@@ -72,3 +114,109 @@ class GlucoseLevelResponse(BaseModel):
     insulin_change_by_user: Optional[float]
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class GlucoseLevelFieldsResponse(BaseModel):
+    """
+    A glucose level of a sparse fieldset: only the fields named in `fields` are
+    present.
+    """
+
+    id: Optional[int] = None
+    user_id: Optional[str] = None
+    device: Optional[str] = None
+    serial_number: Optional[str] = None
+    device_timestamp: Optional[datetime] = None
+    record_type: Optional[int] = None
+    glucose_value_history: Optional[int] = None
+    glucose_scan: Optional[float] = None
+    non_numeric_fast_insulin: Optional[str] = None
+    fast_insulin_units: Optional[float] = None
+    non_numeric_food: Optional[str] = None
+    carbs_grams: Optional[float] = None
+    carbs_portions: Optional[float] = None
+    non_numeric_long_insulin: Optional[str] = None
+    long_insulin_units: Optional[float] = None
+    notes: Optional[str] = None
+    glucose_teststrip: Optional[float] = None
+    ketone: Optional[float] = None
+    meal_insulin: Optional[float] = None
+    correction_insulin: Optional[float] = None
+    insulin_change_by_user: Optional[float] = None
+
+    model_config = ConfigDict(from_attributes=True, extra="forbid")
+
+
+class GlucoseLevelsBatchRequest(BaseModel):
+    user_ids: list[str] = Field(..., min_length=1, max_length=200)
+    start: Optional[datetime] = Field(None, description="Start timestamp")
+    end: Optional[datetime] = Field(None, description="End timestamp")
+    limit: int = Field(100, ge=1, le=1000, description="Records per user")
+    sort: SortOrder = SortOrder.desc
+
+
+class UserGlucoseLevels(BaseModel):
+    user_id: str
+    levels: list[GlucoseLevelResponse]
+
+
+class GlucoseLevelsBatchResponse(BaseModel):
+    users: list[UserGlucoseLevels]
+
+
+class GlucoseLevelsByIdsRequest(BaseModel):
+    ids: list[int] = Field(..., min_length=1, max_length=5000)
+
+
+class GlucoseLevelsByIdsResponse(BaseModel):
+    levels: list[GlucoseLevelResponse]
+    missing_ids: list[int]
+
+
+class GlucoseAggregateBucket(BaseModel):
+    start: datetime
+    count: Optional[int] = None
+    mean: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+    p5: Optional[float] = None
+    p25: Optional[float] = None
+    p50: Optional[float] = None
+    p75: Optional[float] = None
+    p95: Optional[float] = None
+
+
+class GlucoseAggregateResponse(BaseModel):
+    user_id: str
+    bucket: AggregationBucket
+    buckets: list[GlucoseAggregateBucket]
+
+
+class TimeInRanges(BaseModel):
+    very_low: float = Field(..., description="% of readings below 54 mg/dL")
+    low: float = Field(..., description="% of readings from 54 to 69 mg/dL")
+    in_range: float = Field(..., description="% of readings from 70 to 180 mg/dL")
+    high: float = Field(..., description="% of readings from 181 to 250 mg/dL")
+    very_high: float = Field(..., description="% of readings above 250 mg/dL")
+
+
+class AGPBin(BaseModel):
+    time: str = Field(..., description="Start of the time-of-day bin (HH:MM)")
+    p5: float
+    p25: float
+    p50: float
+    p75: float
+    p95: float
+
+
+class GlucoseMetricsResponse(BaseModel):
+    user_id: str
+    start: Optional[datetime]
+    end: Optional[datetime]
+    reading_count: int
+    mean: float
+    standard_deviation: float
+    coefficient_of_variation: float = Field(..., description="CV in %")
+    glucose_management_indicator: float = Field(..., description="GMI in %")
+    time_in_ranges: TimeInRanges
+    agp: list[AGPBin] = Field(..., description="Ambulatory glucose profile")
@@ -0,0 +1,157 @@
+"""
+Production server: Gunicorn managing Uvicorn worker processes.
+
+Gunicorn supervises the workers, restarts them if they die, and can import the app
+once before forking them (`preload`), so the workers share the imported code
+copy-on-write. Each worker serves the app with uvloop and httptools. On shutdown,
+workers stop accepting connections and drain the open ones for up to the graceful
+timeout before the app's lifespan cleanup runs.
+"""
+
+import os
+import resource
+import sys
+import time
+from typing import Any
+
+from gunicorn.app.base import BaseApplication  # type: ignore[import-untyped]
+from prometheus_client import multiprocess
+from uvicorn.importer import import_from_string
+from uvicorn_worker import UvicornWorker  # type: ignore[import-untyped]
+
+# Seconds of the graceful timeout kept for the lifespan cleanup after draining
+SHUTDOWN_CLEANUP_SECONDS = 5
+
+
+def default_worker_count(csv_parser_workers: int) -> int:
+    """
+    Returns the number of workers that keeps one process per CPU.
+
+    Every worker starts its own pool of `csv_parser_workers` CSV parser processes,
+    so each worker takes `1 + csv_parser_workers` CPUs under a full upload load.
+
+    Args:
+        csv_parser_workers (int): Size of the CSV parser pool of each worker.
+
+    Returns:
+        int: The number of workers, at least 1.
+    """
+    return max((os.cpu_count() or 1) // (1 + max(csv_parser_workers, 0)), 1)
+
+
+def peak_memory_mib() -> float:
+    """
+    Returns the peak resident set size of the current process in MiB.
+    """
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in KiB elsewhere
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+class ProductionUvicornWorker(UvicornWorker):
+    """
+    Uvicorn worker with the uvloop event loop and the httptools HTTP parser.
+    """
+
+    CONFIG_KWARGS = {"loop": "uvloop", "http": "httptools"}
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        # Gunicorn kills workers that are still running after the graceful timeout
+        self.config.timeout_graceful_shutdown = max(
+            self.cfg.graceful_timeout - SHUTDOWN_CLEANUP_SECONDS, 1
+        )
+
+
+def _post_fork(server: Any, worker: Any) -> None:
+    worker.forked_at = time.monotonic()
+
+
+def _post_worker_init(worker: Any) -> None:
+    worker.log.info(
+        f"Worker {worker.pid} booted in {time.monotonic() - worker.forked_at:.2f}s, "
+        f"peak RSS {peak_memory_mib():.1f} MiB"
+    )
+
+
+def _child_exit(server: Any, worker: Any) -> None:
+    # Drops the live gauges of the worker from the shared Prometheus metrics
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        multiprocess.mark_process_dead(worker.pid)
+
+
+class ProductionServer(BaseApplication):
+    """
+    Gunicorn application serving an ASGI app given by its import string.
+    """
+
+    def __init__(self, app: str, options: dict[str, Any]) -> None:
+        """
+        Args:
+            app (str): Import string of the app, e.g. `src.webapp.main:app`.
+            options (dict[str, Any]): Gunicorn settings, e.g. `workers`.
+        """
+        self.app = app
+        self.options = options
+        self.started_at = time.monotonic()
+        super().__init__()
+
+    def load_config(self) -> None:
+        for key, value in self.options.items():
+            self.cfg.set(key, value)
+        self.cfg.set(
+            "worker_class",
+            f"{ProductionUvicornWorker.__module__}.{ProductionUvicornWorker.__name__}",
+        )
+        self.cfg.set("post_fork", _post_fork)
+        self.cfg.set("post_worker_init", _post_worker_init)
+        self.cfg.set("child_exit", _child_exit)
+        self.cfg.set("when_ready", self._when_ready)
+
+    def load(self) -> Any:
+        return import_from_string(self.app)
+
+    def _when_ready(self, server: Any) -> None:
+        server.log.info(
+            f"Master {server.pid} ready in {time.monotonic() - self.started_at:.2f}s "
+            f"with {server.num_workers} workers (preload={self.cfg.preload_app}), "
+            f"peak RSS {peak_memory_mib():.1f} MiB"
+        )
+
+
+def run_production_server(
+    app: str,
+    host: str = "0.0.0.0",
+    port: int = 8000,
+    workers: int = 1,
+    keep_alive: int = 5,
+    backlog: int = 2048,
+    graceful_timeout: int = 30,
+    preload: bool = False,
+) -> None:
+    """
+    Runs an ASGI app with Gunicorn and Uvicorn workers until the server is stopped.
+
+    Args:
+        app (str): Import string of the app, e.g. `src.webapp.main:app`.
+        host (str): Interface to bind to.
+        port (int): Port to bind to.
+        workers (int): Number of worker processes.
+        keep_alive (int): Seconds an idle keep-alive connection is kept open.
+        backlog (int): Maximum number of pending connections.
+        graceful_timeout (int): Seconds workers get to finish open requests on
+            shutdown or restart.
+        preload (bool): Import the app in the master before forking the workers.
+    """
+    ProductionServer(
+        app,
+        {
+            "bind": f"{host}:{port}",
+            "workers": workers,
+            "keepalive": keep_alive,
+            "backlog": backlog,
+            "graceful_timeout": graceful_timeout,
+            "preload_app": preload,
+            "loglevel": "info",
+        },
+    ).run()